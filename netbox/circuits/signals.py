@@ -2,6 +2,7 @@ from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from dcim.signals import rebuild_paths
+from dcim.topology import CableGraph
 from .models import CircuitTermination
 
 
@@ -22,6 +23,7 @@ def rebuild_cablepaths(instance, raw=False, **kwargs):
     Rebuild any CablePaths which traverse the peer CircuitTermination.
     """
     if not raw:
+        CableGraph.invalidate()
         peer_termination = instance.get_peer_termination()
         if peer_termination:
             rebuild_paths([peer_termination])
@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from core.choices import *
 from core.models import *
+from extras.choices import LogLevelChoices
 from netbox.api.fields import ChoiceField, ContentTypeField
 from netbox.api.serializers import BaseModelSerializer, NetBoxModelSerializer
 from users.api.nested_serializers import NestedUserSerializer
@@ -10,6 +11,7 @@ from .nested_serializers import *
 __all__ = (
     'DataFileSerializer',
     'DataSourceSerializer',
+    'JobLogEntrySerializer',
     'JobSerializer',
 )
 
@@ -63,10 +65,21 @@ class JobSerializer(BaseModelSerializer):
     object_type = ContentTypeField(
         read_only=True
     )
+    parent = NestedJobSerializer(
+        read_only=True
+    )
 
     class Meta:
         model = Job
         fields = [
             'id', 'url', 'display', 'object_type', 'object_id', 'name', 'status', 'created', 'scheduled', 'interval',
-            'started', 'completed', 'user', 'data', 'job_id',
+            'started', 'completed', 'user', 'data', 'job_id', 'parent',
         ]
+
+
+class JobLogEntrySerializer(serializers.ModelSerializer):
+    level = ChoiceField(choices=LogLevelChoices, read_only=True)
+
+    class Meta:
+        model = JobLogEntry
+        fields = ['id', 'created', 'level', 'section', 'object_repr', 'object_url', 'message']
@@ -56,3 +56,15 @@ class JobViewSet(ReadOnlyModelViewSet):
     queryset = Job.objects.prefetch_related('user')
     serializer_class = serializers.JobSerializer
     filterset_class = filtersets.JobFilterSet
+
+    @action(detail=True)
+    def log(self, request, pk):
+        """
+        Retrieve the log entries recorded by a job, optionally filtered by level or section.
+        """
+        job = get_object_or_404(self.queryset, pk=pk)
+        log_entries = filtersets.JobLogEntryFilterSet(request.GET, job.log_entries.all()).qs
+        page = self.paginate_queryset(log_entries)
+        serializer = serializers.JobLogEntrySerializer(page, many=True, context={'request': request})
+
+        return self.get_paginated_response(serializer.data)
@@ -3,6 +3,7 @@ from django.utils.translation import gettext as _
 
 import django_filters
 
+from extras.choices import LogLevelChoices
 from netbox.filtersets import BaseFilterSet, ChangeLoggedModelFilterSet, NetBoxModelFilterSet
 from .choices import *
 from .models import *
@@ -11,6 +12,7 @@ __all__ = (
     'DataFileFilterSet',
     'DataSourceFilterSet',
     'JobFilterSet',
+    'JobLogEntryFilterSet',
 )
 
 
@@ -111,6 +113,11 @@ class JobFilterSet(BaseFilterSet):
         null_value=None
     )
 
+    parent_id = django_filters.ModelMultipleChoiceFilter(
+        queryset=Job.objects.all(),
+        label=_('Parent (ID)'),
+    )
+
     class Meta:
         model = Job
         fields = ('id', 'object_type', 'object_id', 'name', 'interval', 'status', 'user')
@@ -122,3 +129,13 @@ class JobFilterSet(BaseFilterSet):
             Q(user__username__icontains=value) |
             Q(name__icontains=value)
         )
+
+
+class JobLogEntryFilterSet(BaseFilterSet):
+    level = django_filters.MultipleChoiceFilter(
+        choices=LogLevelChoices
+    )
+
+    class Meta:
+        model = JobLogEntry
+        fields = ('id', 'job', 'level', 'section')
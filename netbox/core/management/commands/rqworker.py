@@ -1,7 +1,10 @@
 import logging
 
+from django.db import DatabaseError, connections
 from django_rq.management.commands.rqworker import Command as _Command
 
+from extras.utils import preload_modules
+
 
 DEFAULT_QUEUES = ('high', 'default', 'low')
 
@@ -11,12 +14,17 @@ logger = logging.getLogger('netbox.rqworker')
 class Command(_Command):
     """
     Subclass django_rq's built-in rqworker to listen on all configured queues if none are specified (instead
-    of only the 'default' queue).
+    of only the 'default' queue), to preload all script and report modules, and to employ NetBoxWorker unless another
+    worker class is specified.
     """
     def handle(self, *args, **options):
         # Run the worker with scheduler functionality
         options['with_scheduler'] = True
 
+        # Execute webhook jobs within the worker process (see NetBoxWorker)
+        if not options.get('worker_class'):
+            options['worker_class'] = 'utilities.rqworker.NetBoxWorker'
+
         # If no queues have been specified on the command line, listen on all configured queues.
         if len(args) < 1:
             queues = ', '.join(DEFAULT_QUEUES)
@@ -25,4 +33,14 @@ class Command(_Command):
             )
             args = DEFAULT_QUEUES
 
+        # Load script and report modules prior to starting the worker, so that they needn't be loaded for each job
+        try:
+            count = preload_modules()
+            logger.info(f"Preloaded {count} script and report modules")
+        except DatabaseError as e:
+            logger.warning(f"Unable to preload script and report modules: {e}")
+        finally:
+            # Avoid sharing database connections with forked work horses
+            connections.close_all()
+
         super().handle(*args, **options)
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_job_created_auto_now'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField()),
+                ('level', models.CharField(default='default', max_length=30)),
+                ('section', models.CharField(blank=True, max_length=200)),
+                ('object_repr', models.CharField(blank=True, max_length=200)),
+                ('object_url', models.CharField(blank=True, max_length=200)),
+                ('message', models.TextField(blank=True)),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='log_entries', to='core.job')),
+            ],
+            options={
+                'verbose_name_plural': 'job log entries',
+                'ordering': ('pk',),
+                'indexes': [
+                    models.Index(fields=['job', 'id'], name='core_joblogentry_job'),
+                    models.Index(fields=['job', 'level', 'id'], name='core_joblogentry_job_level'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.db import migrations
+
+
+def replicate_job_logs(apps, schema_editor):
+    """
+    Move the logs of existing script & report Jobs from their data to the JobLogEntries table.
+    """
+    Job = apps.get_model('core', 'Job')
+    JobLogEntry = apps.get_model('core', 'JobLogEntry')
+
+    jobs = Job.objects.filter(
+        object_type__model__in=('reportmodule', 'scriptmodule'),
+        data__isnull=False
+    ).select_related('object_type')
+    for job in jobs.order_by('pk').iterator(chunk_size=100):
+        if type(job.data) is not dict:
+            continue
+        entries = []
+        if job.object_type.model == 'scriptmodule':
+            # Scripts record a log of (status, message) dictionaries
+            for line in job.data.pop('log', None) or []:
+                entries.append(JobLogEntry(
+                    job=job,
+                    created=job.completed or job.created,
+                    level=line.get('status') or 'default',
+                    message=line.get('message') or ''
+                ))
+        else:
+            # Reports record a log of (time, level, object, URL, message) lists for each test method
+            for method, results in job.data.items():
+                if type(results) is not dict:
+                    continue
+                for time, level, obj, url, message in results.pop('log', None) or []:
+                    entries.append(JobLogEntry(
+                        job=job,
+                        created=datetime.fromisoformat(time) if time else job.created,
+                        level=level or 'default',
+                        section=method[:200],
+                        object_repr=(obj or '')[:200],
+                        object_url=url if url and len(url) <= 200 else '',
+                        message=message or ''
+                    ))
+        JobLogEntry.objects.bulk_create(entries, batch_size=1000)
+        job.save(update_fields=['data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_joblogentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            code=replicate_job_logs,
+            reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -1,16 +1,19 @@
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import django_rq
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import connections, models
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from core.choices import JobStatusChoices
+from extras.choices import LogLevelChoices
 from extras.constants import EVENT_JOB_END, EVENT_JOB_START
 from extras.utils import FeatureQuery
 from netbox.config import get_config
@@ -20,8 +23,15 @@ from utilities.rqworker import get_queue_for_model
 
 __all__ = (
     'Job',
+    'JobLogEntry',
 )
 
+# The maximum number of log entries to buffer before writing them to the database
+JOB_LOG_BATCH_SIZE = 1000
+
+# The maximum amount of time (in seconds) for which log entries are buffered
+JOB_LOG_FLUSH_INTERVAL = 5
+
 
 class Job(models.Model):
     """
@@ -87,6 +97,13 @@ class Job(models.Model):
     job_id = models.UUIDField(
         unique=True
     )
+    parent = models.ForeignKey(
+        to='self',
+        on_delete=models.CASCADE,
+        related_name='children',
+        blank=True,
+        null=True
+    )
 
     objects = RestrictedQuerySet.as_manager()
 
@@ -99,7 +116,8 @@ class Job(models.Model):
     def get_absolute_url(self):
         # TODO: Employ dynamic registration
         if self.object_type.model == 'reportmodule':
-            return reverse(f'extras:report_result', kwargs={'job_pk': self.pk})
+            # The results of a child job are displayed with those of its parent
+            return reverse(f'extras:report_result', kwargs={'job_pk': self.parent_id or self.pk})
         if self.object_type.model == 'scriptmodule':
             return reverse(f'extras:script_result', kwargs={'job_pk': self.pk})
         return reverse('core:job', args=[self.pk])
@@ -123,6 +141,13 @@ class Job(models.Model):
         return f"{int(minutes)} minutes, {seconds:.2f} seconds"
 
     def delete(self, *args, **kwargs):
+        # Delete any child jobs individually to cancel their execution
+        for child in self.children.all():
+            child.delete()
+
+        # Delete log entries directly, rather than loading each into memory to cascade the deletion
+        self.log_entries.all()._raw_delete(using=self.log_entries.db)
+
         super().delete(*args, **kwargs)
 
         rq_queue_name = get_config().QUEUE_MAPPINGS.get(self.object_type.model, RQ_QUEUE_DEFAULT)
@@ -155,6 +180,9 @@ class Job(models.Model):
         if status not in valid_statuses:
             raise ValueError(f"Invalid status for job termination. Choices are: {', '.join(valid_statuses)}")
 
+        # Write any remaining log entries
+        self.flush_log(close=True)
+
         # Mark the job as completed
         self.status = status
         self.completed = timezone.now()
@@ -163,8 +191,34 @@ class Job(models.Model):
         # Handle webhooks
         self.trigger_webhooks(event=EVENT_JOB_END)
 
+    def log(self, message, level=LogLevelChoices.LOG_DEFAULT, section='', obj=None):
+        """
+        Record a line of log output for the job. Entries are buffered and written to the database in batches, so that
+        they may be viewed while the job is still running. The log entries of a child job are recorded under its
+        parent.
+
+        Args:
+            message: The message to log
+            level: The LogLevelChoices level of the message
+            section: The part of the job to which the message pertains (e.g. a report's test method) (optional)
+            obj: The object to which the message pertains (optional)
+        """
+        if not hasattr(self, '_log_writer'):
+            self._log_writer = JobLogWriter(self)
+        self._log_writer.write(message, level, section, obj)
+
+    def flush_log(self, close=False):
+        """
+        Write any buffered log entries to the database. If close is True, release the resources used to write them.
+        """
+        if writer := getattr(self, '_log_writer', None):
+            writer.flush()
+            if close:
+                writer.close()
+                del self._log_writer
+
     @classmethod
-    def enqueue(cls, func, instance, name='', user=None, schedule_at=None, interval=None, **kwargs):
+    def enqueue(cls, func, instance, name='', user=None, schedule_at=None, interval=None, parent=None, **kwargs):
         """
         Create a Job instance and enqueue a job using the given callable
 
@@ -175,6 +229,7 @@ class Job(models.Model):
             user: The user responsible for running the job
             schedule_at: Schedule the job to be executed at the passed date and time
             interval: Recurrence interval (in minutes)
+            parent: The Job of which this job forms a part (optional)
         """
         object_type = ContentType.objects.get_for_model(instance, for_concrete_model=False)
         rq_queue_name = get_queue_for_model(object_type.model)
@@ -188,7 +243,8 @@ class Job(models.Model):
             scheduled=schedule_at,
             interval=interval,
             user=user,
-            job_id=uuid.uuid4()
+            job_id=uuid.uuid4(),
+            parent=parent
         )
 
         if schedule_at:
@@ -221,3 +277,104 @@ class Job(models.Model):
                 timestamp=str(timezone.now()),
                 username=self.user.username
             )
+
+
+class JobLogEntry(models.Model):
+    """
+    A line of log output recorded by a Job (e.g. by a custom script or report).
+    """
+    job = models.ForeignKey(
+        to='core.Job',
+        on_delete=models.CASCADE,
+        related_name='log_entries',
+        db_index=False
+    )
+    created = models.DateTimeField()
+    level = models.CharField(
+        max_length=30,
+        choices=LogLevelChoices,
+        default=LogLevelChoices.LOG_DEFAULT
+    )
+    section = models.CharField(
+        max_length=200,
+        blank=True
+    )
+    object_repr = models.CharField(
+        max_length=200,
+        blank=True
+    )
+    object_url = models.CharField(
+        max_length=200,
+        blank=True
+    )
+    message = models.TextField(
+        blank=True
+    )
+
+    objects = RestrictedQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('job', 'id'), name='core_joblogentry_job'),
+            models.Index(fields=('job', 'level', 'id'), name='core_joblogentry_job_level'),
+        )
+        ordering = ('pk',)
+        verbose_name_plural = 'job log entries'
+
+    def __str__(self):
+        return self.message
+
+    def get_level_color(self):
+        return LogLevelChoices.colors.get(self.level)
+
+
+class JobLogWriter:
+    """
+    Buffers the log entries of a Job and writes them to the database in batches. Each batch is written by a dedicated
+    thread, and thus using its own database connection, so that entries are neither hidden nor discarded by any
+    transaction in progress (e.g. that of a script being run without committing its changes). The Job's data is
+    saved along with each batch to report its progress.
+    """
+    def __init__(self, job):
+        self.job = job
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def write(self, message, level, section='', obj=None):
+        # Omit any URL too long to be stored, rather than recording a truncated (and thus broken) link
+        object_url = obj.get_absolute_url() if hasattr(obj, 'get_absolute_url') else ''
+        if len(object_url) > JobLogEntry._meta.get_field('object_url').max_length:
+            object_url = ''
+        self.buffer.append(JobLogEntry(
+            job_id=self.job.parent_id or self.job.pk,
+            created=timezone.now(),
+            level=level,
+            section=(section or '')[:200],
+            object_repr=str(obj)[:200] if obj else '',
+            object_url=object_url,
+            message=str(message)
+        ))
+        if len(self.buffer) >= JOB_LOG_BATCH_SIZE or time.monotonic() - self.last_flush >= JOB_LOG_FLUSH_INTERVAL:
+            self.flush()
+
+    def _write(self, entries, data):
+        JobLogEntry.objects.bulk_create(entries)
+        if data is not None:
+            Job.objects.filter(pk=self.job.pk).update(data=data)
+
+    def flush(self):
+        """
+        Write all buffered entries, waiting for the write to complete.
+        """
+        entries, self.buffer = self.buffer, []
+        self.last_flush = time.monotonic()
+        if entries:
+            self.executor.submit(self._write, entries, self.job.data).result()
+
+    def close(self):
+        """
+        Close the writer thread's database connection and stop the thread.
+        """
+        self.executor.submit(connections.close_all).result()
+        self.executor.shutdown()
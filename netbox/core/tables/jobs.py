@@ -1,8 +1,21 @@
 import django_tables2 as tables
 from django.utils.translation import gettext as _
 
-from netbox.tables import NetBoxTable, columns
-from ..models import Job
+from netbox.tables import BaseTable, NetBoxTable, columns
+from ..models import Job, JobLogEntry
+
+__all__ = (
+    'JobLogEntryTable',
+    'JobTable',
+)
+
+JOBLOGENTRY_OBJECT = """
+{% if record.object_url %}
+  <a href="{{ record.object_url }}">{{ value }}</a>
+{% else %}
+  {{ value }}
+{% endif %}
+"""
 
 
 class JobTable(NetBoxTable):
@@ -37,3 +50,24 @@ class JobTable(NetBoxTable):
         default_columns = (
             'pk', 'id', 'object_type', 'object', 'name', 'status', 'created', 'started', 'completed', 'user',
         )
+
+
+class JobLogEntryTable(BaseTable):
+    created = columns.DateTimeColumn(
+        verbose_name=_('Time')
+    )
+    section = tables.Column(
+        verbose_name=_('Section')
+    )
+    level = columns.ChoiceFieldColumn()
+    object = columns.TemplateColumn(
+        accessor='object_repr',
+        template_code=JOBLOGENTRY_OBJECT,
+        verbose_name=_('Object')
+    )
+    message = columns.MarkdownColumn()
+
+    class Meta(BaseTable.Meta):
+        model = JobLogEntry
+        fields = ('id', 'created', 'section', 'level', 'object', 'message')
+        default_columns = ('created', 'section', 'level', 'object', 'message')
@@ -1,6 +1,10 @@
+import uuid
+
+from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse
 from django.utils import timezone
 
+from extras.choices import LogLevelChoices
 from utilities.testing import APITestCase, APIViewTestCases
 from ..choices import *
 from ..models import *
@@ -91,3 +95,35 @@ class DataFileTest(
             ),
         )
         DataFile.objects.bulk_create(data_files)
+
+
+class JobLogTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        job = Job.objects.create(
+            object_type=ContentType.objects.get_by_natural_key('extras', 'reportmodule'),
+            name='Job 1',
+            job_id=uuid.uuid4()
+        )
+        levels = (LogLevelChoices.LOG_INFO, LogLevelChoices.LOG_FAILURE, LogLevelChoices.LOG_SUCCESS)
+        JobLogEntry.objects.bulk_create([
+            JobLogEntry(job=job, created=timezone.now(), level=levels[i % 3], message=f'Message {i}')
+            for i in range(30)
+        ])
+
+    def test_get_log(self):
+        self.add_permissions('core.view_job')
+        job = Job.objects.first()
+        url = reverse('core-api:job-log', kwargs={'pk': job.pk})
+
+        response = self.client.get(f'{url}?limit=10', **self.header)
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['message'], 'Message 0')
+
+        response = self.client.get(f'{url}?level=failure', **self.header)
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response.data['count'], 10)
+        self.assertTrue(all(entry['level']['value'] == 'failure' for entry in response.data['results']))
@@ -0,0 +1,63 @@
+import uuid
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from core.models import Job, JobLogEntry
+from core.models.jobs import JOB_LOG_BATCH_SIZE
+from extras.choices import LogLevelChoices
+
+
+class JobLogTest(TransactionTestCase):
+
+    def setUp(self):
+        self.job = Job.objects.create(
+            object_type=ContentType.objects.get_by_natural_key('extras', 'scriptmodule'),
+            name='Job 1',
+            job_id=uuid.uuid4()
+        )
+        self.job.start()
+
+    def test_log_batches(self):
+        # Log entries are written once a full batch has been buffered
+        for i in range(JOB_LOG_BATCH_SIZE + 10):
+            self.job.log(f'Message {i}', level=LogLevelChoices.LOG_INFO)
+        self.assertEqual(JobLogEntry.objects.filter(job=self.job).count(), JOB_LOG_BATCH_SIZE)
+
+        # Any remaining entries are written when the job terminates
+        self.job.terminate()
+        self.assertEqual(JobLogEntry.objects.filter(job=self.job).count(), JOB_LOG_BATCH_SIZE + 10)
+
+    def test_log_outside_transaction(self):
+        # Log entries must persist even if the transaction in which they are logged is rolled back
+        try:
+            with transaction.atomic():
+                self.job.log('Message', level=LogLevelChoices.LOG_FAILURE)
+                self.job.flush_log()
+                raise ValueError()
+        except ValueError:
+            pass
+        self.job.terminate()
+
+        self.assertEqual(JobLogEntry.objects.filter(job=self.job, level=LogLevelChoices.LOG_FAILURE).count(), 1)
+
+    def test_log_long_object_url(self):
+        # URLs too long to be stored are omitted
+        class Object:
+            def __init__(self, url):
+                self.url = url
+
+            def __str__(self):
+                return 'Object'
+
+            def get_absolute_url(self):
+                return self.url
+
+        self.job.log('Message 1', obj=Object('/' + 'a' * 199))
+        self.job.log('Message 2', obj=Object('/' + 'a' * 200))
+        self.job.terminate()
+
+        entries = JobLogEntry.objects.filter(job=self.job).order_by('pk')
+        self.assertEqual([entry.object_url for entry in entries], ['/' + 'a' * 199, ''])
+        self.assertEqual([entry.object_repr for entry in entries], ['Object', 'Object'])
@@ -7,6 +7,7 @@ from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
 from rest_framework.routers import APIRootView
+from rest_framework.serializers import ListSerializer
 from rest_framework.viewsets import ViewSet
 
 from circuits.models import Circuit
@@ -14,6 +15,7 @@ from dcim import filtersets
 from dcim.constants import CABLE_TRACE_SVG_DEFAULT_WIDTH
 from dcim.models import *
 from dcim.svg import CableTraceSVG
+from dcim.utils import batch_cable_paths, bulk_provisioning
 from extras.api.nested_serializers import NestedConfigTemplateSerializer
 from extras.api.mixins import ConfigContextQuerySetMixin, ConfigTemplateRenderMixin
 from ipam.models import Prefix, VLAN
@@ -414,6 +416,13 @@ class DeviceViewSet(ConfigContextQuerySetMixin, ConfigTemplateRenderMixin, NetBo
 
         return serializers.DeviceWithConfigContextSerializer
 
+    def perform_create(self, serializer):
+        # Signal the creation of all device components in batches when creating devices in bulk
+        if isinstance(serializer, ListSerializer):
+            with bulk_provisioning():
+                return super().perform_create(serializer)
+        return super().perform_create(serializer)
+
     @action(detail=True, methods=['post'], url_path='render-config', renderer_classes=[JSONRenderer, TextRenderer])
     def render_config(self, request, pk):
         """
@@ -560,6 +569,20 @@ class CableViewSet(NetBoxModelViewSet):
     serializer_class = serializers.CableSerializer
     filterset_class = filtersets.CableFilterSet
 
+    # Trace all cable paths affected by bulk operations in a single batch
+
+    def perform_create(self, serializer):
+        with batch_cable_paths():
+            super().perform_create(serializer)
+
+    def perform_bulk_update(self, objects, update_data, partial):
+        with batch_cable_paths():
+            return super().perform_bulk_update(objects, update_data, partial)
+
+    def perform_bulk_destroy(self, objects):
+        with batch_cable_paths():
+            super().perform_bulk_destroy(objects)
+
 
 class CableTerminationViewSet(NetBoxModelViewSet):
     metadata_class = ContentTypeMetadata
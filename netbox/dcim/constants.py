@@ -90,6 +90,12 @@ MODULAR_COMPONENT_MODELS = Q(
 
 CABLE_TRACE_SVG_DEFAULT_WIDTH = 400
 
+# Minimum number of CablePaths retraced in a batch for which an in-memory CableGraph is employed
+CABLE_GRAPH_THRESHOLD = 100
+
+# Maximum number of CableGraphs (for the entire instance or for individual sites) held in memory by each process
+CABLE_GRAPH_CACHE_SIZE = 4
+
 # Cable endpoint types
 CABLE_TERMINATION_MODELS = Q(
     Q(app_label='circuits', model__in=(
@@ -13,6 +13,7 @@ from dcim.choices import *
 from dcim.constants import *
 from dcim.fields import PathField
 from dcim.utils import decompile_path_node, object_to_path_node
+from netbox.context import cable_graph
 from netbox.models import ChangeLoggedModel, PrimaryModel
 
 from utilities.fields import ColorField
@@ -483,6 +484,11 @@ class CablePath(models.Model):
         if not terminations:
             return None
 
+        # Trace the path using the active CableGraph (if any), falling back to the database if it cannot be traced
+        graph = cable_graph.get()
+        if graph is not None and (attrs := graph.trace(terminations)) is not None:
+            return cls(**attrs) if attrs['path'] else None
+
         # Ensure all originating terminations are attached to the same link
         if len(terminations) > 1:
             assert all(t.link == terminations[0].link for t in terminations[1:])
@@ -19,7 +19,9 @@ from dcim.constants import *
 from extras.models import ConfigContextModel
 from extras.querysets import ConfigContextModelQuerySet
 from netbox.config import ConfigItem
+from netbox.context import bulk_create_signals
 from netbox.models import OrganizationalModel, PrimaryModel
+from netbox.signals import post_bulk_create
 from utilities.choices import ColorChoices
 from utilities.fields import ColorField, NaturalOrderingField
 from .device_components import *
@@ -238,16 +240,23 @@ class DeviceType(PrimaryModel, WeightMixin):
             })
 
         # If editing an existing DeviceType to have a larger u_height, first validate that *all* instances of it have
-        # room to expand within their racks. This validation will impose a very high performance penalty when there are
-        # many instances to check, but increasing the u_height of a DeviceType should be a very rare occurrence.
+        # room to expand within their racks. The occupancy of all affected racks (excluding the instances themselves) is
+        # computed at once, and each instance is then placed at its new height in turn.
         if self.pk and self.u_height > self._original_u_height:
-            for d in Device.objects.filter(device_type=self, position__isnull=False):
+            from .racks import RackOccupancy
+            devices = Device.objects.filter(device_type=self, position__isnull=False).select_related('rack')
+            occupancy = RackOccupancy.for_racks(
+                {d.rack_id: d.rack for d in devices}.values(),
+                exclude=[d.pk for d in devices],
+                reservations=False
+            )
+            for d in devices:
                 face_required = None if self.is_full_depth else d.face
-                u_available = d.rack.get_available_units(
+                u_available = occupancy[d.rack_id].get_available_units(
                     u_height=self.u_height,
-                    rack_face=face_required,
-                    exclude=[d.pk]
+                    rack_face=face_required
                 )
+                occupancy[d.rack_id].add_device(d.position, d.face, self.u_height, self.is_full_depth)
                 if d.position not in u_available:
                     raise ValidationError({
                         'u_height': "Device {} in rack {} does not have sufficient space to accommodate a height of "
@@ -468,6 +477,27 @@ class Platform(OrganizationalModel):
         return reverse('dcim:platform', args=[self.pk])
 
 
+def send_post_create_signals(model, instances):
+    """
+    Send the appropriate signal(s) for components created via bulk_create(): a single post_bulk_create signal if
+    batched signals are enabled (see bulk_provisioning()), or otherwise post_save for each component.
+    """
+    if not instances:
+        return
+    if bulk_create_signals.get():
+        post_bulk_create.send(sender=model, instances=instances)
+        return
+    for instance in instances:
+        post_save.send(
+            sender=model,
+            instance=instance,
+            created=True,
+            raw=False,
+            using='default',
+            update_fields=None
+        )
+
+
 def update_interface_bridges(device, interface_templates, module=None):
     """
     Used for device and module instantiation. Iterates all InterfaceTemplates with a bridge assigned
@@ -836,16 +866,8 @@ class Device(PrimaryModel, ConfigContextModel):
                 return
             model = components[0]._meta.model
             model.objects.bulk_create(components)
-            # Manually send the post_save signal for each of the newly created components
-            for component in components:
-                post_save.send(
-                    sender=model,
-                    instance=component,
-                    created=True,
-                    raw=False,
-                    using='default',
-                    update_fields=None
-                )
+            # Manually send the post_save (or post_bulk_create) signal for the newly created components
+            send_post_create_signals(model, components)
         else:
             for obj in queryset:
                 component = obj.instantiate(device=self)
@@ -1095,16 +1117,8 @@ class Module(PrimaryModel, ConfigContextModel):
                     create_instances.append(template_instance)
 
             component_model.objects.bulk_create(create_instances)
-            # Emit the post_save signal for each newly created object
-            for component in create_instances:
-                post_save.send(
-                    sender=component_model,
-                    instance=component,
-                    created=True,
-                    raw=False,
-                    using='default',
-                    update_fields=None
-                )
+            # Emit the post_save (or post_bulk_create) signal for the newly created objects
+            send_post_create_signals(component_model, create_instances)
 
             update_fields = ['module']
             component_model.objects.bulk_update(update_instances, update_fields)
@@ -1,4 +1,5 @@
 import decimal
+from collections import defaultdict
 from functools import cached_property
 
 from django.contrib.auth.models import User
@@ -13,6 +14,7 @@ from django.utils.translation import gettext as _
 
 from dcim.choices import *
 from dcim.constants import *
+from dcim.querysets import RackQuerySet
 from dcim.svg import RackElevationSVG
 from netbox.models import OrganizationalModel, PrimaryModel
 from utilities.choices import ColorChoices
@@ -25,6 +27,7 @@ from .power import PowerFeed
 
 __all__ = (
     'Rack',
+    'RackOccupancy',
     'RackReservation',
     'RackRole',
 )
@@ -182,6 +185,8 @@ class Rack(PrimaryModel, WeightMixin):
         to='extras.ImageAttachment'
     )
 
+    objects = RackQuerySet.as_manager()
+
     clone_fields = (
         'site', 'location', 'tenant', 'status', 'role', 'type', 'width', 'u_height', 'desc_units', 'outer_width',
         'outer_depth', 'outer_unit', 'mounting_depth', 'weight', 'max_weight', 'weight_unit',
@@ -338,6 +343,13 @@ class Rack(PrimaryModel, WeightMixin):
 
         return [u for u in elevation.values()]
 
+    @cached_property
+    def occupancy(self):
+        """
+        Return the RackOccupancy of the rack, reflecting both installed devices and reservations.
+        """
+        return RackOccupancy.for_racks([self])[self.pk]
+
     def get_available_units(self, u_height=1, rack_face=None, exclude=None):
         """
         Return a list of units within the rack available to accommodate a device of a given U height (default 1).
@@ -348,31 +360,8 @@ class Rack(PrimaryModel, WeightMixin):
         :param rack_face: The face of the rack (front or rear) required; 'None' if device is full depth
         :param exclude: List of devices IDs to exclude (useful when moving a device within a rack)
         """
-        # Gather all devices which consume U space within the rack
-        devices = self.devices.prefetch_related('device_type').filter(position__gte=1)
-        if exclude is not None:
-            devices = devices.exclude(pk__in=exclude)
-
-        # Initialize the rack unit skeleton
-        units = list(self.units)
-
-        # Remove units consumed by installed devices
-        for d in devices:
-            if rack_face is None or d.face == rack_face or d.device_type.is_full_depth:
-                for u in drange(d.position, d.position + d.device_type.u_height, 0.5):
-                    try:
-                        units.remove(u)
-                    except ValueError:
-                        # Found overlapping devices in the rack!
-                        pass
-
-        # Remove units without enough space above them to accommodate a device of the specified height
-        available_units = []
-        for u in units:
-            if set(drange(u, u + decimal.Decimal(u_height), 0.5)).issubset(units):
-                available_units.append(u)
-
-        return list(reversed(available_units))
+        occupancy = RackOccupancy.for_racks([self], exclude=exclude, reservations=False)[self.pk]
+        return occupancy.get_available_units(u_height=u_height, rack_face=rack_face)
 
     def get_reserved_units(self):
         """
@@ -432,25 +421,20 @@ class Rack(PrimaryModel, WeightMixin):
         Determine the utilization rate of the rack and return it as a percentage. Occupied and reserved units both count
         as utilized.
         """
-        # Determine unoccupied units
-        total_units = len(list(self.units))
-        available_units = self.get_available_units(u_height=0.5)
-
-        # Remove reserved units
-        for ru in self.get_reserved_units():
-            for u in drange(ru, ru + 1, 0.5):
-                if u in available_units:
-                    available_units.remove(u)
+        # Use the annotated value, if present (see RackQuerySet.annotate_utilization())
+        if hasattr(self, 'utilization'):
+            return self.utilization
 
-        occupied_unit_count = total_units - len(available_units)
-        percentage = float(occupied_unit_count) / total_units * 100
-
-        return percentage
+        return self.occupancy.get_utilization()
 
     def get_power_utilization(self):
         """
         Determine the utilization rate of power in the rack and return it as a percentage.
         """
+        # Use the annotated value, if present (see RackQuerySet.annotate_utilization())
+        if hasattr(self, 'power_utilization'):
+            return self.power_utilization
+
         powerfeeds = PowerFeed.objects.filter(rack=self)
         available_power_total = sum(pf.available_power for pf in powerfeeds)
         if not available_power_total:
@@ -556,3 +540,128 @@ class RackReservation(PrimaryModel):
     @property
     def unit_list(self):
         return array_to_string(self.units)
+
+
+#
+# Rack occupancy
+#
+
+class RackOccupancy:
+    """
+    The occupancy of a rack's units by devices and reservations, represented as bitmaps of half-units. Bit n of each
+    bitmap represents the half-unit beginning at U(1 + n/2).
+
+    :param rack: The Rack
+    :param devices: An iterable of (position, face, u_height, is_full_depth) tuples for the devices installed in the rack
+    :param reserved_units: An iterable of reserved unit numbers
+    """
+    def __init__(self, rack, devices=(), reserved_units=()):
+        self.rack = rack
+        self.size = int(rack.u_height * 2)
+        self.mask = (1 << self.size) - 1
+
+        # Units occupied on the front and rear faces, and by any device regardless of face
+        self.front = self.rear = self.occupied = 0
+        for device in devices:
+            self.add_device(*device)
+
+        self.reserved = 0
+        for u in reserved_units:
+            self.reserved |= self._get_bits(u, 1)
+
+    def _get_bits(self, position, u_height):
+        """
+        Return a bitmap of the half-units spanned by an object of the given height installed at the given position.
+        """
+        start = int((position - 1) * 2)
+        if start < 0:
+            return 0
+        return (((1 << int(u_height * 2)) - 1) << start) & self.mask
+
+    def add_device(self, position, face, u_height, is_full_depth):
+        """
+        Mark the units spanned by a device as occupied.
+        """
+        bits = self._get_bits(position, u_height)
+        self.occupied |= bits
+        if is_full_depth or face == DeviceFaceChoices.FACE_FRONT:
+            self.front |= bits
+        if is_full_depth or face == DeviceFaceChoices.FACE_REAR:
+            self.rear |= bits
+
+    @classmethod
+    def for_racks(cls, racks, exclude=None, reservations=True):
+        """
+        Return a dictionary mapping the ID of each of the given racks to its RackOccupancy. Installed devices (and
+        reservations) are retrieved for all racks at once.
+
+        :param racks: An iterable of Racks
+        :param exclude: List of device IDs to exclude
+        :param reservations: If False, reservations are not retrieved
+        """
+        racks = {rack.pk: rack for rack in racks}
+
+        devices = defaultdict(list)
+        queryset = Device.objects.filter(rack__in=racks.keys(), position__gte=1)
+        if exclude is not None:
+            queryset = queryset.exclude(pk__in=exclude)
+        for rack_id, *attrs in queryset.values_list(
+            'rack_id', 'position', 'face', 'device_type__u_height', 'device_type__is_full_depth'
+        ):
+            devices[rack_id].append(attrs)
+
+        reserved_units = defaultdict(list)
+        if reservations:
+            for rack_id, units in RackReservation.objects.filter(rack__in=racks.keys()).values_list('rack_id', 'units'):
+                reserved_units[rack_id].extend(units)
+
+        return {
+            pk: cls(rack, devices[pk], reserved_units[pk]) for pk, rack in racks.items()
+        }
+
+    def _get_units(self, bitmap):
+        """
+        Return the positions represented by the given bitmap, ordered from the bottom of the rack to the top.
+        """
+        units = [
+            decimal.Decimal('1.0') + decimal.Decimal('0.5') * n for n in range(self.size) if bitmap >> n & 1
+        ]
+        if self.rack.desc_units:
+            units.reverse()
+        return units
+
+    def get_available_units(self, u_height=1, rack_face=None):
+        """
+        Return a list of units available to accommodate a device of the given U height.
+
+        :param u_height: Minimum number of contiguous free units required
+        :param rack_face: The face of the rack (front or rear) required; 'None' if device is full depth
+        """
+        if rack_face is None:
+            occupied = self.occupied
+        else:
+            occupied = self.front if rack_face == DeviceFaceChoices.FACE_FRONT else self.rear
+        free = ~occupied & self.mask
+
+        # Retain only positions followed by enough contiguous free half-units
+        available = free
+        for n in range(1, int(u_height * 2)):
+            available &= free >> n
+
+        return self._get_units(available)
+
+    @property
+    def reserved_units(self):
+        """
+        Return a list of all reserved units.
+        """
+        return [u for u in self._get_units(self.reserved) if not u % 1]
+
+    def get_utilization(self):
+        """
+        Return the percentage of the rack's units which are occupied or reserved.
+        """
+        if not self.size:
+            return 0
+        utilized = bin((self.occupied | self.reserved) & self.mask).count('1')
+        return float(utilized) / self.size * 100
@@ -0,0 +1,115 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import (
+    Case, DecimalField, Exists, F, FloatField, Func, IntegerField, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Least
+
+from utilities.query_functions import EmptyGroupBySum
+from utilities.querysets import RestrictedQuerySet
+
+__all__ = (
+    'RackQuerySet',
+)
+
+
+class CountDistinctElements(Func):
+    """
+    Count the distinct elements of the given arrays (combined).
+    """
+    template = '(SELECT COUNT(DISTINCT n) FROM UNNEST(%(expressions)s) AS n)'
+    arg_joiner = ' || '
+    output_field = IntegerField()
+
+
+class RackQuerySet(RestrictedQuerySet):
+
+    def annotate_utilization(self):
+        """
+        Annotate the space and power utilization of each Rack (as percentages), as returned by get_utilization() and
+        get_power_utilization() respectively.
+
+        Space utilization counts each half-unit which is occupied by a device or reserved. Power utilization compares
+        the draw allocated to power ports connected to the rack's power feeds with the feeds' available power. The
+        draw of a power port with no allocated or maximum draw defined is the sum of the draw allocated to the power
+        ports connected to its outlets.
+        """
+        from .models import Device, PowerFeed, PowerOutlet, PowerPort, RackReservation
+
+        # Half-units are numbered from zero, beginning at U1
+        device_half_units = Device.objects.filter(
+            rack=OuterRef('pk'),
+            position__gte=1
+        ).order_by().annotate(
+            n=Cast(
+                Func(
+                    (F('position') - 1) * 2,
+                    (F('position') - 1 + F('device_type__u_height')) * 2 - 1,
+                    function='generate_series',
+                    output_field=DecimalField()
+                ),
+                IntegerField()
+            )
+        ).values('n')
+        reserved_units = RackReservation.objects.filter(
+            rack=OuterRef('pk')
+        ).order_by().annotate(
+            u=Func('units', function='unnest', output_field=IntegerField())
+        )
+        reserved_half_units = (
+            reserved_units.annotate(n=Cast((F('u') - 1) * 2, IntegerField())).values('n'),
+            reserved_units.annotate(n=Cast((F('u') - 1) * 2 + 1, IntegerField())).values('n'),
+        )
+
+        # The draw of each power port connected to an outlet of the power port being evaluated
+        downstream_draw = PowerPort.objects.filter(
+            Exists(PowerOutlet.objects.filter(
+                ~Q(cable_end=OuterRef('cable_end')),
+                power_port=OuterRef(OuterRef('pk')),
+                cable=OuterRef('cable')
+            ))
+        ).order_by().annotate(
+            total=EmptyGroupBySum('allocated_draw')
+        ).values('total')
+
+        # The draw of all power ports connected to the power feed being evaluated
+        feed_draw = PowerPort.objects.filter(
+            ~Q(cable_end=OuterRef('cable_end')),
+            cable=OuterRef('cable')
+        ).order_by().annotate(
+            total=EmptyGroupBySum(Case(
+                When(
+                    allocated_draw__isnull=True,
+                    maximum_draw__isnull=True,
+                    then=Coalesce(Subquery(downstream_draw), 0)
+                ),
+                default=Coalesce('allocated_draw', 0),
+                output_field=IntegerField()
+            ))
+        ).values('total')
+
+        power_utilization = PowerFeed.objects.filter(
+            rack=OuterRef('pk')
+        ).order_by().annotate(
+            available=EmptyGroupBySum('available_power'),
+            allocated=EmptyGroupBySum(Coalesce(Subquery(feed_draw), 0))
+        ).annotate(
+            utilization=Case(
+                When(available__gt=0, then=Coalesce('allocated', 0) * 100 / F('available')),
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        ).values('utilization')
+
+        return self.annotate(
+            utilization=Least(
+                Cast(
+                    CountDistinctElements(
+                        ArraySubquery(device_half_units),
+                        *(ArraySubquery(half_units) for half_units in reserved_half_units)
+                    ),
+                    FloatField()
+                ) * 100 / (F('u_height') * 2),
+                Value(100.0)
+            ),
+            power_utilization=Coalesce(Subquery(power_utilization), 0)
+        )
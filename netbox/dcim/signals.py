@@ -1,14 +1,19 @@
 import logging
 
+from django.contrib.contenttypes.models import ContentType
 from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 
+from netbox.context import cablepath_queue
+from netbox.signals import post_bulk_create
 from .choices import CableEndChoices, LinkStatusChoices
 from .models import (
-    Cable, CablePath, CableTermination, Device, FrontPort, PathEndpoint, PowerPanel, Rack, Location, VirtualChassis,
+    Cable, CablePath, CableTermination, Device, FrontPort, PathEndpoint, PowerPanel, Rack, RearPort, Location,
+    VirtualChassis,
 )
 from .models.cables import trace_paths
-from .utils import create_cablepath, rebuild_paths
+from .topology import CableGraph
+from .utils import bulk_retrace_paths, compile_path_node, create_cablepath, rebuild_paths
 
 
 #
@@ -66,6 +71,31 @@ def clear_virtualchassis_members(instance, **kwargs):
         device.save()
 
 
+#
+# Cable topology graph
+#
+
+@receiver(trace_paths, sender=Cable)
+@receiver(post_delete, sender=Cable)
+@receiver((post_save, post_delete), sender=CableTermination)
+@receiver((post_save, post_delete), sender=FrontPort)
+@receiver((post_save, post_delete), sender=RearPort)
+@receiver(post_bulk_create, sender=FrontPort)
+@receiver(post_bulk_create, sender=RearPort)
+def invalidate_cable_graph(raw=False, **kwargs):
+    """
+    Invalidate any cached CableGraphs when the cable topology changes. (When cable paths are being retraced in a batch,
+    the graphs are invalidated once upon completion of the batch.) These receivers are connected ahead of those which
+    retrace cable paths, so that any CableGraph used to retrace them reflects the change.
+    """
+    if raw:
+        return
+    if (queue := cablepath_queue.get()) is not None:
+        queue['topology_changed'] = True
+    else:
+        CableGraph.invalidate()
+
+
 #
 # Cables
 #
@@ -80,8 +110,13 @@ def update_connected_endpoints(instance, created, raw=False, **kwargs):
         logger.debug(f"Skipping endpoint updates for imported cable {instance}")
         return
 
+    # If cable path tracing has been deferred, record the affected cable for retracing
+    queue = cablepath_queue.get()
+
     # Update cable paths if new terminations have been set
-    if instance._terminations_modified:
+    if instance._terminations_modified and queue is not None:
+        queue['cables'].add(instance.pk)
+    elif instance._terminations_modified:
         a_terminations = []
         b_terminations = []
         for t in instance.terminations.all():
@@ -102,6 +137,8 @@ def update_connected_endpoints(instance, created, raw=False, **kwargs):
     elif instance.status != instance._orig_status:
         if instance.status != LinkStatusChoices.STATUS_CONNECTED:
             CablePath.objects.filter(_nodes__contains=instance).update(is_active=False)
+        elif queue is not None:
+            queue['nodes'].add(compile_path_node(ContentType.objects.get_for_model(Cable).pk, instance.pk))
         else:
             rebuild_paths([instance])
 
@@ -111,6 +148,10 @@ def retrace_cable_paths(instance, **kwargs):
     """
     When a Cable is deleted, check for and update its connected endpoints
     """
+    if (queue := cablepath_queue.get()) is not None:
+        queue['nodes'].add(compile_path_node(ContentType.objects.get_for_model(Cable).pk, instance.pk))
+        return
+
     for cablepath in CablePath.objects.filter(_nodes__contains=instance):
         cablepath.retrace()
 
@@ -123,6 +164,11 @@ def nullify_connected_endpoints(instance, **kwargs):
     model = instance.termination_type.model_class()
     model.objects.filter(pk=instance.termination_id).update(cable=None, cable_end='')
 
+    # Detached originating objects are omitted when the affected paths are retraced in bulk
+    if (queue := cablepath_queue.get()) is not None:
+        queue['nodes'].add(compile_path_node(ContentType.objects.get_for_model(Cable).pk, instance.cable_id))
+        return
+
     for cablepath in CablePath.objects.filter(_nodes__contains=instance.cable):
         # Remove the deleted CableTermination if it's one of the path's originating nodes
         if instance.termination in cablepath.origins:
@@ -136,6 +182,24 @@ def extend_rearport_cable_paths(instance, created, raw, **kwargs):
     When a new FrontPort is created, add it to any CablePaths which end at its corresponding RearPort.
     """
     if created and not raw:
+        if (queue := cablepath_queue.get()) is not None:
+            queue['nodes'].add(compile_path_node(ContentType.objects.get_for_model(RearPort).pk, instance.rear_port_id))
+            return
+
         rearport = instance.rear_port
         for cablepath in CablePath.objects.filter(_nodes__contains=rearport):
             cablepath.retrace()
+
+
+@receiver(post_bulk_create, sender=FrontPort)
+def extend_rearport_cable_paths_bulk(instances, **kwargs):
+    """
+    When FrontPorts are created in bulk, retrace any CablePaths which end at their corresponding RearPorts.
+    """
+    rearport_ct = ContentType.objects.get_for_model(RearPort)
+    nodes = {compile_path_node(rearport_ct.pk, instance.rear_port_id) for instance in instances}
+    if (queue := cablepath_queue.get()) is not None:
+        queue['nodes'].update(nodes)
+        return
+
+    bulk_retrace_paths(nodes=nodes)
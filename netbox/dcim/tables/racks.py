@@ -1,7 +1,7 @@
 import django_tables2 as tables
 from django_tables2.utils import Accessor
 
-from dcim.models import Rack, RackReservation, RackRole
+from dcim.models import Rack, RackOccupancy, RackReservation, RackRole
 from netbox.tables import NetBoxTable, columns
 from tenancy.tables import ContactsColumnMixin, TenancyColumnsMixin
 from .template_code import WEIGHT
@@ -42,6 +42,37 @@ class RackRoleTable(NetBoxTable):
 # Racks
 #
 
+class RackUtilizationColumn(columns.UtilizationColumn):
+    """
+    Display the space utilization of each rack. If the racks have not been annotated with their utilization (see
+    RackQuerySet.annotate_utilization()), the occupancy of all racks in the table (or in the current page of the
+    table) is computed at once, rather than for each rack individually.
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('accessor', Accessor('pk'))
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def get_utilization(record, table):
+        if hasattr(record, 'utilization'):
+            return record.utilization
+        page = getattr(table, 'page', None)
+        cache = page if page is not None else table
+        if not hasattr(cache, '_rack_occupancy'):
+            rows = page.object_list if page is not None else table.rows
+            cache._rack_occupancy = RackOccupancy.for_racks([row.record for row in rows])
+        if record.pk in cache._rack_occupancy:
+            return cache._rack_occupancy[record.pk].get_utilization()
+        return record.get_utilization()
+
+    def render(self, record, table, **kwargs):
+        kwargs['value'] = self.get_utilization(record, table)
+        return super().render(record=record, table=table, **kwargs)
+
+    def value(self, record, table):
+        return super().value(self.get_utilization(record, table))
+
+
 class RackTable(TenancyColumnsMixin, ContactsColumnMixin, NetBoxTable):
     name = tables.Column(
         order_by=('_name',),
@@ -65,7 +96,7 @@ class RackTable(TenancyColumnsMixin, ContactsColumnMixin, NetBoxTable):
         url_params={'rack_id': 'pk'},
         verbose_name='Devices'
     )
-    get_utilization = columns.UtilizationColumn(
+    get_utilization = RackUtilizationColumn(
         orderable=False,
         verbose_name='Space'
     )
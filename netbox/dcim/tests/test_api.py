@@ -89,6 +89,48 @@ class RegionTest(APIViewTestCases.APIViewTestCase):
         Region.objects.create(name='Region 2', slug='region-2')
         Region.objects.create(name='Region 3', slug='region-3')
 
+    def test_bulk_update_move_subtree_to_root(self):
+        """
+        Move a region with children to the root via a bulk update.
+        """
+        self.add_permissions('dcim.change_region')
+        region = Region.objects.get(name='Region 1')
+        child = Region.objects.create(name='Region 1A', slug='region-1a', parent=region)
+        grandchild = Region.objects.create(name='Region 1A1', slug='region-1a1', parent=child)
+
+        data = [{'id': child.pk, 'parent': None}]
+        response = self.client.patch(self._get_list_url(), data, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['_depth'], 0)
+
+        region.refresh_from_db()
+        child.refresh_from_db()
+        self.assertEqual(region.get_descendant_count(), 0)
+        self.assertTrue(child.is_root_node())
+        self.assertEqual(list(child.get_descendants()), [grandchild])
+        self.assertEqual(Region.objects.get(pk=grandchild.pk).level, 1)
+
+    def test_bulk_update_move_subtree_to_other_tree(self):
+        """
+        Move a region with children into a different tree via a bulk update.
+        """
+        self.add_permissions('dcim.change_region')
+        region1 = Region.objects.get(name='Region 1')
+        region2 = Region.objects.get(name='Region 2')
+        child = Region.objects.create(name='Region 1A', slug='region-1a', parent=region1)
+        grandchild = Region.objects.create(name='Region 1A1', slug='region-1a1', parent=child)
+
+        data = [{'id': child.pk, 'parent': region2.pk}]
+        response = self.client.patch(self._get_list_url(), data, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['_depth'], 1)
+
+        region1.refresh_from_db()
+        region2.refresh_from_db()
+        self.assertEqual(region1.get_descendant_count(), 0)
+        self.assertEqual(list(region2.get_descendants()), [child, grandchild])
+        self.assertEqual(Region.objects.get(pk=grandchild.pk).level, 2)
+
 
 class SiteGroupTest(APIViewTestCases.APIViewTestCase):
     model = SiteGroup
@@ -2,9 +2,11 @@ from django.test import TestCase
 
 from circuits.models import *
 from dcim.choices import LinkStatusChoices
+from dcim.constants import CABLE_GRAPH_CACHE_SIZE
 from dcim.models import *
 from dcim.svg import CableTraceSVG
-from dcim.utils import object_to_path_node
+from dcim.topology import CableGraph, use_cable_graph
+from dcim.utils import batch_cable_paths, bulk_retrace_paths, object_to_path_node
 
 
 class CablePathTestCase(TestCase):
@@ -15,6 +17,7 @@ class CablePathTestCase(TestCase):
         1XX: Test direct connections between different endpoint types
         2XX: Test different cable topologies
         3XX: Test responses to changes in existing objects
+        4XX: Test batched retracing of paths and tracing via a CableGraph
     """
     @classmethod
     def setUpTestData(cls):
@@ -1845,3 +1848,211 @@ class CablePathTestCase(TestCase):
             is_complete=True,
             is_active=True
         )
+
+    def test_401_batch_create_paths_via_pass_through(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C3-- [RP2] [FP2:1] --C4-- [IF3]
+        [IF2] --C2-- [FP1:2]                    [FP2:2] --C5-- [IF4]
+        """
+        interface1 = Interface.objects.create(device=self.device, name='Interface 1')
+        interface2 = Interface.objects.create(device=self.device, name='Interface 2')
+        interface3 = Interface.objects.create(device=self.device, name='Interface 3')
+        interface4 = Interface.objects.create(device=self.device, name='Interface 4')
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=4)
+        rearport2 = RearPort.objects.create(device=self.device, name='Rear Port 2', positions=4)
+        frontport1_1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1:1', rear_port=rearport1, rear_port_position=1
+        )
+        frontport1_2 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1:2', rear_port=rearport1, rear_port_position=2
+        )
+        frontport2_1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 2:1', rear_port=rearport2, rear_port_position=1
+        )
+        frontport2_2 = FrontPort.objects.create(
+            device=self.device, name='Front Port 2:2', rear_port=rearport2, rear_port_position=2
+        )
+
+        # Create all cables within a single batch
+        with batch_cable_paths():
+            cable1 = Cable(a_terminations=[interface1], b_terminations=[frontport1_1])
+            cable1.save()
+            cable2 = Cable(a_terminations=[interface2], b_terminations=[frontport1_2])
+            cable2.save()
+            cable3 = Cable(a_terminations=[rearport1], b_terminations=[rearport2])
+            cable3.save()
+            cable4 = Cable(a_terminations=[frontport2_1], b_terminations=[interface3])
+            cable4.save()
+            cable5 = Cable(a_terminations=[frontport2_2], b_terminations=[interface4])
+            cable5.save()
+
+            # No paths are traced until the batch has completed
+            self.assertEqual(CablePath.objects.count(), 0)
+
+        path1 = self.assertPathExists(
+            (interface1, cable1, frontport1_1, rearport1, cable3, rearport2, frontport2_1, cable4, interface3),
+            is_complete=True,
+            is_active=True
+        )
+        self.assertPathExists(
+            (interface2, cable2, frontport1_2, rearport1, cable3, rearport2, frontport2_2, cable5, interface4),
+            is_complete=True,
+            is_active=True
+        )
+        self.assertPathExists(
+            (interface3, cable4, frontport2_1, rearport2, cable3, rearport1, frontport1_1, cable1, interface1),
+            is_complete=True,
+            is_active=True
+        )
+        self.assertPathExists(
+            (interface4, cable5, frontport2_2, rearport2, cable3, rearport1, frontport1_2, cable2, interface2),
+            is_complete=True,
+            is_active=True
+        )
+        self.assertEqual(CablePath.objects.count(), 4)
+        interface1.refresh_from_db()
+        self.assertPathIsSet(interface1, path1)
+
+        # Delete cables 3 and 4 within a single batch
+        with batch_cable_paths():
+            cable3.delete()
+            cable4.delete()
+        self.assertPathExists(
+            (interface1, cable1, frontport1_1, rearport1),
+            is_complete=False
+        )
+        self.assertPathExists(
+            (interface2, cable2, frontport1_2, rearport1),
+            is_complete=False
+        )
+        self.assertPathExists(
+            (interface4, cable5, frontport2_2, rearport2),
+            is_complete=False
+        )
+        self.assertEqual(CablePath.objects.count(), 3)
+        interface3.refresh_from_db()
+        self.assertPathIsNotSet(interface3)
+
+    def test_402_batch_remove_termination_from_existing_cable(self):
+        """
+        [IF1] --C1-- [IF2]
+                     [IF3]
+        """
+        interface1 = Interface.objects.create(device=self.device, name='Interface 1')
+        interface2 = Interface.objects.create(device=self.device, name='Interface 2')
+        interface3 = Interface.objects.create(device=self.device, name='Interface 3')
+        cable1 = Cable(
+            a_terminations=[interface1],
+            b_terminations=[interface2, interface3]
+        )
+        cable1.save()
+
+        # Remove the termination to interface 3
+        with batch_cable_paths():
+            cable1 = Cable.objects.first()
+            cable1.b_terminations = [interface2]
+            cable1.save()
+        self.assertPathExists(
+            (interface1, cable1, interface2),
+            is_complete=True,
+            is_active=True
+        )
+        path2 = self.assertPathExists(
+            (interface2, cable1, interface1),
+            is_complete=True,
+            is_active=True
+        )
+        self.assertEqual(CablePath.objects.count(), 2)
+        interface2.refresh_from_db()
+        interface3.refresh_from_db()
+        self.assertPathIsSet(interface2, path2)
+        self.assertPathIsNotSet(interface3)
+
+    def test_403_trace_path_via_cable_graph(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C2-- [CT1] [CT2] --C3-- [RP2] [FP2:1] --C4-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name='Interface 1')
+        interface2 = Interface.objects.create(device=self.device, name='Interface 2')
+        rearport1 = RearPort.objects.create(device=self.device, name='Rear Port 1', positions=4)
+        rearport2 = RearPort.objects.create(device=self.device, name='Rear Port 2', positions=4)
+        frontport1 = FrontPort.objects.create(
+            device=self.device, name='Front Port 1:1', rear_port=rearport1, rear_port_position=1
+        )
+        frontport2 = FrontPort.objects.create(
+            device=self.device, name='Front Port 2:1', rear_port=rearport2, rear_port_position=1
+        )
+        circuittermination1 = CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side='A')
+        circuittermination2 = CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side='Z')
+        cable1 = Cable(a_terminations=[interface1], b_terminations=[frontport1])
+        cable1.save()
+        cable2 = Cable(a_terminations=[rearport1], b_terminations=[circuittermination1])
+        cable2.save()
+        cable3 = Cable(a_terminations=[circuittermination2], b_terminations=[rearport2])
+        cable3.save()
+        cable4 = Cable(
+            a_terminations=[frontport2],
+            b_terminations=[interface2],
+            status=LinkStatusChoices.STATUS_PLANNED
+        )
+        cable4.save()
+        path1 = self.assertPathExists(
+            (
+                interface1, cable1, frontport1, rearport1, cable2, circuittermination1, circuittermination2, cable3,
+                rearport2, frontport2, cable4, interface2,
+            ),
+            is_complete=True,
+            is_active=False
+        )
+
+        # Tracing the path using the graph should yield an identical path without querying the database
+        interface1.refresh_from_db()
+        with use_cable_graph():
+            with self.assertNumQueries(0):
+                cablepath = CablePath.from_origin([interface1])
+        self.assertEqual(cablepath.path, path1.path)
+        self.assertTrue(cablepath.is_complete)
+        self.assertFalse(cablepath.is_active)
+        self.assertFalse(cablepath.is_split)
+
+        # Modifying the topology invalidates the graph
+        with use_cable_graph():
+            cable4.delete()
+            cablepath = CablePath.from_origin([interface1])
+        self.assertFalse(cablepath.is_complete)
+        self.assertEqual(cablepath.path[-1], [object_to_path_node(frontport2)])
+
+    def test_404_cable_graph_invalidation(self):
+        """
+        [IF1] --C1-- [IF2]
+        """
+        interface1 = Interface.objects.create(device=self.device, name='Interface 1')
+        interface2 = Interface.objects.create(device=self.device, name='Interface 2')
+        interface3 = Interface.objects.create(device=self.device, name='Interface 3')
+        cable1 = Cable(a_terminations=[interface1], b_terminations=[interface2])
+        cable1.save()
+        graph = CableGraph.get()
+
+        # Retracing paths without modifying the cable topology reuses the cached graph
+        bulk_retrace_paths(nodes=[object_to_path_node(cable1)])
+        with batch_cable_paths():
+            pass
+        self.assertIs(CableGraph.get(), graph)
+
+        # Modifying the topology within a batch invalidates the graph once the batch completes
+        with batch_cable_paths():
+            cable1.b_terminations = [interface3]
+            cable1.save()
+            self.assertIs(CableGraph.get(), graph)
+        self.assertTrue(graph.stale)
+        self.assertIsNot(CableGraph.get(), graph)
+
+        # Graphs for the least recently used sites are discarded
+        sites = Site.objects.bulk_create([
+            Site(name=f'Site {i}', slug=f'site-{i}') for i in range(1, CABLE_GRAPH_CACHE_SIZE + 2)
+        ])
+        for site in sites:
+            CableGraph.get(site=site)
+        self.assertEqual(len(CableGraph._graphs), CABLE_GRAPH_CACHE_SIZE)
+        self.assertNotIn(sites[0].pk, CableGraph._graphs)
+        self.assertIn(sites[-1].pk, CableGraph._graphs)
@@ -1,9 +1,16 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 
 from circuits.models import *
 from dcim.choices import *
 from dcim.models import *
+from dcim.utils import bulk_provisioning
+from extras.context_managers import change_logging
+from extras.models import CachedValue, ObjectChange
 from tenancy.models import Tenant
 from utilities.utils import drange
 
@@ -213,6 +220,46 @@ class RackTestCase(TestCase):
 
         self.assertEqual(len(rack.get_available_units()), rack.u_height * 2 - 3)
 
+    def test_rack_occupancy(self):
+        rack = Rack.objects.first()
+        Device.objects.create(
+            name='Device 1',
+            device_type=DeviceType.objects.get(u_height=1),
+            device_role=DeviceRole.objects.first(),
+            site=Site.objects.first(),
+            rack=rack,
+            position=10,
+            face=DeviceFaceChoices.FACE_FRONT
+        )
+        RackReservation.objects.create(
+            rack=rack,
+            units=[1, 2],
+            user=User.objects.create(username='testuser'),
+            description='Reservation 1'
+        )
+
+        # Available units for each face
+        front_units = rack.get_available_units(u_height=1, rack_face=DeviceFaceChoices.FACE_FRONT)
+        self.assertNotIn(10, front_units)
+        self.assertNotIn(9.5, front_units)
+        self.assertIn(11, front_units)
+        self.assertEqual(front_units, sorted(front_units))
+        self.assertIn(10, rack.get_available_units(u_height=1, rack_face=DeviceFaceChoices.FACE_REAR))
+        self.assertEqual(len(rack.get_available_units(u_height=42)), 0)
+
+        # Devices and reservations for any number of racks are retrieved with one query each
+        racks = list(Rack.objects.all())
+        with self.assertNumQueries(2):
+            occupancy = RackOccupancy.for_racks(racks)[rack.pk]
+        self.assertEqual(occupancy.reserved_units, [1, 2])
+        self.assertEqual(occupancy.get_utilization(), 3 / 42 * 100)
+        self.assertEqual(rack.get_utilization(), occupancy.get_utilization())
+
+        # Utilization computed by the database
+        rack = Rack.objects.annotate_utilization().get(pk=rack.pk)
+        self.assertAlmostEqual(rack.get_utilization(), occupancy.get_utilization())
+        self.assertEqual(rack.get_power_utilization(), 0)
+
     def test_change_rack_site(self):
         """
         Check that child Devices get updated when a Rack is moved to a new Site.
@@ -380,6 +427,37 @@ class DeviceTestCase(TestCase):
             name='Device Bay 1'
         )
 
+    def test_bulk_provisioning(self):
+        """
+        Ensure that components created in bulk are change logged and cached for search.
+        """
+        request = RequestFactory().get('/')
+        request.id = uuid.uuid4()
+        request.user = User.objects.create(username='testuser')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with change_logging(request), bulk_provisioning():
+                devices = [
+                    Device.objects.create(
+                        site=Site.objects.first(),
+                        device_type=DeviceType.objects.first(),
+                        device_role=DeviceRole.objects.first(),
+                        name=f'Test Device {i}'
+                    ) for i in range(1, 4)
+                ]
+
+        interfaces = Interface.objects.filter(device__in=devices)
+        self.assertEqual(interfaces.count(), 3)
+        interface_ct = ContentType.objects.get_for_model(Interface)
+        for interface in interfaces:
+            self.assertTrue(ObjectChange.objects.filter(
+                changed_object_type=interface_ct,
+                changed_object_id=interface.pk,
+                request_id=request.id
+            ).exists())
+            self.assertTrue(CachedValue.objects.filter(object_type=interface_ct, object_id=interface.pk).exists())
+        self.assertEqual(FrontPort.objects.filter(device__in=devices, rear_port__device__in=devices).count(), 3)
+
     def test_multiple_unnamed_devices(self):
 
         device1 = Device(
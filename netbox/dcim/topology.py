@@ -0,0 +1,273 @@
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+
+from netbox.context import cable_graph
+from .choices import LinkStatusChoices
+from .constants import CABLE_GRAPH_CACHE_SIZE
+from .utils import compile_path_node, decompile_path_node, object_to_path_node
+
+__all__ = (
+    'CableGraph',
+    'use_cable_graph',
+)
+
+CACHE_KEY = 'cable_graph_version'
+
+
+class CableGraph:
+    """
+    An in-memory representation of the cable topology of the entire instance (or of a single site), used to trace
+    CablePaths without querying the database at each hop. Cables, cable terminations, front/rear port mappings and
+    circuit terminations are held in compact adjacency structures keyed by object ID.
+
+    Graphs are cached per process (up to CABLE_GRAPH_CACHE_SIZE, discarding the least recently used) and reloaded
+    automatically once invalidated (see invalidate()).
+    """
+    _graphs = OrderedDict()
+
+    def __init__(self, site=None, version=None):
+        from circuits.models import CircuitTermination
+        from dcim.models import Cable, CableTermination, FrontPort, RearPort
+
+        self.site_id = site.pk if site else None
+        self.version = version
+        self.stale = False
+
+        self.ct_cable = ContentType.objects.get_for_model(Cable).pk
+        self.ct_frontport = ContentType.objects.get_for_model(FrontPort).pk
+        self.ct_rearport = ContentType.objects.get_for_model(RearPort).pk
+        self.ct_circuittermination = ContentType.objects.get_for_model(CircuitTermination).pk
+        self.ct_site = ContentType.objects.get_by_natural_key('dcim', 'site').pk
+        self.ct_providernetwork = ContentType.objects.get_by_natural_key('circuits', 'providernetwork').pk
+
+        cable_terminations = CableTermination.objects.order_by('pk')
+        front_ports = FrontPort.objects.all()
+        rear_ports = RearPort.objects.all()
+        circuit_terminations = CircuitTermination.objects.all()
+        if site is not None:
+            cable_terminations = cable_terminations.filter(
+                cable__in=CableTermination.objects.filter(_site=site).values('cable')
+            )
+            front_ports = front_ports.filter(device__site=site)
+            rear_ports = rear_ports.filter(device__site=site)
+            circuit_terminations = circuit_terminations.filter(
+                circuit__in=CircuitTermination.objects.filter(site=site).values('circuit')
+            )
+
+        # Map each cable to the nodes terminating its A and B ends, and each node to its cable end
+        self.cable_ends = defaultdict(lambda: {'A': [], 'B': []})
+        self.node_ends = {}
+        for cable_id, cable_end, ct_id, object_id in cable_terminations.values_list(
+            'cable_id', 'cable_end', 'termination_type_id', 'termination_id'
+        ):
+            node = compile_path_node(ct_id, object_id)
+            self.cable_ends[cable_id][cable_end].append(node)
+            self.node_ends[node] = cable_end
+        self.cable_ends = dict(self.cable_ends)
+        self.cable_status = dict(
+            Cable.objects.filter(pk__in=list(self.cable_ends.keys())).values_list('pk', 'status')
+        )
+
+        # Map front ports to their rear ports, and rear port positions to front ports. Each port's position in the
+        # default ordering is recorded so that the order of nodes matches that produced by database queries.
+        self.front_ports = {}
+        self.rear_port_positions = defaultdict(list)
+        for i, (pk, rear_port_id, position, cable_id) in enumerate(front_ports.values_list(
+            'pk', 'rear_port_id', 'rear_port_position', 'cable_id'
+        )):
+            self.front_ports[pk] = (rear_port_id, position, cable_id, i)
+            self.rear_port_positions[(rear_port_id, position)].append(pk)
+        self.rear_ports = {}
+        for i, (pk, positions, cable_id) in enumerate(rear_ports.values_list('pk', 'positions', 'cable_id')):
+            self.rear_ports[pk] = (positions, cable_id, i)
+
+        # Map circuit terminations to their attributes, and each side of a circuit to its termination
+        self.circuit_terminations = {}
+        self.circuit_sides = {}
+        for pk, circuit_id, term_side, cable_id, site_id, provider_network_id in circuit_terminations.values_list(
+            'pk', 'circuit_id', 'term_side', 'cable_id', 'site_id', 'provider_network_id'
+        ):
+            self.circuit_terminations[pk] = (circuit_id, term_side, cable_id, site_id, provider_network_id)
+            self.circuit_sides[(circuit_id, term_side)] = pk
+
+    @classmethod
+    def get(cls, site=None):
+        """
+        Return the cached graph for the given site (or for the entire instance), loading it if necessary.
+        """
+        version = cache.get(CACHE_KEY, 0)
+        key = site.pk if site else None
+        graph = cls._graphs.get(key)
+        if graph is None or graph.version != version:
+            graph = cls._graphs[key] = cls(site=site, version=version)
+        cls._graphs.move_to_end(key)
+        while len(cls._graphs) > CABLE_GRAPH_CACHE_SIZE:
+            cls._graphs.popitem(last=False)
+        return graph
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Discard all cached graphs, both within this process and (by incrementing the shared version) in any others.
+        """
+        for graph in cls._graphs.values():
+            graph.stale = True
+        cls._graphs.clear()
+        try:
+            cache.incr(CACHE_KEY)
+        except ValueError:
+            cache.set(CACHE_KEY, 1, None)
+
+    def trace(self, terminations):
+        """
+        Trace a path from the given originating objects, mirroring CablePath.from_origin(). Returns a dictionary of
+        attributes for the new CablePath (with an empty path if no link is attached to the origins), or None if the
+        path reaches an object which is not held in the graph or is connected by a wireless link, or if the graph has
+        been invalidated.
+        """
+        if self.stale:
+            return None
+
+        # Determine the links attached to the originating objects
+        links = set()
+        for t in terminations:
+            if getattr(t, 'wireless_link_id', None) and not t.cable_id:
+                return None
+            links.add(t.cable_id)
+        nodes = [object_to_path_node(t) for t in terminations]
+
+        path = []
+        position_stack = []
+        is_complete = False
+        is_active = True
+        is_split = False
+
+        try:
+            while nodes:
+
+                # Check for a split path
+                if len(links) > 1:
+                    is_split = True
+                    break
+
+                # Step 1: Record the near-end termination object(s)
+                path.append(nodes)
+
+                # Step 2: Determine the attached cable, if any
+                cable_id = links.pop()
+                if cable_id is None and len(path) == 1:
+                    return {'path': []}
+                elif cable_id is None:
+                    break
+
+                # Step 3: Record the cable and update path status if not "connected"
+                path.append([compile_path_node(self.ct_cable, cable_id)])
+                if self.cable_status[cable_id] != LinkStatusChoices.STATUS_CONNECTED:
+                    is_active = False
+
+                # Step 4: Determine the far-end terminations
+                local_end = self.node_ends[nodes[0]]
+                remote_nodes = self.cable_ends[cable_id]['A' if local_end == 'B' else 'B']
+
+                # Step 5: Record the far-end termination object(s)
+                path.append(list(remote_nodes))
+
+                # Step 6: Determine the "next hop" terminations, if applicable
+                if not remote_nodes:
+                    break
+                remote_ids = [decompile_path_node(node)[1] for node in remote_nodes]
+                remote_type, _ = decompile_path_node(remote_nodes[0])
+
+                if remote_type == self.ct_frontport:
+                    # Follow FrontPorts to their corresponding RearPorts
+                    rear_port_ids = sorted(
+                        {self.front_ports[pk][0] for pk in remote_ids},
+                        key=lambda pk: self.rear_ports[pk][2]
+                    )
+                    if len(rear_port_ids) > 1:
+                        assert all(self.rear_ports[pk][0] == 1 for pk in rear_port_ids)
+                    elif self.rear_ports[rear_port_ids[0]][0] > 1:
+                        position_stack.append([self.front_ports[pk][1] for pk in remote_ids])
+
+                    nodes = [compile_path_node(self.ct_rearport, pk) for pk in rear_port_ids]
+                    links = {self.rear_ports[pk][1] for pk in rear_port_ids}
+
+                elif remote_type == self.ct_rearport:
+                    if len(remote_ids) > 1 or self.rear_ports[remote_ids[0]][0] == 1:
+                        front_port_ids = [
+                            pk for rp in remote_ids for pk in self.rear_port_positions.get((rp, 1), [])
+                        ]
+                    elif position_stack:
+                        front_port_ids = [
+                            pk for position in position_stack.pop()
+                            for pk in self.rear_port_positions.get((remote_ids[0], position), [])
+                        ]
+                    else:
+                        # No position indicated: path has split, so we stop at the RearPorts
+                        is_split = True
+                        break
+
+                    front_port_ids = sorted(set(front_port_ids), key=lambda pk: self.front_ports[pk][3])
+                    nodes = [compile_path_node(self.ct_frontport, pk) for pk in front_port_ids]
+                    links = {self.front_ports[pk][2] for pk in front_port_ids}
+
+                elif remote_type == self.ct_circuittermination:
+                    # Follow a CircuitTermination to its corresponding CircuitTermination (A to Z or vice versa)
+                    if len(remote_ids) > 1:
+                        is_split = True
+                        break
+                    circuit_id, term_side, _, _, _ = self.circuit_terminations[remote_ids[0]]
+                    peer_id = self.circuit_sides.get((circuit_id, 'Z' if term_side == 'A' else 'A'))
+                    if peer_id is None:
+                        break
+                    _, _, peer_cable_id, peer_site_id, peer_provider_network_id = self.circuit_terminations[peer_id]
+                    peer_node = compile_path_node(self.ct_circuittermination, peer_id)
+                    if peer_provider_network_id:
+                        # Circuit terminates to a ProviderNetwork
+                        path.extend([
+                            [peer_node],
+                            [compile_path_node(self.ct_providernetwork, peer_provider_network_id)],
+                        ])
+                        is_complete = True
+                        break
+                    elif peer_site_id and not peer_cable_id:
+                        # Circuit terminates to a Site
+                        path.extend([
+                            [peer_node],
+                            [compile_path_node(self.ct_site, peer_site_id)],
+                        ])
+                        break
+
+                    nodes = [peer_node]
+                    links = {peer_cable_id}
+
+                # Anything else marks the end of the path
+                else:
+                    is_complete = True
+                    break
+
+        except KeyError:
+            # The path has reached an object which is not held in the graph
+            return None
+
+        return {
+            'path': path,
+            'is_complete': is_complete,
+            'is_active': is_active,
+            'is_split': is_split,
+        }
+
+
+@contextmanager
+def use_cable_graph(site=None):
+    """
+    Trace CablePaths using a CableGraph (for the given site or the entire instance) within the context.
+    """
+    token = cable_graph.set(CableGraph.get(site=site))
+    try:
+        yield
+    finally:
+        cable_graph.reset(token)
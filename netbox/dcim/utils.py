@@ -1,8 +1,14 @@
 import itertools
+from collections import defaultdict
+from contextlib import contextmanager
 
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 
+from netbox.context import bulk_create_signals, cablepath_queue, search_queue
+from utilities.mptt import delay_tree_updates
+from .constants import CABLE_GRAPH_THRESHOLD
+
 
 def compile_path_node(ct_id, object_id):
     return f'{ct_id}:{object_id}'
@@ -32,6 +38,26 @@ def path_node_to_object(repr):
     return ct.model_class().objects.filter(pk=object_id).first()
 
 
+def path_nodes_to_objects(nodes):
+    """
+    Given an iterable of path node representations, return a dictionary mapping each node to its corresponding
+    instance. Objects are retrieved using a single query per object type; nodes representing objects which no longer
+    exist are omitted.
+    """
+    to_fetch = defaultdict(set)
+    for node in nodes:
+        ct_id, object_id = decompile_path_node(node)
+        to_fetch[ct_id].add(object_id)
+
+    objects = {}
+    for ct_id, object_ids in to_fetch.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        for obj in model.objects.filter(pk__in=object_ids):
+            objects[compile_path_node(ct_id, obj.pk)] = obj
+
+    return objects
+
+
 def create_cablepath(terminations):
     """
     Create CablePaths for all paths originating from the specified set of nodes.
@@ -58,3 +84,175 @@ def rebuild_paths(terminations):
             for cp in cable_paths:
                 cp.delete()
                 create_cablepath(cp.origins)
+
+
+@contextmanager
+def batch_cable_paths():
+    """
+    Defer the tracing of CablePaths affected by any changes to cables made within the context. Upon exit, all affected
+    paths are retraced in a single batch (see bulk_retrace_paths()). Nested invocations have no effect.
+    """
+    if cablepath_queue.get() is not None:
+        yield
+        return
+
+    from dcim.topology import CableGraph
+
+    queue = {
+        'cables': set(),
+        'nodes': set(),
+        'topology_changed': False,
+    }
+    token = cablepath_queue.set(queue)
+    try:
+        yield
+    finally:
+        cablepath_queue.reset(token)
+
+    # Invalidate any cached CableGraphs once for the entire batch
+    if queue['topology_changed']:
+        CableGraph.invalidate()
+    with transaction.atomic():
+        bulk_retrace_paths(cables=queue['cables'], nodes=queue['nodes'])
+
+
+@contextmanager
+def bulk_provisioning():
+    """
+    Provision devices in bulk. Within the context, the components instantiated for each new device (or module) are
+    announced by a single post_bulk_create signal per component type, rather than by a post_save signal for each
+    component. The search cache is updated for all new objects once the context exits (and any enclosing transaction
+    has been committed), affected CablePaths are retraced in a single batch, and the trees of new inventory items are
+    rebuilt once each.
+    """
+    from dcim.models import InventoryItem
+    from netbox.search.backends import flush_search_queue
+
+    # Defer search indexing, unless already deferred for the current request
+    queue = None
+    if search_queue.get() is None:
+        queue = {}
+        search_token = search_queue.set(queue)
+    signals_token = bulk_create_signals.set(True)
+    try:
+        with batch_cable_paths(), delay_tree_updates(InventoryItem):
+            yield
+    finally:
+        bulk_create_signals.reset(signals_token)
+        if queue is not None:
+            search_queue.reset(search_token)
+
+    if queue:
+        transaction.on_commit(lambda: flush_search_queue(queue))
+
+
+def bulk_retrace_paths(cables=(), nodes=()):
+    """
+    Update all CablePaths affected by changes to the given cables and path nodes in a single pass.
+
+    :param cables: IDs of Cables whose terminations have been modified. New paths are traced from any path endpoints
+        to which they are attached.
+    :param nodes: Path nodes (e.g. deleted cables or pass-through ports) for which all traversing paths are retraced
+    """
+    from dcim.models import CablePath, CableTermination, PathEndpoint
+    from dcim.topology import use_cable_graph
+
+    nodes = set(nodes)
+
+    # Resolve the terminations of all modified cables with a single query. Path endpoints form the origins of new
+    # paths; any other terminations (e.g. pass-through ports) are retraced.
+    cable_ends = defaultdict(list)
+    for ct in CableTermination.objects.filter(cable_id__in=cables).order_by('pk'):
+        cable_ends[(ct.cable_id, ct.cable_end)].append(compile_path_node(ct.termination_type_id, ct.termination_id))
+    origin_sets = []
+    for end_nodes in cable_ends.values():
+        ct_id, _ = decompile_path_node(end_nodes[0])
+        if issubclass(ContentType.objects.get_for_id(ct_id).model_class(), PathEndpoint):
+            origin_sets.append(end_nodes)
+        else:
+            nodes.update(end_nodes)
+    origin_nodes = set(itertools.chain(*origin_sets))
+
+    # Compute the union of all affected paths
+    query_nodes = nodes | origin_nodes
+    cable_paths = list(CablePath.objects.filter(_nodes__overlap=list(query_nodes))) if query_nodes else []
+
+    # Fetch the originating objects of all paths using one query per object type
+    objects = path_nodes_to_objects(
+        itertools.chain(origin_nodes, *[cp.path[0] for cp in cable_paths if cp.path])
+    )
+
+    # Trace large batches using an in-memory graph of the cable topology
+    if len(cable_paths) + len(origin_sets) >= CABLE_GRAPH_THRESHOLD:
+        with use_cable_graph():
+            return _apply_retraced_paths(cable_paths, origin_sets, origin_nodes, objects)
+    return _apply_retraced_paths(cable_paths, origin_sets, origin_nodes, objects)
+
+
+def _apply_retraced_paths(cable_paths, origin_sets, origin_nodes, objects):
+    """
+    Retrace the given CablePaths and trace new paths from each set of origin nodes, writing the results to the
+    database in bulk.
+    """
+    from dcim.models import CablePath
+
+    wirelesslink_ct_id = ContentType.objects.get_by_natural_key('wireless', 'wirelesslink').pk
+    to_update = []
+    to_delete = []
+    detached = []
+    for cp in cable_paths:
+
+        # Paths originating from the terminations of a modified cable will be replaced
+        if not cp.path or origin_nodes.intersection(cp.path[0]):
+            to_delete.append(cp.pk)
+            continue
+
+        # Omit any originating objects which are no longer attached to the path's initial link
+        link_ct_id, link_id = decompile_path_node(cp.path[1][0]) if len(cp.path) > 1 else (None, None)
+        link_attr = 'wireless_link_id' if link_ct_id == wirelesslink_ct_id else 'cable_id'
+        origins = []
+        for node in cp.path[0]:
+            obj = objects.get(node)
+            if obj is None:
+                continue
+            if link_id is not None and getattr(obj, link_attr, None) == link_id:
+                origins.append(obj)
+            else:
+                detached.append(node)
+
+        new_path = CablePath.from_origin(origins)
+        if new_path:
+            cp.path = new_path.path
+            cp.is_complete = new_path.is_complete
+            cp.is_active = new_path.is_active
+            cp.is_split = new_path.is_split
+            cp._nodes = list(itertools.chain(*cp.path))
+            to_update.append(cp)
+        else:
+            to_delete.append(cp.pk)
+
+    # Trace new paths from the terminations of modified cables
+    to_create = []
+    for origin_set in origin_sets:
+        origins = [objects[node] for node in origin_set if node in objects]
+        if new_path := CablePath.from_origin(origins):
+            new_path._nodes = list(itertools.chain(*new_path.path))
+            to_create.append(new_path)
+
+    # Apply all changes to the database
+    if to_delete:
+        CablePath.objects.filter(pk__in=to_delete).delete()
+    if to_update:
+        CablePath.objects.bulk_update(to_update, ('path', '_nodes', 'is_active', 'is_complete', 'is_split'))
+    detached_ids = defaultdict(list)
+    for node in detached:
+        ct_id, object_id = decompile_path_node(node)
+        detached_ids[ct_id].append(object_id)
+    for ct_id, object_ids in detached_ids.items():
+        ContentType.objects.get_for_id(ct_id).model_class().objects.filter(pk__in=object_ids).update(_path=None)
+    for cp in CablePath.objects.bulk_create(to_create):
+        # Record a direct reference to each new CablePath on its originating object(s)
+        origin_ids = [decompile_path_node(node)[1] for node in cp.path[0]]
+        cp.origin_type.model_class().objects.filter(pk__in=origin_ids).update(_path=cp.pk)
+
+    return len(to_create), len(to_update), len(to_delete)
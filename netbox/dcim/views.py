@@ -30,6 +30,7 @@ from virtualization.models import VirtualMachine
 from . import filtersets, forms, tables
 from .choices import DeviceFaceChoices
 from .models import *
+from .utils import batch_cable_paths, bulk_provisioning
 
 CABLE_TERMINATION_TYPES = {
     'dcim.consoleport': ConsolePort,
@@ -611,7 +612,7 @@ class RackRoleBulkDeleteView(generic.BulkDeleteView):
 class RackListView(generic.ObjectListView):
     queryset = Rack.objects.annotate(
         device_count=count_related(Device, 'rack')
-    )
+    ).annotate_utilization()
     filterset = filtersets.RackFilterSet
     filterset_form = forms.RackFilterForm
     table = tables.RackTable
@@ -2088,6 +2089,11 @@ class DeviceBulkImportView(generic.BulkImportView):
     queryset = Device.objects.all()
     model_form = forms.DeviceImportForm
 
+    def import_records(self, *args, **kwargs):
+        # Signal the creation of all device components in batches
+        with bulk_provisioning():
+            return super().import_records(*args, **kwargs)
+
     def save_object(self, object_form, request):
         obj = object_form.save()
 
@@ -3151,6 +3157,11 @@ class CableBulkImportView(generic.BulkImportView):
     queryset = Cable.objects.all()
     model_form = forms.CableImportForm
 
+    def post(self, request):
+        # Trace all affected cable paths in a single batch
+        with batch_cable_paths():
+            return super().post(request)
+
 
 class CableBulkEditView(generic.BulkEditView):
     queryset = Cable.objects.prefetch_related(
@@ -3161,6 +3172,11 @@ class CableBulkEditView(generic.BulkEditView):
     table = tables.CableTable
     form = forms.CableBulkEditForm
 
+    def post(self, request, **kwargs):
+        # Trace all affected cable paths in a single batch
+        with batch_cable_paths():
+            return super().post(request, **kwargs)
+
 
 class CableBulkDeleteView(generic.BulkDeleteView):
     queryset = Cable.objects.prefetch_related(
@@ -3170,6 +3186,11 @@ class CableBulkDeleteView(generic.BulkDeleteView):
     filterset = filtersets.CableFilterSet
     table = tables.CableTable
 
+    def post(self, request, **kwargs):
+        # Trace all affected cable paths in a single batch
+        with batch_cable_paths():
+            return super().post(request, **kwargs)
+
 
 #
 # Connections
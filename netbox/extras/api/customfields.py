@@ -2,10 +2,10 @@ from django.contrib.contenttypes.models import ContentType
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 from rest_framework.fields import Field
-from rest_framework.serializers import ValidationError
+from rest_framework.serializers import ListSerializer, ValidationError
 
 from extras.choices import CustomFieldTypeChoices
-from extras.models import CustomField
+from extras.models import CustomField, prefetch_custom_field_objects
 from netbox.constants import NESTED_SERIALIZER_PREFIX
 from utilities.api import get_serializer_for_model
 
@@ -50,12 +50,28 @@ class CustomFieldsDataField(Field):
             self._custom_fields = CustomField.objects.filter(content_types=content_type)
         return self._custom_fields
 
+    def _get_custom_field_objects(self):
+        """
+        Resolve the objects referenced by object and multi-object custom fields for all instances being serialized
+        (e.g. an entire page of results) at once, rather than querying for each instance individually. The result is
+        also attached to each instance, for use by its `cf` property (e.g. within nested serializers).
+        """
+        if isinstance(self.parent.parent, ListSerializer):
+            instances = self.parent.parent.instance
+        else:
+            instances = [self.parent.instance]
+        if getattr(self, '_custom_field_objects_for', None) is not instances:
+            self._custom_field_objects = prefetch_custom_field_objects(instances or [], self._get_custom_fields())
+            self._custom_field_objects_for = instances
+        return self._custom_field_objects
+
     def to_representation(self, obj):
         # TODO: Fix circular import
         from utilities.api import get_serializer_for_model
         data = {}
+        objects = self._get_custom_field_objects()
         for cf in self._get_custom_fields():
-            value = cf.deserialize(obj.get(cf.name))
+            value = cf.deserialize(obj.get(cf.name), objects)
             if value is not None and cf.type == CustomFieldTypeChoices.TYPE_OBJECT:
                 serializer = get_serializer_for_model(cf.object_type.model_class(), prefix=NESTED_SERIALIZER_PREFIX)
                 value = serializer(value, context=self.parent.context).data
@@ -73,6 +89,13 @@ class CustomFieldsDataField(Field):
                 "values."
             )
 
+        # Reject data for unknown fields. (Data for fields which no longer exist may legitimately be present on an
+        # existing instance, so it is not rejected by the model's validation while background jobs are pending.)
+        custom_field_names = {cf.name for cf in self._get_custom_fields()}
+        for field_name in data:
+            if field_name not in custom_field_names:
+                raise ValidationError(f"Unknown field name '{field_name}' in custom field data.")
+
         # Serialize object and multi-object values
         for cf in self._get_custom_fields():
             if cf.name in data and data[cf.name] not in (None, []) and cf.type in (
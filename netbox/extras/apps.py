@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ExtrasConfig(AppConfig):
@@ -6,3 +7,9 @@ class ExtrasConfig(AppConfig):
 
     def ready(self):
         from . import dashboard, lookups, search, signals
+
+        # Export the webhook delivery metrics recorded by RQ workers
+        if settings.METRICS_ENABLED:
+            from prometheus_client import REGISTRY
+            from .webhooks_worker import WebhookDeliveryCollector
+            REGISTRY.register(WebhookDeliveryCollector())
@@ -1,8 +1,34 @@
 from contextlib import contextmanager
 
-from netbox.context import current_request, webhooks_queue
+from django.conf import settings
+
+from netbox.context import current_request, objectchange_queue, search_queue, webhooks_queue
+from netbox.search.backends import flush_search_queue
+from .models import ObjectChange
 from .webhooks import flush_webhooks
 
+# The maximum number of ObjectChanges written in a single query
+OBJECTCHANGE_BATCH_SIZE = 500
+
+
+def flush_objectchanges():
+    """
+    Write any ObjectChanges which have been queued (but not yet written) by the current change_logging context to the
+    database. This should be called before the transaction in which the changes were made is committed, so that the
+    changes and their ObjectChanges are committed together.
+    """
+    queue = objectchange_queue.get()
+    if not queue:
+        return
+
+    objectchanges = [objectchange for objectchange in queue.values() if objectchange.pk is None]
+    for objectchange in objectchanges:
+        # Mimic ObjectChange.save(), which is bypassed by bulk_create()
+        if not objectchange.user_name:
+            objectchange.user_name = objectchange.user.username
+
+    ObjectChange.objects.bulk_create(objectchanges, batch_size=OBJECTCHANGE_BATCH_SIZE)
+
 
 @contextmanager
 def change_logging(request):
@@ -12,14 +38,27 @@ def change_logging(request):
 
     :param request: WSGIRequest object with a unique `id` set
     """
-    current_request.set(request)
-    webhooks_queue.set([])
+    tokens = [
+        (current_request, current_request.set(request)),
+        (objectchange_queue, objectchange_queue.set({})),
+        (webhooks_queue, webhooks_queue.set([])),
+    ]
+    if settings.SEARCH_INDEXING_MODE != 'immediate':
+        tokens.append((search_queue, search_queue.set({})))
+
+    try:
+        yield
+
+        # Record any changes which have not already been written
+        flush_objectchanges()
 
-    yield
+        # Flush queued webhooks to RQ
+        flush_webhooks(webhooks_queue.get())
 
-    # Flush queued webhooks to RQ
-    flush_webhooks(webhooks_queue.get())
+        # Update the search cache for any objects modified during the request
+        flush_search_queue(search_queue.get())
 
-    # Clear context vars
-    current_request.set(None)
-    webhooks_queue.set([])
+    finally:
+        # Restore the context vars (which may have been set by an enclosing change_logging context)
+        for context_var, token in reversed(tokens):
+            context_var.reset(token)
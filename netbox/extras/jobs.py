@@ -0,0 +1,43 @@
+import logging
+
+from django.contrib.contenttypes.models import ContentType
+
+from core.choices import JobStatusChoices
+from .models import CustomField
+
+logger = logging.getLogger(__name__)
+
+
+def update_custom_field_data(job, operation, field_name, content_type_ids, default=None, new_name=None, **kwargs):
+    """
+    Populate, remove, or rename the data for a custom field on all objects of the given types (see
+    CustomField.update_object_data()). The number of objects updated for each model is recorded in the job's data as
+    the job progresses.
+    """
+    custom_field = CustomField(name=field_name, default=default)
+    content_types = ContentType.objects.filter(pk__in=content_type_ids)
+    job.data = {
+        'operation': operation,
+        'updated': {},
+    }
+
+    def progress(model, count):
+        job.data['updated'][model._meta.label_lower] = count
+        job.save(update_fields=['data'])
+
+    try:
+        job.start()
+        if operation == 'populate':
+            custom_field.populate_initial_data(content_types, progress=progress)
+        elif operation == 'remove':
+            custom_field.remove_stale_data(content_types, progress=progress)
+        elif operation == 'rename':
+            custom_field.rename_object_data(field_name, new_name, content_types, progress=progress)
+        else:
+            raise ValueError(f"Invalid custom field data operation: {operation}")
+        job.terminate()
+
+    except Exception as e:
+        job.terminate(status=JobStatusChoices.STATUS_ERRORED)
+        logger.error(f"Error updating data for custom field {field_name}: {e}")
+        raise e
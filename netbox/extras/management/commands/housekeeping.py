@@ -9,8 +9,9 @@ from django.db import DEFAULT_DB_ALIAS
 from django.utils import timezone
 from packaging import version
 
-from core.models import Job
+from core.models import Job, JobLogEntry
 from extras.models import ObjectChange
+from extras.reports import complete_abandoned_report_tests
 from netbox.config import Config
 
 
@@ -81,6 +82,8 @@ class Command(BaseCommand):
                         ending=""
                     )
                     self.stdout.flush()
+                # Delete the log entries of expired jobs directly to avoid loading them into memory
+                JobLogEntry.objects.filter(job__created__lt=cutoff)._raw_delete(using=DEFAULT_DB_ALIAS)
                 Job.objects.filter(created__lt=cutoff).delete()
                 if options['verbosity']:
                     self.stdout.write("Done.", self.style.SUCCESS)
@@ -91,6 +94,16 @@ class Command(BaseCommand):
                 f"\tSkipping: No retention period specified (JOB_RETENTION = {config.JOB_RETENTION})"
             )
 
+        # Terminate any report tests which were abandoned by their RQ workers
+        if options['verbosity']:
+            self.stdout.write("[*] Checking for abandoned report tests")
+        abandoned_jobs = complete_abandoned_report_tests()
+        if options['verbosity']:
+            if abandoned_jobs:
+                self.stdout.write(f"\tTerminated {abandoned_jobs} abandoned report tests.", self.style.WARNING)
+            else:
+                self.stdout.write("\tNo abandoned report tests found.", self.style.SUCCESS)
+
         # Check for new releases (if enabled)
         if options['verbosity']:
             self.stdout.write("[*] Checking for latest release")
@@ -0,0 +1,80 @@
+from django.contrib.postgres.search import SearchVector
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from extras.models import CachedValue
+from netbox.search.backends import PostgresFullTextSearchBackend, search_backend
+
+TRIGRAM_INDEX = 'extras_cachedvalue_value_trgm'
+VECTOR_INDEX = 'extras_cachedvalue_search_vector'
+
+
+class Command(BaseCommand):
+    help = "Prepare the search cache for use with PostgresFullTextSearchBackend"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help="Number of cached values to update per query (default: 10000)"
+        )
+        parser.add_argument(
+            '--skip-indexes',
+            action='store_true',
+            help="Populate search vectors without creating the supporting indexes"
+        )
+
+    def _execute(self, sql):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+        except DatabaseError as e:
+            raise CommandError(f"Failed to execute query: {e}")
+
+    def handle(self, *args, **options):
+        config = getattr(search_backend, 'search_config', PostgresFullTextSearchBackend.search_config)
+        table = CachedValue._meta.db_table
+
+        if not options['skip_indexes']:
+            # Installing the pg_trgm extension may require elevated database privileges
+            self.stdout.write('Installing pg_trgm extension... ', ending='')
+            self.stdout.flush()
+            self._execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            self.stdout.write('Done.', self.style.SUCCESS)
+
+            # Index the uppercase value to match the SQL generated by Django's case-insensitive lookups
+            self.stdout.write('Creating trigram index... ', ending='')
+            self.stdout.flush()
+            self._execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {TRIGRAM_INDEX} ON {table} '
+                f'USING gin (UPPER(value) gin_trgm_ops)'
+            )
+            self.stdout.write('Done.', self.style.SUCCESS)
+
+        # Populate the search vector for all existing cached values, walking the table in primary key order
+        self.stdout.write(f'Populating search vectors (config: {config})... ', ending='')
+        self.stdout.flush()
+        queryset = CachedValue.objects.filter(search_vector__isnull=True).order_by('pk')
+        last_pk = None
+        updated_count = 0
+        while True:
+            batch = queryset.filter(pk__gt=last_pk) if last_pk else queryset
+            pks = list(batch.values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            updated_count += CachedValue.objects.filter(pk__in=pks).update(
+                search_vector=SearchVector('value', config=config)
+            )
+            last_pk = pks[-1]
+        self.stdout.write(f'{updated_count} entries updated.', self.style.SUCCESS)
+
+        if not options['skip_indexes']:
+            self.stdout.write('Creating search vector index... ', ending='')
+            self.stdout.flush()
+            self._execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {VECTOR_INDEX} ON {table} USING gin (search_vector)'
+            )
+            self.stdout.write('Done.', self.style.SUCCESS)
+
+        self.stdout.write('Completed.', self.style.SUCCESS)
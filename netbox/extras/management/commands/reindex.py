@@ -1,9 +1,32 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
 
 from netbox.registry import registry
 from netbox.search.backends import search_backend
 
+CHECKPOINT_CACHE_KEY = 'search_reindex_checkpoint'
+
+
+def reindex_chunk(label, start, end, lazy=False):
+    """
+    Reindex all objects of the given model with a primary key in the range [start, end). If lazy is True, reindex
+    only those objects which have been modified since they were last cached.
+    """
+    model = registry['search'][label].model
+    queryset = model.objects.filter(pk__gte=start, pk__lt=end)
+    if lazy:
+        queryset = search_backend.get_stale_objects(queryset)
+
+    return search_backend.flush({
+        label: queryset.values_list('pk', flat=True)
+    })
+
 
 class Command(BaseCommand):
     help = 'Reindex objects for search'
@@ -18,7 +41,25 @@ class Command(BaseCommand):
         parser.add_argument(
             '--lazy',
             action='store_true',
-            help="For each model, reindex objects only if no cache entries already exist"
+            help="Reindex only objects which have been modified since they were last cached (or, for models which "
+                 "do not record changes, only if no cache entries already exist)"
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help="Number of worker processes to use (default: 1)"
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help="Width of the primary key range reindexed by each task (default: 10000)"
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help="Resume an interrupted reindex, skipping any chunks which have already been completed"
         )
 
     def _get_indexers(self, *model_names):
@@ -57,7 +98,45 @@ class Command(BaseCommand):
 
         return indexers
 
+    def _get_chunks(self, indexers, chunk_size, cursors):
+        """
+        Divide each model into primary key ranges of the given width. Ranges are aligned to multiples of the width, so
+        that their boundaries do not depend on the objects which exist at the time. The cursor of each model (the
+        primary key below which all ranges have been completed) is advanced to the start of its first range.
+        """
+        chunks = []
+        for model in indexers.keys():
+            label = f'{model._meta.app_label}.{model._meta.model_name}'
+            pk_range = model.objects.aggregate(start=Min('pk'), end=Max('pk'))
+            if pk_range['start'] is None:
+                continue
+            first = pk_range['start'] // chunk_size * chunk_size
+            cursors[label] = max(cursors.get(label, first), first)
+            for start in range(first, pk_range['end'] + 1, chunk_size):
+                chunks.append((label, start, start + chunk_size))
+        return chunks
+
+    def _run_chunks(self, chunks, lazy, workers):
+        """
+        Reindex each chunk, yielding the chunk and the number of entries cached as each is completed.
+        """
+        if workers <= 1:
+            for chunk in chunks:
+                yield chunk, reindex_chunk(*chunk, lazy=lazy)
+            return
+
+        # Close any open database connections so that they are not shared with the forked workers
+        connections.close_all()
+        mp_context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+            futures = {
+                executor.submit(reindex_chunk, *chunk, lazy=lazy): chunk for chunk in chunks
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
     def handle(self, *model_labels, **kwargs):
+        lazy = kwargs['lazy']
 
         # Determine which models to reindex
         indexers = self._get_indexers(*model_labels)
@@ -65,8 +144,30 @@ class Command(BaseCommand):
             raise CommandError("No indexers found!")
         self.stdout.write(f'Reindexing {len(indexers)} models.')
 
-        # Clear all cached values for the specified models (if not being lazy)
-        if not kwargs['lazy']:
+        # Load the checkpoint of an interrupted reindex, ensuring it was made using the same parameters
+        parameters = {
+            'models': sorted(f'{m._meta.app_label}.{m._meta.model_name}' for m in indexers.keys()),
+            'lazy': lazy,
+            'chunk_size': kwargs['chunk_size'],
+        }
+        if kwargs['resume']:
+            checkpoint = cache.get(CHECKPOINT_CACHE_KEY)
+            if checkpoint is None:
+                raise CommandError("No checkpoint found; unable to resume.")
+            if checkpoint['parameters'] != parameters:
+                raise CommandError("The checkpoint was recorded using different models or options; unable to resume.")
+            self.stdout.write('Resuming from checkpoint.')
+        else:
+            # Record the primary key of each model below which all chunks have been completed, and the starts of
+            # any chunks above it which have been completed (as chunks may complete out of order)
+            checkpoint = {
+                'parameters': parameters,
+                'cursors': {},
+                'completed': {},
+            }
+
+        # Clear all cached values for the specified models (if not being lazy or resuming)
+        if not lazy and not kwargs['resume']:
             self.stdout.write('Clearing cached values... ', ending='')
             self.stdout.flush()
             content_types = [
@@ -75,25 +176,56 @@ class Command(BaseCommand):
             deleted_count = search_backend.clear(content_types)
             self.stdout.write(f'{deleted_count} entries deleted.')
 
-        # Index models
-        self.stdout.write('Indexing models')
-        for model, idx in indexers.items():
-            app_label = model._meta.app_label
-            model_name = model._meta.model_name
-            self.stdout.write(f'  {app_label}.{model_name}... ', ending='')
-            self.stdout.flush()
-
-            if kwargs['lazy']:
+        # Models which do not record a last updated time are reindexed lazily only if they have no cache entries
+        if lazy:
+            for model in list(indexers.keys()):
+                if hasattr(model, 'last_updated'):
+                    continue
                 content_type = ContentType.objects.get_for_model(model)
                 if cached_count := search_backend.count(object_types=[content_type]):
-                    self.stdout.write(f'Skipping (found {cached_count} existing).')
-                    continue
+                    self.stdout.write(
+                        f'  {model._meta.app_label}.{model._meta.model_name}: '
+                        f'Skipping (found {cached_count} existing).'
+                    )
+                    del indexers[model]
+
+        # Divide models into chunks, omitting any which have already been completed
+        cursors, completed = checkpoint['cursors'], checkpoint['completed']
+        chunks = [
+            (label, start, end)
+            for label, start, end in self._get_chunks(indexers, kwargs['chunk_size'], cursors)
+            if start >= cursors[label] and start not in completed.get(label, [])
+        ]
+        remaining = {}
+        for label, _, _ in chunks:
+            remaining[label] = remaining.get(label, 0) + 1
+        totals = dict.fromkeys(remaining, 0)
+        cache.set(CHECKPOINT_CACHE_KEY, checkpoint, None)
+
+        # Index models
+        self.stdout.write(f'Indexing models ({len(chunks)} chunks, {kwargs["workers"]} workers)')
+        for chunk, count in self._run_chunks(chunks, lazy, kwargs['workers']):
+            label, start, _ = chunk
+
+            # Advance the model's cursor past all contiguous completed chunks
+            completed_starts = {s for s in completed.get(label, []) if s >= cursors[label]}
+            completed_starts.add(start)
+            while cursors[label] in completed_starts:
+                completed_starts.remove(cursors[label])
+                cursors[label] += kwargs['chunk_size']
+            completed[label] = sorted(completed_starts)
+            cache.set(CHECKPOINT_CACHE_KEY, checkpoint, None)
+
+            totals[label] += count
+            remaining[label] -= 1
+            if not remaining[label]:
+                if totals[label]:
+                    self.stdout.write(f'  {label}: {totals[label]} entries cached.')
+                else:
+                    self.stdout.write(f'  {label}: No objects found.')
 
-            i = search_backend.cache(model.objects.iterator(), remove_existing=False)
-            if i:
-                self.stdout.write(f'{i} entries cached.')
-            else:
-                self.stdout.write(f'No objects found.')
+        # The reindex has completed; discard the checkpoint
+        cache.delete(CHECKPOINT_CACHE_KEY)
 
         msg = f'Completed.'
         if total_count := search_backend.size:
@@ -133,6 +133,7 @@ class Command(BaseCommand):
 
             logger.info(f"Running script (commit={commit})")
             script.request = request
+            script.job = job
 
             # Execute the script. If commit is True, wrap it with the change_logging context manager to ensure we process
             # change logging, webhooks, etc.
@@ -0,0 +1,17 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('extras', '0092_delete_jobresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cachedvalue',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from .change_logging import *
 from .configs import *
-from .customfields import CustomField
+from .customfields import CustomField, prefetch_custom_field_objects, resolve_custom_field_objects
 from .dashboard import *
 from .models import *
 from .reports import *
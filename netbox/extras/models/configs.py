@@ -10,7 +10,7 @@ from extras.querysets import ConfigContextQuerySet
 from netbox.config import get_config
 from netbox.models import ChangeLoggedModel
 from netbox.models.features import CloningMixin, ExportTemplatesMixin, SyncedDataMixin, TagsMixin
-from utilities.jinja2 import ConfigTemplateLoader
+from utilities.jinja2 import ConfigTemplateLoader, get_environment, get_template, get_template_cache_key
 from utilities.utils import deepmerge
 
 __all__ = (
@@ -243,12 +243,17 @@ class ConfigTemplate(SyncedDataMixin, ExportTemplatesMixin, TagsMixin, ChangeLog
         """
         context = context or {}
 
-        # Initialize the Jinja2 environment and instantiate the Template
-        environment = self._get_environment()
+        # Initialize the Jinja2 environment and instantiate the Template. Templates which are not sourced from a
+        # DataFile (and so cannot include others) are compiled using a shared environment and cached.
         if self.data_file:
+            environment = self._get_environment()
             template = environment.get_template(self.data_file.path)
         else:
-            template = environment.from_string(self.template_code)
+            template = get_template(
+                self.template_code,
+                cache_key=get_template_cache_key(self, 'template_code'),
+                environment=get_environment(**(self.environment_params or {}))
+            )
         output = template.render(**context)
 
         # Replace CRLF-style line terminators
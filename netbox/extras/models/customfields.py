@@ -1,4 +1,5 @@
 import decimal
+import json
 import re
 from datetime import datetime, date
 
@@ -8,9 +9,12 @@ from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import RegexValidator, ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max, Min
+from django.db.models.expressions import RawSQL
 from django.urls import reverse
 from django.utils.html import escape
+from django.utils.module_loading import import_string
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _
 
@@ -32,6 +36,8 @@ from utilities.validators import validate_regex
 __all__ = (
     'CustomField',
     'CustomFieldManager',
+    'prefetch_custom_field_objects',
+    'resolve_custom_field_objects',
 )
 
 SEARCH_TYPES = {
@@ -44,6 +50,62 @@ SEARCH_TYPES = {
 }
 
 
+def resolve_custom_field_objects(instances, custom_fields):
+    """
+    Resolve the objects referenced by any object and multi-object custom fields across a set of instances (e.g. a page
+    of results), fetching each type of object with a single query. Returns a dictionary mapping ContentType IDs to
+    dictionaries of objects by ID, suitable for passing to CustomField.deserialize().
+
+    :param instances: An iterable of objects which support custom fields
+    :param custom_fields: The CustomFields assigned to the objects' model
+    """
+    object_fields = [
+        cf for cf in custom_fields
+        if cf.type in (CustomFieldTypeChoices.TYPE_OBJECT, CustomFieldTypeChoices.TYPE_MULTIOBJECT)
+    ]
+    instances = [instance for instance in instances if hasattr(instance, 'custom_field_data')]
+
+    # Collect the IDs of all referenced objects by type
+    object_ids = {}
+    for cf in object_fields:
+        object_ids.setdefault(cf.object_type_id, set())
+        for instance in instances:
+            value = instance.custom_field_data.get(cf.name)
+            if value in (None, []):
+                continue
+            if cf.type == CustomFieldTypeChoices.TYPE_MULTIOBJECT:
+                object_ids[cf.object_type_id].update(value)
+            else:
+                object_ids[cf.object_type_id].add(value)
+
+    # Fetch the objects of each type
+    objects = {}
+    for content_type_id, pks in object_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is not None:
+            objects[content_type_id] = model.objects.in_bulk(pks) if pks else {}
+
+    return objects
+
+
+def prefetch_custom_field_objects(instances, custom_fields):
+    """
+    Resolve the objects referenced by object and multi-object custom fields across a set of instances (as with
+    resolve_custom_field_objects()), and attach the result to each instance. The `cf` property and get_custom_fields*()
+    methods of the instances then use these objects rather than resolving them for each instance individually. Returns
+    the resolved objects.
+
+    :param instances: An iterable of objects which support custom fields
+    :param custom_fields: The CustomFields assigned to the objects' model
+    """
+    instances = [instance for instance in instances if hasattr(instance, 'custom_field_data')]
+    objects = resolve_custom_field_objects(instances, custom_fields)
+    for instance in instances:
+        instance._custom_field_objects = objects
+
+    return objects
+
+
 class CustomFieldManager(models.Manager.from_queryset(RestrictedQuerySet)):
     use_in_migrations = True
 
@@ -208,41 +270,117 @@ class CustomField(CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
     def search_type(self):
         return SEARCH_TYPES.get(self.type)
 
-    def populate_initial_data(self, content_types):
+    def _update_object_data(self, model, expression, filters=None, excludes=None, progress=None):
+        """
+        Update the custom_field_data of all instances of the given model which match the filters (or excludes) by
+        applying an SQL expression in the database. Updates are applied in chunks of CUSTOM_FIELD_DATA_BATCH_SIZE
+        consecutive primary keys. Returns the number of instances updated.
+
+        :param model: The model to update
+        :param expression: The SQL expression which evaluates to the new value of custom_field_data
+        :param filters: Filters which select the instances to update
+        :param excludes: Filters which exclude instances from being updated
+        :param progress: A callable to be invoked with the model and the number of instances updated after each chunk
+        """
+        queryset = model.objects.filter(**(filters or {})).exclude(**(excludes or {}))
+        bounds = queryset.aggregate(min_pk=Min('pk'), max_pk=Max('pk'))
+        if bounds['min_pk'] is None:
+            return 0
+
+        batch_size = settings.CUSTOM_FIELD_DATA_BATCH_SIZE
+        count = 0
+        for start in range(bounds['min_pk'], bounds['max_pk'] + 1, batch_size):
+            count += queryset.filter(pk__gte=start, pk__lt=start + batch_size).update(custom_field_data=expression)
+            if progress is not None:
+                progress(model, count)
+
+        return count
+
+    def populate_initial_data(self, content_types, progress=None):
         """
         Populate initial custom field data upon either a) the creation of a new CustomField, or
         b) the assignment of an existing CustomField to new object types.
         """
+        expression = RawSQL(
+            'custom_field_data || jsonb_build_object(%s::text, %s::jsonb)',
+            (self.name, json.dumps(self.default))
+        )
         for ct in content_types:
-            model = ct.model_class()
-            instances = model.objects.exclude(**{f'custom_field_data__contains': self.name})
-            for instance in instances:
-                instance.custom_field_data[self.name] = self.default
-            model.objects.bulk_update(instances, ['custom_field_data'], batch_size=100)
+            self._update_object_data(
+                ct.model_class(),
+                expression,
+                excludes={'custom_field_data__has_key': self.name},
+                progress=progress
+            )
 
-    def remove_stale_data(self, content_types):
+    def remove_stale_data(self, content_types, progress=None):
         """
         Delete custom field data which is no longer relevant (either because the CustomField is
         no longer assigned to a model, or because it has been deleted).
         """
+        expression = RawSQL('custom_field_data - %s::text', (self.name,))
         for ct in content_types:
-            model = ct.model_class()
-            instances = model.objects.filter(custom_field_data__has_key=self.name)
-            for instance in instances:
-                del instance.custom_field_data[self.name]
-            model.objects.bulk_update(instances, ['custom_field_data'], batch_size=100)
+            self._update_object_data(
+                ct.model_class(),
+                expression,
+                filters={'custom_field_data__has_key': self.name},
+                progress=progress
+            )
 
-    def rename_object_data(self, old_name, new_name):
+    def rename_object_data(self, old_name, new_name, content_types=None, progress=None):
         """
         Called when a CustomField has been renamed. Updates all assigned object data.
         """
-        for ct in self.content_types.all():
-            model = ct.model_class()
-            params = {f'custom_field_data__{old_name}__isnull': False}
-            instances = model.objects.filter(**params)
-            for instance in instances:
-                instance.custom_field_data[new_name] = instance.custom_field_data.pop(old_name)
-            model.objects.bulk_update(instances, ['custom_field_data'], batch_size=100)
+        expression = RawSQL(
+            '(custom_field_data - %s::text) || jsonb_build_object(%s::text, custom_field_data -> %s::text)',
+            (old_name, new_name, old_name)
+        )
+        for ct in content_types if content_types is not None else self.content_types.all():
+            self._update_object_data(
+                ct.model_class(),
+                expression,
+                filters={'custom_field_data__has_key': old_name},
+                progress=progress
+            )
+
+    def update_object_data(self, operation, content_types, **kwargs):
+        """
+        Apply one of the operations above ("populate", "remove" or "rename") to the custom field data of all objects
+        of the given types. If CUSTOM_FIELD_DATA_JOBS is enabled, the update is performed by a background job, which
+        is enqueued once the current transaction has been committed.
+        """
+        if not settings.CUSTOM_FIELD_DATA_JOBS:
+            if operation == 'populate':
+                return self.populate_initial_data(content_types)
+            if operation == 'remove':
+                return self.remove_stale_data(content_types)
+            if operation == 'rename':
+                return self.rename_object_data(kwargs['old_name'], kwargs['new_name'], content_types)
+            raise ValueError(f"Invalid custom field data operation: {operation}")
+
+        from core.models import Job
+        from netbox.context import current_request
+
+        request = current_request.get()
+        content_type_ids = [ct.pk for ct in content_types]
+        name = kwargs.get('old_name', self.name)
+        default = self.default
+
+        # Record the job against a copy of the field, as the field's ID will have been cleared by the time the job is
+        # enqueued if the field is being deleted
+        instance = CustomField(pk=self.pk, name=self.name)
+
+        transaction.on_commit(lambda: Job.enqueue(
+            import_string('extras.jobs.update_custom_field_data'),
+            instance=instance,
+            name=f'Update custom field data ({operation} {name})',
+            user=request.user if request is not None and request.user.is_authenticated else None,
+            operation=operation,
+            field_name=name,
+            default=default,
+            content_type_ids=content_type_ids,
+            new_name=kwargs.get('new_name')
+        ))
 
     def clean(self):
         super().clean()
@@ -329,9 +467,13 @@ class CustomField(CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
             return [obj.pk for obj in value] or None
         return value
 
-    def deserialize(self, value):
+    def deserialize(self, value, objects=None):
         """
         Convert JSON data to a Python object suitable for the field type.
+
+        :param value: The serialized value
+        :param objects: Related objects resolved by resolve_custom_field_objects() (optional). Object and multi-object
+            values are taken from it where possible rather than being retrieved from the database.
         """
         if value is None:
             return value
@@ -346,9 +488,13 @@ class CustomField(CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
             except ValueError:
                 return value
         if self.type == CustomFieldTypeChoices.TYPE_OBJECT:
+            if objects is not None and value in objects.get(self.object_type_id, {}):
+                return objects[self.object_type_id][value]
             model = self.object_type.model_class()
             return model.objects.filter(pk=value).first()
         if self.type == CustomFieldTypeChoices.TYPE_MULTIOBJECT:
+            if objects is not None and all(pk in objects.get(self.object_type_id, {}) for pk in value):
+                return [objects[self.object_type_id][pk] for pk in value]
             model = self.object_type.model_class()
             return model.objects.filter(pk__in=value)
         return value
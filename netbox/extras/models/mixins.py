@@ -1,10 +1,48 @@
 import os
+import threading
 from importlib.machinery import SourceFileLoader
 
 __all__ = (
     'PythonModuleMixin',
+    'clear_module_cache',
 )
 
+# Modules loaded from files on disk, keyed by file path. Each entry records the module name, and the modification time
+# and size of the file at the time it was loaded.
+_modules = {}
+_lock = threading.Lock()
+
+
+def load_module(name, path):
+    """
+    Load and return the Python module at the given path. A module is loaded only once per process, and reused until
+    its file is modified on disk or its cache entry is cleared (see clear_module_cache()).
+    """
+    stat = os.stat(path)
+    signature = (name, stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        cached = _modules.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        loader = SourceFileLoader(name, path)
+        module = loader.load_module()
+        _modules[path] = (signature, module)
+
+    return module
+
+
+def clear_module_cache(path=None):
+    """
+    Discard the cached module loaded from the given path or, if no path is specified, all cached modules.
+    """
+    with _lock:
+        if path is None:
+            _modules.clear()
+        else:
+            _modules.pop(path, None)
+
 
 class PythonModuleMixin:
 
@@ -23,6 +61,4 @@ class PythonModuleMixin:
             return name
 
     def get_module(self):
-        loader = SourceFileLoader(self.python_name, self.full_path)
-        module = loader.load_module()
-        return module
+        return load_module(self.python_name, self.full_path)
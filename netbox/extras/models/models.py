@@ -1,5 +1,6 @@
 import json
 import urllib.parse
+from itertools import chain
 
 from django.conf import settings
 from django.contrib import admin
@@ -9,7 +10,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
 from django.core.validators import ValidationError
 from django.db import models
-from django.http import HttpResponse, QueryDict
+from django.http import QueryDict, StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.formats import date_format
@@ -20,12 +21,14 @@ from extras.choices import *
 from extras.conditions import ConditionSet
 from extras.constants import *
 from extras.utils import FeatureQuery, image_upload
-from netbox.config import get_config
+from netbox.config import clear_config, get_config
+from netbox.constants import EXPORT_CHUNK_SIZE
 from netbox.models import ChangeLoggedModel
 from netbox.models.features import (
     CloningMixin, CustomFieldsMixin, CustomLinksMixin, ExportTemplatesMixin, SyncedDataMixin, TagsMixin,
 )
-from utilities.querysets import RestrictedQuerySet
+from utilities.jinja2 import get_template, get_template_cache_key
+from utilities.querysets import RestrictedQuerySet, StreamingQuerySet
 from utilities.utils import clean_html, render_jinja2
 
 __all__ = (
@@ -186,7 +189,9 @@ class Webhook(ExportTemplatesMixin, ChangeLoggedModel):
         if not self.additional_headers:
             return {}
         ret = {}
-        data = render_jinja2(self.additional_headers, context)
+        data = render_jinja2(
+            self.additional_headers, context, get_template_cache_key(self, 'additional_headers')
+        )
         for line in data.splitlines():
             header, value = line.split(':', 1)
             ret[header.strip()] = value.strip()
@@ -197,7 +202,7 @@ class Webhook(ExportTemplatesMixin, ChangeLoggedModel):
         Render the body template, if defined. Otherwise, jump the context as a JSON object.
         """
         if self.body_template:
-            return render_jinja2(self.body_template, context)
+            return render_jinja2(self.body_template, context, get_template_cache_key(self, 'body_template'))
         else:
             return json.dumps(context, cls=JSONEncoder)
 
@@ -205,7 +210,7 @@ class Webhook(ExportTemplatesMixin, ChangeLoggedModel):
         """
         Render the payload URL.
         """
-        return render_jinja2(self.payload_url, context)
+        return render_jinja2(self.payload_url, context, get_template_cache_key(self, 'payload_url'))
 
 
 class CustomLink(CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
@@ -274,10 +279,10 @@ class CustomLink(CloningMixin, ExportTemplatesMixin, ChangeLoggedModel):
 
         :param context: The context passed to Jinja2
         """
-        text = render_jinja2(self.link_text, context)
+        text = render_jinja2(self.link_text, context, get_template_cache_key(self, 'link_text'))
         if not text:
             return {}
-        link = render_jinja2(self.link_url, context)
+        link = render_jinja2(self.link_url, context, get_template_cache_key(self, 'link_url'))
         link_target = ' target="_blank"' if self.new_window else ''
 
         # Sanitize link text
@@ -367,25 +372,46 @@ class ExportTemplate(SyncedDataMixin, CloningMixin, ExportTemplatesMixin, Change
         """
         Render the contents of the template.
         """
-        context = {
-            'queryset': queryset
-        }
-        output = render_jinja2(self.template_code, context)
-
-        # Replace CRLF-style line terminators
-        output = output.replace('\r\n', '\n')
+        return ''.join(self.iter_render(queryset))
 
-        return output
+    def iter_render(self, queryset, buffer_size=65536):
+        """
+        Render the contents of the template incrementally, yielding the output in chunks of roughly buffer_size
+        characters as it is generated. Objects are retrieved from the queryset in chunks as the template iterates over
+        it, rather than all at once.
+        """
+        template = get_template(self.template_code, cache_key=get_template_cache_key(self, 'template_code'))
+        if isinstance(queryset, models.QuerySet):
+            queryset = StreamingQuerySet(queryset, chunk_size=EXPORT_CHUNK_SIZE)
+        buffer = []
+        buffered = 0
+        for fragment in template.generate(queryset=queryset):
+            buffer.append(fragment)
+            buffered += len(fragment)
+            if buffered >= buffer_size:
+                output = ''.join(buffer)
+                # Hold back a trailing CR, which may be followed by an LF in the next chunk
+                if output.endswith('\r'):
+                    output = output[:-1]
+                    buffer, buffered = ['\r'], 1
+                else:
+                    buffer, buffered = [], 0
+                # Replace CRLF-style line terminators
+                yield output.replace('\r\n', '\n')
+        if output := ''.join(buffer):
+            yield output.replace('\r\n', '\n')
 
     def render_to_response(self, queryset):
         """
-        Render the template to an HTTP response, delivered as a named file attachment
+        Render the template to a streaming HTTP response, delivered as a named file attachment. The first chunk of
+        output is rendered immediately, so that errors encountered early in rendering can be reported by the caller.
         """
-        output = self.render(queryset)
+        output = self.iter_render(queryset)
+        first_chunk = next(output, '')
         mime_type = 'text/plain; charset=utf-8' if not self.mime_type else self.mime_type
 
         # Build the response
-        response = HttpResponse(output, content_type=mime_type)
+        response = StreamingHttpResponse(chain([first_chunk], output), content_type=mime_type)
 
         if self.as_attachment:
             basename = queryset.model._meta.verbose_name_plural.replace(' ', '_')
@@ -621,10 +647,12 @@ class ConfigRevision(models.Model):
 
     def activate(self):
         """
-        Cache the configuration data.
+        Cache the configuration data. Any configuration already loaded by this process is discarded immediately;
+        other processes will detect the new version when they next poll the cache.
         """
         cache.set('config', self.data, None)
         cache.set('config_version', self.pk, None)
+        clear_config()
 
     @admin.display(boolean=True)
     def is_active(self):
@@ -1,6 +1,7 @@
 import uuid
 
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from utilities.fields import RestrictedGenericForeignKey
@@ -41,8 +42,16 @@ class CachedValue(models.Model):
     weight = models.PositiveSmallIntegerField(
         default=1000
     )
+    search_vector = SearchVectorField(
+        blank=True,
+        null=True,
+        editable=False
+    )
 
     class Meta:
+        indexes = (
+            models.Index(fields=('object_type', 'object_id'), name='extras_cachedvalue_object'),
+        )
         ordering = ('weight', 'object_type', 'object_id')
 
     def __str__(self):
@@ -3,19 +3,25 @@ import logging
 import traceback
 from datetime import timedelta
 
-from django.utils import timezone
+import django_rq
+from django.db import transaction
 from django.utils.functional import classproperty
 from django_rq import job
+from rq.job import JobStatus
 
 from core.choices import JobStatusChoices
 from core.models import Job
+from utilities.rqworker import get_queue_for_model
 from .choices import LogLevelChoices
 from .models import ReportModule
 
 __all__ = (
     'Report',
+    'complete_abandoned_report_tests',
+    'complete_child_job',
     'get_module_and_report',
     'run_report',
+    'run_report_test',
 )
 
 logger = logging.getLogger(__name__)
@@ -58,37 +64,133 @@ def run_report(job, *args, **kwargs):
             )
 
 
+@job('default')
+def run_report_test(job, test_method, *args, **kwargs):
+    """
+    Run a single test method of a report as a child of the report's Job (see Report.parallel).
+    """
+    job.start()
+
+    module = ReportModule.objects.get(pk=job.object_id)
+    report = module.reports.get(job.parent.name)()
+
+    status = JobStatusChoices.STATUS_ERRORED
+    try:
+        status = report.run_test(job, test_method)
+    except Exception:
+        logging.error(f"Error during execution of report test {job.name}")
+    finally:
+        report.complete_parent_job(job, status=status)
+
+
+def complete_child_job(job, status):
+    """
+    Terminate a child job with the given status and record its results with those of its parent. The child is
+    terminated while its parent is locked, so that the completion of each child is serialized with those of its
+    siblings. Returns the parent if the completion of the child terminated it, or None otherwise.
+    """
+    with transaction.atomic():
+        parent = Job.objects.select_for_update().get(pk=job.parent_id)
+
+        # The child may have already been completed (e.g. if it was found to be abandoned)
+        child_status = Job.objects.select_for_update().values_list('status', flat=True).get(pk=job.pk)
+        if child_status in JobStatusChoices.TERMINAL_STATE_CHOICES:
+            return None
+        job.terminate(status=status)
+
+        parent.data.update(job.data or {})
+        pending = parent.children.exclude(status__in=JobStatusChoices.TERMINAL_STATE_CHOICES).exists()
+        if pending or parent.status in JobStatusChoices.TERMINAL_STATE_CHOICES:
+            parent.save()
+            return None
+
+        # Derive the status of the parent from those of its children
+        statuses = set(parent.children.values_list('status', flat=True))
+        if JobStatusChoices.STATUS_ERRORED in statuses:
+            parent_status = JobStatusChoices.STATUS_ERRORED
+        elif JobStatusChoices.STATUS_FAILED in statuses:
+            parent_status = JobStatusChoices.STATUS_FAILED
+        else:
+            parent_status = JobStatusChoices.STATUS_COMPLETED
+        parent.terminate(status=parent_status)
+
+    return parent
+
+
+def complete_abandoned_report_tests():
+    """
+    Terminate as errored each child of a report's job which has been abandoned by RQ (e.g. because its worker was
+    killed or timed out) without having been completed, and complete its parent. Returns the number of children
+    terminated.
+    """
+    queue = django_rq.get_queue(get_queue_for_model('reportmodule'))
+    abandoned_statuses = (JobStatus.FAILED, JobStatus.STOPPED, JobStatus.CANCELED)
+    count = 0
+
+    children = Job.objects.filter(
+        parent__isnull=False,
+        status__in=(JobStatusChoices.STATUS_PENDING, JobStatusChoices.STATUS_RUNNING)
+    ).select_related('parent')
+    for job in children:
+        rq_job = queue.fetch_job(str(job.job_id))
+        if rq_job is None:
+            # A pending job may not have been enqueued yet
+            if job.status == JobStatusChoices.STATUS_PENDING:
+                continue
+        elif rq_job.get_status() not in abandoned_statuses:
+            continue
+
+        logger.warning(f"Terminating abandoned report test {job.name}")
+        try:
+            module = ReportModule.objects.get(pk=job.parent.object_id)
+            report = module.reports.get(job.parent.name)()
+        except Exception:
+            report = None
+        if report is not None:
+            report.complete_parent_job(job, status=JobStatusChoices.STATUS_ERRORED)
+        else:
+            complete_child_job(job, status=JobStatusChoices.STATUS_ERRORED)
+        count += 1
+
+    return count
+
+
 class Report(object):
     """
     NetBox users can extend this object to write custom reports to be used for validating data within NetBox. Each
     report must have one or more test methods named `test_*`.
 
-    The `_results` attribute of a completed report will take the following form:
+    The `_results` attribute of a report records the number of results logged at each level by each test method:
 
     {
         'test_bar': {
-            'failures': 42,
-            'log': [
-                (<datetime>, <level>, <object>, <message>),
-                ...
-            ]
+            'success': 0,
+            'info': 0,
+            'warning': 0,
+            'failure': 42,
         },
         'test_foo': {
-            'failures': 0,
-            'log': [
-                (<datetime>, <level>, <object>, <message>),
-                ...
-            ]
+            'success': 17,
+            'info': 0,
+            'warning': 0,
+            'failure': 0,
         }
     }
+
+    Messages logged by the test methods are recorded as JobLogEntries of the Job under which the report is run.
+
+    If `parallel` is True, each test method is run as a separate child of the report's Job, allowing the test methods
+    to be executed concurrently by multiple RQ workers.
     """
     description = None
     scheduling_enabled = True
     job_timeout = None
+    parallel = False
 
     def __init__(self):
 
         self._results = {}
+        self.job = None
         self.active_test = None
         self.failed = False
 
@@ -104,7 +206,6 @@ class Report(object):
                     'info': 0,
                     'warning': 0,
                     'failure': 0,
-                    'log': [],
                 }
         if not test_methods:
             raise Exception("A report must contain at least one test method.")
@@ -147,13 +248,8 @@ class Report(object):
         """
         if level not in LogLevelChoices.values():
             raise Exception(f"Unknown logging level: {level}")
-        self._results[self.active_test]['log'].append((
-            timezone.now().isoformat(),
-            level,
-            str(obj) if obj else None,
-            obj.get_absolute_url() if hasattr(obj, 'get_absolute_url') else None,
-            message,
-        ))
+        if self.job is not None:
+            self.job.log(message, level=level, section=self.active_test, obj=obj)
 
     def log(self, message):
         """
@@ -205,10 +301,20 @@ class Report(object):
         Run the report and save its results. Each test method will be executed in order.
         """
         self.logger.info(f"Running report")
+        self.job = job
+
+        # Record the results of each test method as the job's data, which is saved as its progress is logged
+        job.data = self._results
 
         # Perform any post-run tasks
         self.pre_run()
 
+        # Run each test method as a child job, if enabled. The job will be terminated upon the completion of its last
+        # child (see complete_parent_job()).
+        if self.parallel and len(self.test_methods) > 1:
+            self.enqueue_tests(job)
+            return
+
         try:
             for method_name in self.test_methods:
                 self.active_test = method_name
@@ -226,12 +332,64 @@ class Report(object):
             logger.error(f"Exception raised during report execution: {e}")
             job.terminate(status=JobStatusChoices.STATUS_ERRORED)
         finally:
-            job.data = self._results
             job.terminate()
 
         # Perform any post-run tasks
         self.post_run()
 
+    def enqueue_tests(self, job):
+        """
+        Enqueue a child of the given job to run each test method.
+        """
+        job.save()
+        for method_name in self.test_methods:
+            Job.enqueue(
+                run_report_test,
+                instance=job.object,
+                name=f'{self.class_name}.{method_name}',
+                user=job.user,
+                parent=job,
+                job_timeout=self.job_timeout,
+                test_method=method_name
+            )
+
+    def run_test(self, job, method_name):
+        """
+        Run a single test method under a child of the report's job, and return the status with which the child should be
+        terminated (see complete_parent_job()).
+        """
+        self.logger.info(f"Running report test {method_name}")
+        self.job = job
+        self.active_test = method_name
+        job.data = {method_name: self._results[method_name]}
+
+        try:
+            test_method = getattr(self, method_name)
+            test_method()
+            status = JobStatusChoices.STATUS_FAILED if self.failed else JobStatusChoices.STATUS_COMPLETED
+        except Exception as e:
+            stacktrace = traceback.format_exc()
+            self.log_failure(None, f"An exception occurred: {type(e).__name__}: {e} <pre>{stacktrace}</pre>")
+            logger.error(f"Exception raised during report execution: {e}")
+            status = JobStatusChoices.STATUS_ERRORED
+
+        return status
+
+    def complete_parent_job(self, job, status=JobStatusChoices.STATUS_COMPLETED):
+        """
+        Terminate a child job with the given status and record its results with those of its parent. Once all of the
+        parent's children have completed, terminate the parent and perform any post-run tasks.
+        """
+        parent = complete_child_job(job, status)
+        if parent is None:
+            return
+
+        # Perform any post-run tasks
+        self.job = parent
+        self._results = parent.data
+        self.failed = parent.status != JobStatusChoices.STATUS_COMPLETED
+        self.post_run()
+
     def pre_run(self):
         """
         Extend this method to include any tasks which should execute *before* the report is run.
@@ -273,7 +273,9 @@ class BaseScript:
 
         # Initiate the log
         self.logger = logging.getLogger(f"netbox.scripts.{self.__module__}.{self.__class__.__name__}")
-        self.log = []
+
+        # Declare the placeholder for the Job under which the script is run (to which log messages are written)
+        self.job = None
 
         # Declare the placeholder for the current request
         self.request = None
@@ -394,25 +396,29 @@ class BaseScript:
 
     # Logging
 
+    def _log(self, message, level):
+        if self.job is not None:
+            self.job.log(message, level=level)
+
     def log_debug(self, message):
         self.logger.log(logging.DEBUG, message)
-        self.log.append((LogLevelChoices.LOG_DEFAULT, message))
+        self._log(message, LogLevelChoices.LOG_DEFAULT)
 
     def log_success(self, message):
         self.logger.log(logging.INFO, message)  # No syslog equivalent for SUCCESS
-        self.log.append((LogLevelChoices.LOG_SUCCESS, message))
+        self._log(message, LogLevelChoices.LOG_SUCCESS)
 
     def log_info(self, message):
         self.logger.log(logging.INFO, message)
-        self.log.append((LogLevelChoices.LOG_INFO, message))
+        self._log(message, LogLevelChoices.LOG_INFO)
 
     def log_warning(self, message):
         self.logger.log(logging.WARNING, message)
-        self.log.append((LogLevelChoices.LOG_WARNING, message))
+        self._log(message, LogLevelChoices.LOG_WARNING)
 
     def log_failure(self, message):
         self.logger.log(logging.ERROR, message)
-        self.log.append((LogLevelChoices.LOG_FAILURE, message))
+        self._log(message, LogLevelChoices.LOG_FAILURE)
 
     # Convenience functions
 
@@ -485,8 +491,9 @@ def run_script(data, request, job, commit=True, **kwargs):
     for field_name, fileobj in files.items():
         data[field_name] = fileobj
 
-    # Add the current request as a property of the script
+    # Add the current request and job as properties of the script
     script.request = request
+    script.job = job
 
     def _run_script():
         """
@@ -2,17 +2,20 @@ import importlib
 import logging
 
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver, Signal
 from django_prometheus.models import model_deletes, model_inserts, model_updates
 
+from core.models import ManagedFile
 from extras.validators import CustomValidator
 from netbox.config import get_config
-from netbox.context import current_request, webhooks_queue
-from netbox.signals import post_clean
+from netbox.context import current_request, objectchange_queue, webhooks_queue
+from netbox.signals import post_bulk_create, post_clean
 from .choices import ObjectChangeActionChoices
-from .models import ConfigRevision, CustomField, ObjectChange
-from .webhooks import enqueue_object, get_snapshots, serialize_for_webhook
+from .models import ConfigRevision, CustomField, ReportModule, ScriptModule, Tag, Webhook
+from .models.mixins import clear_module_cache
+from .utils import is_taggable
+from .webhooks import enqueue_object, invalidate_webhooks_map
 
 #
 # Change logging/webhooks
@@ -61,29 +64,28 @@ def handle_changed_object(sender, instance, **kwargs):
     else:
         return
 
-    # Record an ObjectChange if applicable
+    # Queue an ObjectChange if applicable (see flush_objectchanges()). Repeated changes to the same object within a
+    # request are merged into the ObjectChange already queued for it.
     if hasattr(instance, 'to_objectchange'):
-        if m2m_changed:
-            ObjectChange.objects.filter(
-                changed_object_type=ContentType.objects.get_for_model(instance),
-                changed_object_id=instance.pk,
-                request_id=request.id
-            ).update(
-                postchange_data=instance.to_objectchange(action).postchange_data
-            )
-        else:
+        objectchanges = objectchange_queue.get()
+        key = (ContentType.objects.get_for_model(instance).pk, instance.pk, False)
+        if key in objectchanges:
+            objectchange = objectchanges[key]
+            objectchange.object_repr = str(instance)[:200]
+            objectchange.postchange_data = instance.to_objectchange(action).postchange_data
+            # Update the ObjectChange if it has already been written
+            if objectchange.pk:
+                objectchange.save(update_fields=('object_repr', 'postchange_data'))
+        elif not m2m_changed:
             objectchange = instance.to_objectchange(action)
             objectchange.user = request.user
             objectchange.request_id = request.id
-            objectchange.save()
+            objectchanges[key] = objectchange
 
-    # If this is an M2M change, update the previously queued webhook (from post_save)
+    # Enqueue webhooks, unless this is an M2M change to an object which has already been queued (from post_save). Queued
+    # objects are serialized by the webhooks worker, so their M2M assignments will be current.
     queue = webhooks_queue.get()
-    if m2m_changed and queue and is_same_object(instance, queue[-1], request.id):
-        instance.refresh_from_db()  # Ensure that we're working with fresh M2M assignments
-        queue[-1]['data'] = serialize_for_webhook(instance)
-        queue[-1]['snapshots']['postchange'] = get_snapshots(instance, action)['postchange']
-    else:
+    if not (m2m_changed and queue and is_same_object(instance, queue[-1], request.id)):
         enqueue_object(queue, instance, request.user, request.id, action)
     webhooks_queue.set(queue)
 
@@ -94,6 +96,44 @@ def handle_changed_object(sender, instance, **kwargs):
         model_updates.labels(instance._meta.model_name).inc()
 
 
+@receiver(post_bulk_create)
+def handle_bulk_created_objects(sender, instances, **kwargs):
+    """
+    Fires when multiple objects have been created via bulk_create() (in place of post_save for each object).
+    """
+    if not hasattr(sender, 'to_objectchange'):
+        return
+
+    # Get the current request, or bail if not set
+    request = current_request.get()
+    if request is None:
+        return
+
+    action = ObjectChangeActionChoices.ACTION_CREATE
+    content_type = ContentType.objects.get_for_model(sender)
+    objectchanges = objectchange_queue.get()
+    webhooks = webhooks_queue.get()
+    for instance in instances:
+
+        # Tags cannot be assigned via bulk_create(), so there is no need to query for them when serializing the object
+        if is_taggable(instance):
+            instance.__dict__.setdefault('_prefetched_objects_cache', {}).setdefault('tags', Tag.objects.none())
+
+        # Queue an ObjectChange
+        objectchange = instance.to_objectchange(action)
+        objectchange.user = request.user
+        objectchange.request_id = request.id
+        objectchanges[(content_type.pk, instance.pk, False)] = objectchange
+
+        # Enqueue webhooks
+        enqueue_object(webhooks, instance, request.user, request.id, action)
+
+    webhooks_queue.set(webhooks)
+
+    # Increment metric counters
+    model_inserts.labels(sender._meta.model_name).inc(len(instances))
+
+
 @receiver(pre_delete)
 def handle_deleted_object(sender, instance, **kwargs):
     """
@@ -104,14 +144,14 @@ def handle_deleted_object(sender, instance, **kwargs):
     if request is None:
         return
 
-    # Record an ObjectChange if applicable
+    # Queue an ObjectChange if applicable (see flush_objectchanges())
     if hasattr(instance, 'to_objectchange'):
         if hasattr(instance, 'snapshot') and not getattr(instance, '_prechange_snapshot', None):
             instance.snapshot()
         objectchange = instance.to_objectchange(ObjectChangeActionChoices.ACTION_DELETE)
         objectchange.user = request.user
         objectchange.request_id = request.id
-        objectchange.save()
+        objectchange_queue.get()[(ContentType.objects.get_for_model(instance).pk, instance.pk, True)] = objectchange
 
     # Enqueue webhooks
     queue = webhooks_queue.get()
@@ -125,11 +165,23 @@ def handle_deleted_object(sender, instance, **kwargs):
 @receiver(clear_webhooks)
 def clear_webhook_queue(sender, **kwargs):
     """
-    Delete any queued webhooks (e.g. because of an aborted bulk transaction)
+    Delete any queued webhooks (e.g. because of an aborted bulk transaction), and forget the ObjectChanges recorded
+    within it, which have been rolled back.
     """
     logger = logging.getLogger('webhooks')
     logger.info(f"Clearing {len(webhooks_queue.get())} queued webhooks ({sender})")
     webhooks_queue.set([])
+    if objectchange_queue.get() is not None:
+        objectchange_queue.get().clear()
+
+
+@receiver((post_save, post_delete), sender=Webhook)
+@receiver(m2m_changed, sender=Webhook.content_types.through)
+def handle_webhook_changed(sender, **kwargs):
+    """
+    Invalidate the cached map of enabled Webhooks whenever a Webhook is modified.
+    """
+    invalidate_webhooks_map()
 
 
 #
@@ -141,7 +193,7 @@ def handle_cf_added_obj_types(instance, action, pk_set, **kwargs):
     Handle the population of default/null values when a CustomField is added to one or more ContentTypes.
     """
     if action == 'post_add':
-        instance.populate_initial_data(ContentType.objects.filter(pk__in=pk_set))
+        instance.update_object_data('populate', ContentType.objects.filter(pk__in=pk_set))
 
 
 def handle_cf_removed_obj_types(instance, action, pk_set, **kwargs):
@@ -149,7 +201,7 @@ def handle_cf_removed_obj_types(instance, action, pk_set, **kwargs):
     Handle the cleanup of old custom field data when a CustomField is removed from one or more ContentTypes.
     """
     if action == 'post_remove':
-        instance.remove_stale_data(ContentType.objects.filter(pk__in=pk_set))
+        instance.update_object_data('remove', ContentType.objects.filter(pk__in=pk_set))
 
 
 def handle_cf_renamed(instance, created, **kwargs):
@@ -157,14 +209,16 @@ def handle_cf_renamed(instance, created, **kwargs):
     Handle the renaming of custom field data on objects when a CustomField is renamed.
     """
     if not created and instance.name != instance._name:
-        instance.rename_object_data(old_name=instance._name, new_name=instance.name)
+        instance.update_object_data(
+            'rename', instance.content_types.all(), old_name=instance._name, new_name=instance.name
+        )
 
 
 def handle_cf_deleted(instance, **kwargs):
     """
     Handle the cleanup of old custom field data when a CustomField is deleted.
     """
-    instance.remove_stale_data(instance.content_types.all())
+    instance.update_object_data('remove', instance.content_types.all())
 
 
 post_save.connect(handle_cf_renamed, sender=CustomField)
@@ -207,3 +261,18 @@ def update_config(sender, instance, **kwargs):
     Update the cached NetBox configuration when a new ConfigRevision is created.
     """
     instance.activate()
+
+
+#
+# Script & report modules
+#
+
+@receiver((post_save, post_delete), sender=ManagedFile)
+@receiver((post_save, post_delete), sender=ReportModule)
+@receiver((post_save, post_delete), sender=ScriptModule)
+def handle_managed_file_changed(sender, instance, **kwargs):
+    """
+    Discard the cached Python module for a ManagedFile when it is modified or deleted. (Other processes will reload
+    the module upon detecting the change to the file on disk.)
+    """
+    clear_module_cache(instance.full_path)
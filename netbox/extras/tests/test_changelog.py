@@ -1,11 +1,20 @@
+import uuid
+
+from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
 from dcim.choices import SiteStatusChoices
 from dcim.models import Site
 from extras.choices import *
+from extras.context_managers import change_logging, flush_objectchanges
 from extras.models import CustomField, ObjectChange, Tag
+from extras.signals import clear_webhooks
+from users.models import ObjectPermission
 from utilities.testing import APITestCase
 from utilities.testing.utils import create_tags, post_data
 from utilities.testing.views import ModelViewTestCase
@@ -170,6 +179,45 @@ class ChangeLogViewTest(ModelViewTestCase):
         self.assertEqual(objectchange.postchange_data['status'], form_data['status'])
         self.assertEqual(objectchange.postchange_data['description'], form_data['description'])
 
+    def test_bulk_update_objects_queries(self):
+        tags = create_tags('Tag 1', 'Tag 2')
+        sites = (
+            Site(name='Site 1', slug='site-1', status=SiteStatusChoices.STATUS_ACTIVE),
+            Site(name='Site 2', slug='site-2', status=SiteStatusChoices.STATUS_ACTIVE),
+            Site(name='Site 3', slug='site-3', status=SiteStatusChoices.STATUS_ACTIVE),
+        )
+        Site.objects.bulk_create(sites)
+
+        form_data = {
+            'pk': [site.pk for site in sites],
+            '_apply': True,
+            'status': SiteStatusChoices.STATUS_PLANNED,
+            'add_tags': [tag.pk for tag in tags],
+        }
+
+        request = {
+            'path': self._get_url('bulk_edit'),
+            'data': post_data(form_data),
+        }
+        self.add_permissions('dcim.view_site', 'dcim.change_site')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(**request)
+        self.assertHttpStatus(response, 302)
+
+        # The ObjectChanges for all sites (merging the assignment of tags with the other changes to each site) are
+        # written in a single query
+        objectchange_queries = [
+            query['sql'] for query in queries.captured_queries if 'extras_objectchange' in query['sql']
+        ]
+        self.assertEqual(len(objectchange_queries), 1)
+        self.assertTrue(objectchange_queries[0].startswith('INSERT'))
+
+        objectchanges = ObjectChange.objects.filter(changed_object_type=ContentType.objects.get_for_model(Site))
+        self.assertEqual(objectchanges.count(), 3)
+        for objectchange in objectchanges:
+            self.assertEqual(objectchange.postchange_data['status'], SiteStatusChoices.STATUS_PLANNED)
+            self.assertEqual(objectchange.postchange_data['tags'], ['Tag 1', 'Tag 2'])
+
     def test_bulk_delete_objects(self):
         sites = (
             Site(name='Site 1', slug='site-1', status=SiteStatusChoices.STATUS_ACTIVE),
@@ -443,3 +491,90 @@ class ChangeLogAPITest(APITestCase):
         self.assertEqual(objectchange.prechange_data['name'], 'Site 1')
         self.assertEqual(objectchange.prechange_data['slug'], 'site-1')
         self.assertEqual(objectchange.postchange_data, None)
+
+    def test_create_object_denied(self):
+        """
+        Changes which are rolled back (e.g. due to a violation of object permission constraints) should not be logged.
+        """
+        obj_perm = ObjectPermission(
+            name='Test permission',
+            constraints={'name': 'Site 1'},
+            actions=['add']
+        )
+        obj_perm.save()
+        obj_perm.users.add(self.user)
+        obj_perm.object_types.add(ContentType.objects.get_for_model(Site))
+
+        data = {
+            'name': 'Site 2',
+            'slug': 'site-2',
+            'tags': [
+                {'name': 'Tag 1'},
+            ]
+        }
+        self.assertEqual(ObjectChange.objects.count(), 0)
+        url = reverse('dcim-api:site-list')
+
+        response = self.client.post(url, data, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Site.objects.filter(name='Site 2').exists())
+        self.assertEqual(ObjectChange.objects.count(), 0)
+
+
+class ChangeLoggingContextTest(TestCase):
+
+    def get_request(self):
+        request = RequestFactory().get('/')
+        request.id = uuid.uuid4()
+        request.user = User.objects.get_or_create(username='testuser')[0]
+        return request
+
+    def test_changes_written_within_transaction(self):
+        with change_logging(self.get_request()):
+            with transaction.atomic():
+                site = Site.objects.create(name='Site 1', slug='site-1')
+                site.description = 'Foo'
+                site.save()
+
+                # Changes are queued until flushed
+                self.assertFalse(ObjectChange.objects.exists())
+                flush_objectchanges()
+                objectchange = ObjectChange.objects.get(changed_object_id=site.pk)
+                self.assertEqual(objectchange.action, ObjectChangeActionChoices.ACTION_CREATE)
+
+                # Subsequent changes are merged into the record already written
+                site.description = 'Bar'
+                site.save()
+
+            # Changes rolled back along with the data are not logged
+            with self.assertRaises(ValueError), transaction.atomic():
+                Site.objects.create(name='Site 2', slug='site-2')
+                raise ValueError()
+            clear_webhooks.send(sender=self)
+
+        objectchange.refresh_from_db()
+        self.assertEqual(ObjectChange.objects.count(), 1)
+        self.assertEqual(objectchange.postchange_data['description'], 'Bar')
+
+    def test_changes_flushed_on_exit(self):
+        with change_logging(self.get_request()):
+            site = Site.objects.create(name='Site 1', slug='site-1')
+            site.delete()
+            self.assertFalse(ObjectChange.objects.exists())
+
+        self.assertListEqual(
+            list(ObjectChange.objects.order_by('pk').values_list('action', flat=True)),
+            [ObjectChangeActionChoices.ACTION_CREATE, ObjectChangeActionChoices.ACTION_DELETE]
+        )
+
+    def test_nested_change_logging(self):
+        outer_request = self.get_request()
+        inner_request = self.get_request()
+
+        with change_logging(outer_request):
+            with change_logging(inner_request):
+                Site.objects.create(name='Site 1', slug='site-1')
+            Site.objects.create(name='Site 2', slug='site-2')
+
+        self.assertEqual(ObjectChange.objects.get(object_repr='Site 1').request_id, inner_request.id)
+        self.assertEqual(ObjectChange.objects.get(object_repr='Site 2').request_id, outer_request.id)
@@ -1,17 +1,22 @@
 import datetime
 from decimal import Decimal
 
+import django_rq
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 
+from core.choices import JobStatusChoices
+from core.models import Job
 from dcim.filtersets import SiteFilterSet
 from dcim.forms import SiteImportForm
 from dcim.models import Manufacturer, Rack, Site
 from extras.choices import *
-from extras.models import CustomField
+from extras.models import CustomField, prefetch_custom_field_objects, resolve_custom_field_objects
 from ipam.models import VLAN
+from utilities.rqworker import get_queue_for_model
 from utilities.testing import APITestCase, TestCase
 from virtualization.models import VirtualMachine
 
@@ -380,6 +385,130 @@ class CustomFieldTest(TestCase):
         instance.refresh_from_db()
         self.assertIsNone(instance.custom_field_data.get(cf.name))
 
+    def test_resolve_custom_field_objects(self):
+        vlans = (
+            VLAN(name='VLAN 1', vid=1),
+            VLAN(name='VLAN 2', vid=2),
+            VLAN(name='VLAN 3', vid=3),
+        )
+        VLAN.objects.bulk_create(vlans)
+        vlan_type = ContentType.objects.get_for_model(VLAN)
+        object_cf = CustomField.objects.create(
+            name='object_field',
+            type=CustomFieldTypeChoices.TYPE_OBJECT,
+            object_type=vlan_type
+        )
+        multiobject_cf = CustomField.objects.create(
+            name='multiobject_field',
+            type=CustomFieldTypeChoices.TYPE_MULTIOBJECT,
+            object_type=vlan_type
+        )
+        for cf in (object_cf, multiobject_cf):
+            cf.content_types.set([self.object_type])
+        sites = list(Site.objects.all())
+        for i, site in enumerate(sites):
+            site.custom_field_data[object_cf.name] = vlans[i].pk
+            site.custom_field_data[multiobject_cf.name] = [vlans[2].pk, vlans[i].pk]
+            site.save()
+
+        # Objects of each type should be retrieved with a single query for all instances
+        with self.assertNumQueries(1):
+            objects = resolve_custom_field_objects(sites, [object_cf, multiobject_cf])
+            for i, site in enumerate(sites):
+                self.assertEqual(object_cf.deserialize(site.custom_field_data[object_cf.name], objects), vlans[i])
+                self.assertEqual(
+                    multiobject_cf.deserialize(site.custom_field_data[multiobject_cf.name], objects),
+                    [vlans[2], vlans[i]]
+                )
+
+        # The cf property of each instance should use the objects prefetched for all instances
+        sites = list(Site.objects.all())
+        prefetch_custom_field_objects(sites, [object_cf, multiobject_cf])
+        for i, site in enumerate(sites):
+            # Retrieve only the CustomFields assigned to the model
+            with self.assertNumQueries(1):
+                self.assertEqual(site.cf[object_cf.name], vlans[i])
+                self.assertEqual(site.cf[multiobject_cf.name], [vlans[2], vlans[i]])
+
+    @override_settings(CUSTOM_FIELD_DATA_BATCH_SIZE=2)
+    def test_update_object_data(self):
+        def get_data():
+            return {site.name: site.custom_field_data for site in Site.objects.all()}
+
+        Site.objects.filter(name='Site C').update(custom_field_data={'field1': 'xyz'})
+
+        # Create a custom field and check that its default value is populated only on sites with no existing value
+        cf = CustomField.objects.create(type=CustomFieldTypeChoices.TYPE_TEXT, name='field1', default='abc')
+        cf.content_types.set([self.object_type])
+        self.assertEqual(
+            get_data(),
+            {'Site A': {'field1': 'abc'}, 'Site B': {'field1': 'abc'}, 'Site C': {'field1': 'xyz'}}
+        )
+
+        # Rename the custom field
+        cf.name = 'field2'
+        cf.save()
+        self.assertEqual(
+            get_data(),
+            {'Site A': {'field2': 'abc'}, 'Site B': {'field2': 'abc'}, 'Site C': {'field2': 'xyz'}}
+        )
+
+        # Unassign the custom field from sites
+        cf.content_types.remove(self.object_type)
+        self.assertEqual(
+            get_data(),
+            {'Site A': {}, 'Site B': {}, 'Site C': {}}
+        )
+
+    @override_settings(CUSTOM_FIELD_DATA_JOBS=True)
+    def test_update_object_data_job(self):
+        queue = django_rq.get_queue(get_queue_for_model('customfield'))
+        queue.empty()
+
+        def get_data():
+            return {site.name: site.custom_field_data for site in Site.objects.all()}
+
+        def run_job():
+            job = Job.objects.get(status=JobStatusChoices.STATUS_PENDING)
+            rq_job = queue.fetch_job(str(job.job_id))
+            rq_job.func(**rq_job.kwargs)
+            job.refresh_from_db()
+            return job
+
+        # Jobs are enqueued only once the change to the custom field has been committed
+        with self.captureOnCommitCallbacks(execute=True):
+            cf = CustomField.objects.create(type=CustomFieldTypeChoices.TYPE_TEXT, name='field1', default='abc')
+            cf.content_types.set([self.object_type])
+            self.assertFalse(Job.objects.exists())
+        self.assertEqual(get_data(), {'Site A': {}, 'Site B': {}, 'Site C': {}})
+
+        job = run_job()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(job.object_id, cf.pk)
+        self.assertEqual(job.data, {'operation': 'populate', 'updated': {'dcim.site': 3}})
+        self.assertEqual(
+            get_data(),
+            {'Site A': {'field1': 'abc'}, 'Site B': {'field1': 'abc'}, 'Site C': {'field1': 'abc'}}
+        )
+
+        # Delete the custom field. The job should be recorded against the deleted field.
+        cf_pk = cf.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            cf.delete()
+
+        # Objects retaining data for the deleted field can be validated and saved before the job has run
+        site = Site.objects.get(name='Site A')
+        self.assertEqual(site.custom_field_data, {'field1': 'abc'})
+        site.full_clean()
+        site.save()
+
+        job = run_job()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(job.object_type, ContentType.objects.get_for_model(CustomField))
+        self.assertEqual(job.object_id, cf_pk)
+        self.assertEqual(job.name, 'Update custom field data (remove field1)')
+        self.assertEqual(get_data(), {'Site A': {}, 'Site B': {}, 'Site C': {}})
+
     def test_rename_customfield(self):
         obj_type = ContentType.objects.get_for_model(Site)
         FIELD_DATA = 'abc'
@@ -1014,6 +1143,17 @@ class CustomFieldAPITest(APITestCase):
         response = self.client.patch(url, data, format='json', **self.header)
         self.assertHttpStatus(response, status.HTTP_200_OK)
 
+    @override_settings(CUSTOM_FIELD_DATA_JOBS=True)
+    def test_unknown_field_validation(self):
+        site2 = Site.objects.get(name='Site 2')
+        url = reverse('dcim-api:site-detail', kwargs={'pk': site2.pk})
+        self.add_permissions('dcim.change_site')
+
+        # Data for unknown fields is rejected, even while data for deleted fields is tolerated by the model
+        data = {'custom_fields': {'foo': 'abc'}}
+        response = self.client.patch(url, data, format='json', **self.header)
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
 
 class CustomFieldImportTest(TestCase):
     user_permissions = (
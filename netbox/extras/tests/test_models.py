@@ -1,7 +1,7 @@
 from django.test import TestCase
 
 from dcim.models import Device, DeviceRole, DeviceType, Location, Manufacturer, Platform, Region, Site, SiteGroup
-from extras.models import ConfigContext, Tag
+from extras.models import ConfigContext, ExportTemplate, Tag
 from tenancy.models import Tenant, TenantGroup
 from virtualization.models import Cluster, ClusterGroup, ClusterType, VirtualMachine
 
@@ -15,6 +15,51 @@ class TagTest(TestCase):
         self.assertEqual(tag.slug, 'testing-unicode-台灣')
 
 
+class ExportTemplateTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Site.objects.bulk_create(Site(name=f'Site {i}', slug=f'site-{i}') for i in range(1, 4))
+
+    def test_iter_render(self):
+        export_template = ExportTemplate(
+            name='Export Template 1',
+            template_code='{% for site in queryset %}{{ site.name }}{{ "\\r" }}{{ "\\n" }}{% endfor %}'
+        )
+        expected_output = 'Site 1\nSite 2\nSite 3\n'
+        queryset = Site.objects.order_by('name')
+
+        self.assertEqual(export_template.render(queryset), expected_output)
+
+        # Rendering in small chunks must not split CRLF line terminators
+        chunks = list(export_template.iter_render(queryset, buffer_size=7))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), expected_output)
+
+    def test_iter_render_queryset(self):
+        export_template = ExportTemplate(
+            name='Export Template 1',
+            template_code='{{ queryset|length }}:{% for site in queryset %} {{ site.name }}{% endfor %}'
+        )
+        queryset = Site.objects.order_by('name')
+
+        # The queryset is iterated over in chunks, without populating its result cache
+        self.assertEqual(export_template.render(queryset), '3: Site 1 Site 2 Site 3')
+        self.assertIsNone(queryset._result_cache)
+
+    def test_render_to_response(self):
+        export_template = ExportTemplate(
+            name='Export Template 1',
+            template_code='{% for site in queryset %}{{ site.name }}\n{% endfor %}',
+            file_extension='txt'
+        )
+        response = export_template.render_to_response(Site.objects.order_by('name'))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="netbox_sites.txt"')
+        self.assertEqual(b''.join(response.streaming_content), b'Site 1\nSite 2\nSite 3\n')
+
+
 class ConfigContextTest(TestCase):
     """
     These test cases deal with the weighting, ordering, and deep merge logic of config context data.
@@ -0,0 +1,142 @@
+import threading
+import uuid
+from unittest.mock import Mock, patch
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rq.job import JobStatus
+
+from core.choices import JobStatusChoices
+from core.models import Job, JobLogEntry
+from extras.choices import LogLevelChoices
+from extras.reports import Report, complete_abandoned_report_tests
+
+
+class ParallelReportTest(TransactionTestCase):
+
+    class TestReport(Report):
+        parallel = True
+
+        def test_bar(self):
+            self.log_failure(None, "Failed")
+
+        def test_foo(self):
+            self.log_success(None)
+
+        def post_run(self):
+            ParallelReportTest.post_run_results.append(self._results)
+
+    def setUp(self):
+        ParallelReportTest.post_run_results = []
+
+        object_type = ContentType.objects.get_by_natural_key('extras', 'reportmodule')
+        self.parent = Job.objects.create(
+            object_type=object_type,
+            name='TestReport',
+            status=JobStatusChoices.STATUS_RUNNING,
+            started=timezone.now(),
+            data=self.TestReport()._results,
+            job_id=uuid.uuid4()
+        )
+        self.children = {
+            method: Job.objects.create(
+                object_type=object_type,
+                name=f'TestReport.{method}',
+                parent=self.parent,
+                status=JobStatusChoices.STATUS_RUNNING,
+                job_id=uuid.uuid4()
+            ) for method in ('test_bar', 'test_foo')
+        }
+
+    def test_complete_parent_job(self):
+        parent, children = self.parent, self.children
+
+        # The parent job remains running until all of its children have completed
+        report = self.TestReport()
+        status = report.run_test(children['test_foo'], 'test_foo')
+        report.complete_parent_job(children['test_foo'], status=status)
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, JobStatusChoices.STATUS_RUNNING)
+        self.assertEqual(parent.data['test_foo']['success'], 1)
+        self.assertEqual(ParallelReportTest.post_run_results, [])
+
+        # Completion of the last child terminates the parent with the aggregated results
+        report = self.TestReport()
+        status = report.run_test(children['test_bar'], 'test_bar')
+        report.complete_parent_job(children['test_bar'], status=status)
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, JobStatusChoices.STATUS_FAILED)
+        self.assertEqual(parent.data['test_foo']['success'], 1)
+        self.assertEqual(parent.data['test_bar']['failure'], 1)
+        self.assertEqual(len(ParallelReportTest.post_run_results), 1)
+
+        # Completing a child again has no effect
+        report.complete_parent_job(children['test_bar'], status=JobStatusChoices.STATUS_ERRORED)
+        children['test_bar'].refresh_from_db()
+        self.assertEqual(children['test_bar'].status, JobStatusChoices.STATUS_FAILED)
+        self.assertEqual(len(ParallelReportTest.post_run_results), 1)
+
+        # Log entries of the children are recorded under the parent
+        log_entries = JobLogEntry.objects.filter(job=parent)
+        self.assertEqual(log_entries.count(), 1)
+        self.assertEqual(log_entries[0].level, LogLevelChoices.LOG_FAILURE)
+        self.assertEqual(log_entries[0].section, 'test_bar')
+
+    def test_concurrent_completion(self):
+        parent, children = self.parent, self.children
+        statuses = {}
+        for method, child in children.items():
+            statuses[method] = self.TestReport().run_test(child, method)
+
+        # Complete both children simultaneously, each in its own thread (and database connection)
+        barrier = threading.Barrier(len(children))
+
+        def complete(method):
+            try:
+                barrier.wait()
+                self.TestReport().complete_parent_job(children[method], status=statuses[method])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=complete, args=(method,)) for method in children]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The parent is terminated exactly once, with the results of both children
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, JobStatusChoices.STATUS_FAILED)
+        self.assertEqual(parent.data['test_foo']['success'], 1)
+        self.assertEqual(parent.data['test_bar']['failure'], 1)
+        self.assertEqual(len(ParallelReportTest.post_run_results), 1)
+        self.assertEqual(ParallelReportTest.post_run_results[0]['test_foo']['success'], 1)
+        self.assertEqual(ParallelReportTest.post_run_results[0]['test_bar']['failure'], 1)
+
+    def test_complete_abandoned_report_tests(self):
+        parent, children = self.parent, self.children
+        report = self.TestReport()
+        report.complete_parent_job(children['test_foo'], status=report.run_test(children['test_foo'], 'test_foo'))
+
+        # The RQ job running test_bar has failed (e.g. because its worker was killed)
+        rq_jobs = {str(children['test_bar'].job_id): JobStatus.STARTED}
+        with patch('django_rq.get_queue') as get_queue:
+            get_queue.return_value.fetch_job.side_effect = lambda job_id: Mock(
+                get_status=Mock(return_value=rq_jobs[job_id])
+            )
+
+            # A child which is still running is not abandoned
+            self.assertEqual(complete_abandoned_report_tests(), 0)
+            parent.refresh_from_db()
+            self.assertEqual(parent.status, JobStatusChoices.STATUS_RUNNING)
+
+            rq_jobs[str(children['test_bar'].job_id)] = JobStatus.FAILED
+            self.assertEqual(complete_abandoned_report_tests(), 1)
+
+        children['test_bar'].refresh_from_db()
+        self.assertEqual(children['test_bar'].status, JobStatusChoices.STATUS_ERRORED)
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, JobStatusChoices.STATUS_ERRORED)
+        self.assertEqual(parent.data['test_foo']['success'], 1)
@@ -1,3 +1,4 @@
+import os
 import tempfile
 
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -5,6 +6,7 @@ from django.test import TestCase
 from netaddr import IPAddress, IPNetwork
 
 from dcim.models import DeviceRole
+from extras.models.mixins import clear_module_cache, load_module
 from extras.scripts import *
 
 CHOICES = (
@@ -58,6 +60,32 @@ class ScriptTest(TestCase):
         })
 
 
+class ScriptModuleCacheTest(TestCase):
+
+    def test_module_cache(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'cached_module.py')
+            with open(path, 'w') as f:
+                f.write('VALUE = 1\n')
+
+            # The module is loaded only once
+            module = load_module('cached_module', path)
+            self.assertEqual(module.VALUE, 1)
+            self.assertIs(load_module('cached_module', path), module)
+
+            # Modifying the file causes the module to be reloaded
+            with open(path, 'w') as f:
+                f.write('VALUE = 22\n')
+            self.assertEqual(load_module('cached_module', path).VALUE, 22)
+
+            # Clearing the cache causes the module to be reloaded
+            module = load_module('cached_module', path)
+            module.VALUE = None
+            self.assertIsNone(load_module('cached_module', path).VALUE)
+            clear_module_cache(path)
+            self.assertEqual(load_module('cached_module', path).VALUE, 22)
+
+
 class ScriptVariablesTest(TestCase):
 
     def test_stringvar(self):
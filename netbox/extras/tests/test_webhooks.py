@@ -1,20 +1,25 @@
 import json
 import uuid
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import django_rq
 from django.contrib.contenttypes.models import ContentType
 from django.http import HttpResponse
+from django.test import override_settings
 from django.urls import reverse
-from requests import Session
+from requests import RequestException, Session
 from rest_framework import status
 
 from dcim.choices import SiteStatusChoices
 from dcim.models import Site
 from extras.choices import ObjectChangeActionChoices
 from extras.models import Tag, Webhook
-from extras.webhooks import enqueue_object, flush_webhooks, generate_signature, serialize_for_webhook
-from extras.webhooks_worker import eval_conditions, process_webhook
+from extras.webhooks import enqueue_object, flush_webhooks, generate_signature, get_webhook_data, serialize_for_webhook
+from extras.webhooks_worker import (
+    DELIVERY_FAILURES_KEY, DELIVERY_LATENCY_KEY, DELIVERY_LATENCY_SUM_KEY, WebhookDeliveryCollector, eval_conditions,
+    get_metrics_connection, process_webhook, process_webhook_batch,
+)
+from utilities.rqworker import NetBoxWorker
 from utilities.testing import APITestCase
 
 
@@ -48,6 +53,15 @@ class WebhookTest(APITestCase):
             Tag(name='Baz', slug='baz'),
         ))
 
+    def get_job_data(self, job):
+        """
+        Return the serialized data and snapshots for a queued webhook job, the serialization of which was deferred.
+        """
+        self.assertIsNone(job.kwargs['data'])
+        return get_webhook_data(
+            job.kwargs['content_type_id'], job.kwargs['object_id'], job.kwargs['event'], job.kwargs['snapshots']
+        )
+
     def test_enqueue_webhook_create(self):
         # Create an object via the REST API
         data = {
@@ -68,13 +82,14 @@ class WebhookTest(APITestCase):
         # Verify that a job was queued for the object creation webhook
         self.assertEqual(self.queue.count, 1)
         job = self.queue.jobs[0]
+        job_data, snapshots = self.get_job_data(job)
         self.assertEqual(job.kwargs['webhook'], Webhook.objects.get(type_create=True))
         self.assertEqual(job.kwargs['event'], ObjectChangeActionChoices.ACTION_CREATE)
         self.assertEqual(job.kwargs['model_name'], 'site')
-        self.assertEqual(job.kwargs['data']['id'], response.data['id'])
-        self.assertEqual(len(job.kwargs['data']['tags']), len(response.data['tags']))
-        self.assertEqual(job.kwargs['snapshots']['postchange']['name'], 'Site 1')
-        self.assertEqual(job.kwargs['snapshots']['postchange']['tags'], ['Bar', 'Foo'])
+        self.assertEqual(job_data['id'], response.data['id'])
+        self.assertEqual(len(job_data['tags']), len(response.data['tags']))
+        self.assertEqual(snapshots['postchange']['name'], 'Site 1')
+        self.assertEqual(snapshots['postchange']['tags'], ['Bar', 'Foo'])
 
     def test_enqueue_webhook_bulk_create(self):
         # Create multiple objects via the REST API
@@ -114,13 +129,14 @@ class WebhookTest(APITestCase):
         # Verify that a webhook was queued for each object
         self.assertEqual(self.queue.count, 3)
         for i, job in enumerate(self.queue.jobs):
+            job_data, snapshots = self.get_job_data(job)
             self.assertEqual(job.kwargs['webhook'], Webhook.objects.get(type_create=True))
             self.assertEqual(job.kwargs['event'], ObjectChangeActionChoices.ACTION_CREATE)
             self.assertEqual(job.kwargs['model_name'], 'site')
-            self.assertEqual(job.kwargs['data']['id'], response.data[i]['id'])
-            self.assertEqual(len(job.kwargs['data']['tags']), len(response.data[i]['tags']))
-            self.assertEqual(job.kwargs['snapshots']['postchange']['name'], response.data[i]['name'])
-            self.assertEqual(job.kwargs['snapshots']['postchange']['tags'], ['Bar', 'Foo'])
+            self.assertEqual(job_data['id'], response.data[i]['id'])
+            self.assertEqual(len(job_data['tags']), len(response.data[i]['tags']))
+            self.assertEqual(snapshots['postchange']['name'], response.data[i]['name'])
+            self.assertEqual(snapshots['postchange']['tags'], ['Bar', 'Foo'])
 
     def test_enqueue_webhook_update(self):
         site = Site.objects.create(name='Site 1', slug='site-1')
@@ -142,15 +158,16 @@ class WebhookTest(APITestCase):
         # Verify that a job was queued for the object update webhook
         self.assertEqual(self.queue.count, 1)
         job = self.queue.jobs[0]
+        job_data, snapshots = self.get_job_data(job)
         self.assertEqual(job.kwargs['webhook'], Webhook.objects.get(type_update=True))
         self.assertEqual(job.kwargs['event'], ObjectChangeActionChoices.ACTION_UPDATE)
         self.assertEqual(job.kwargs['model_name'], 'site')
-        self.assertEqual(job.kwargs['data']['id'], site.pk)
-        self.assertEqual(len(job.kwargs['data']['tags']), len(response.data['tags']))
-        self.assertEqual(job.kwargs['snapshots']['prechange']['name'], 'Site 1')
-        self.assertEqual(job.kwargs['snapshots']['prechange']['tags'], ['Bar', 'Foo'])
-        self.assertEqual(job.kwargs['snapshots']['postchange']['name'], 'Site X')
-        self.assertEqual(job.kwargs['snapshots']['postchange']['tags'], ['Baz'])
+        self.assertEqual(job_data['id'], site.pk)
+        self.assertEqual(len(job_data['tags']), len(response.data['tags']))
+        self.assertEqual(snapshots['prechange']['name'], 'Site 1')
+        self.assertEqual(snapshots['prechange']['tags'], ['Bar', 'Foo'])
+        self.assertEqual(snapshots['postchange']['name'], 'Site X')
+        self.assertEqual(snapshots['postchange']['tags'], ['Baz'])
 
     def test_enqueue_webhook_bulk_update(self):
         sites = (
@@ -194,15 +211,16 @@ class WebhookTest(APITestCase):
         # Verify that a job was queued for the object update webhook
         self.assertEqual(self.queue.count, 3)
         for i, job in enumerate(self.queue.jobs):
+            job_data, snapshots = self.get_job_data(job)
             self.assertEqual(job.kwargs['webhook'], Webhook.objects.get(type_update=True))
             self.assertEqual(job.kwargs['event'], ObjectChangeActionChoices.ACTION_UPDATE)
             self.assertEqual(job.kwargs['model_name'], 'site')
-            self.assertEqual(job.kwargs['data']['id'], data[i]['id'])
-            self.assertEqual(len(job.kwargs['data']['tags']), len(response.data[i]['tags']))
-            self.assertEqual(job.kwargs['snapshots']['prechange']['name'], sites[i].name)
-            self.assertEqual(job.kwargs['snapshots']['prechange']['tags'], ['Bar', 'Foo'])
-            self.assertEqual(job.kwargs['snapshots']['postchange']['name'], response.data[i]['name'])
-            self.assertEqual(job.kwargs['snapshots']['postchange']['tags'], ['Baz'])
+            self.assertEqual(job_data['id'], data[i]['id'])
+            self.assertEqual(len(job_data['tags']), len(response.data[i]['tags']))
+            self.assertEqual(snapshots['prechange']['name'], sites[i].name)
+            self.assertEqual(snapshots['prechange']['tags'], ['Bar', 'Foo'])
+            self.assertEqual(snapshots['postchange']['name'], response.data[i]['name'])
+            self.assertEqual(snapshots['postchange']['tags'], ['Baz'])
 
     def test_enqueue_webhook_delete(self):
         site = Site.objects.create(name='Site 1', slug='site-1')
@@ -253,6 +271,25 @@ class WebhookTest(APITestCase):
             self.assertEqual(job.kwargs['snapshots']['prechange']['name'], sites[i].name)
             self.assertEqual(job.kwargs['snapshots']['prechange']['tags'], ['Bar', 'Foo'])
 
+    def test_enqueue_webhook_disabled(self):
+        webhook = Webhook.objects.get(type_delete=True)
+        webhook.enabled = False
+        webhook.save()
+        site = Site.objects.create(name='Site 1', slug='site-1')
+
+        # Objects should not be serialized (or queued) if no enabled Webhook applies to them
+        webhooks_queue = []
+        with patch('extras.webhooks.serialize_for_webhook') as mock_serialize:
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=uuid.uuid4(),
+                action=ObjectChangeActionChoices.ACTION_DELETE
+            )
+        mock_serialize.assert_not_called()
+        self.assertEqual(webhooks_queue, [])
+
     def test_webhook_conditions(self):
         # Create a conditional Webhook
         webhook = Webhook(
@@ -330,3 +367,170 @@ class WebhookTest(APITestCase):
         # Patch the Session object with our dummy_send() method, then process the webhook for sending
         with patch.object(Session, 'send', dummy_send) as mock_send:
             process_webhook(**job.kwargs)
+
+    @override_settings(WEBHOOK_BATCH_SIZE=10)
+    def test_webhooks_worker_batch(self):
+        request_id = uuid.uuid4()
+        sent_requests = []
+
+        def dummy_send(_, request, **kwargs):
+            """
+            A dummy implementation of Session.send() which records each request sent.
+            """
+            sent_requests.append(request)
+            return HttpResponse()
+
+        # Enqueue webhooks for multiple objects
+        webhooks_queue = []
+        for i in range(1, 4):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=request_id,
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_webhooks(webhooks_queue)
+
+        # All events should have been combined into a single job
+        self.assertEqual(self.queue.count, 1)
+        job = self.queue.jobs[0]
+        self.assertEqual(len(job.kwargs['events']), 3)
+
+        # Process the batch, which should be delivered in a single request
+        with patch.object(Session, 'send', dummy_send):
+            process_webhook_batch(**job.kwargs)
+        self.assertEqual(len(sent_requests), 1)
+        body = json.loads(sent_requests[0].body)
+        self.assertEqual([event['data']['name'] for event in body], ['Site 1', 'Site 2', 'Site 3'])
+        self.assertEqual(body[0]['event'], 'created')
+
+    @override_settings(WEBHOOK_BATCH_SIZE=10)
+    def test_webhooks_worker_batch_retry(self):
+        webhook = Webhook.objects.get(type_create=True)
+        webhook.payload_url = 'http://localhost/{{ data.slug }}/'
+        webhook.save()
+        sent_urls = []
+
+        def dummy_send(_, request, **kwargs):
+            """
+            A dummy implementation of Session.send() which fails the first request sent to site-2.
+            """
+            sent_urls.append(request.url)
+            if request.url == 'http://localhost/site-2/' and sent_urls.count(request.url) == 1:
+                return HttpResponse(status=500)
+            return HttpResponse()
+
+        # Enqueue webhooks for objects with different payload URLs
+        webhooks_queue = []
+        for i in range(1, 4):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=uuid.uuid4(),
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_webhooks(webhooks_queue)
+        job = self.queue.jobs[0]
+
+        # The failed request should fail the job, but not prevent delivery to the other URLs
+        rq_job = Mock(meta={})
+        with patch.object(Session, 'send', dummy_send), \
+                patch('extras.webhooks_worker.get_current_job', return_value=rq_job):
+            with self.assertRaises(RequestException):
+                process_webhook_batch(**job.kwargs)
+            self.assertEqual(sent_urls, [f'http://localhost/site-{i}/' for i in range(1, 4)])
+
+            # Retrying the job should send only the failed request
+            process_webhook_batch(**job.kwargs)
+        self.assertEqual(sent_urls[3:], ['http://localhost/site-2/'])
+
+    def test_webhooks_worker_session_reuse(self):
+        sessions = []
+
+        def dummy_send(session, request, **kwargs):
+            """
+            A dummy implementation of Session.send() which records the Session used to send each request.
+            """
+            sessions.append(session)
+            return HttpResponse()
+
+        # Enqueue webhooks for multiple objects, each of which is delivered by a separate job
+        webhooks_queue = []
+        for i in range(1, 4):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=uuid.uuid4(),
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_webhooks(webhooks_queue)
+        self.assertEqual(self.queue.count, 3)
+
+        # Process each job within the same process (as NetBoxWorker does). All requests to the endpoint should be
+        # sent using the same Session.
+        with patch.dict('extras.webhooks_worker._sessions', clear=True), patch.object(Session, 'send', dummy_send):
+            for job in self.queue.jobs:
+                process_webhook(**job.kwargs)
+        self.assertEqual(len(sessions), 3)
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+
+    def test_worker_executes_webhooks_in_process(self):
+        worker = NetBoxWorker([self.queue], connection=self.queue.connection)
+        webhook_job = Mock(func_name='extras.webhooks_worker.process_webhook')
+        other_job = Mock(func_name='extras.reports.run_report')
+
+        with patch.object(worker, 'perform_job') as perform_job, \
+                patch.object(worker, 'fork_work_horse') as fork_work_horse, \
+                patch.object(worker, 'monitor_work_horse'), \
+                patch('utilities.rqworker.connections'):
+            worker.execute_job(webhook_job, self.queue)
+            perform_job.assert_called_once_with(webhook_job, self.queue)
+            fork_work_horse.assert_not_called()
+
+            worker.execute_job(other_job, self.queue)
+            perform_job.assert_called_once()
+            fork_work_horse.assert_called_once_with(other_job, self.queue)
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_webhooks_worker_metrics(self):
+        get_metrics_connection().delete(DELIVERY_LATENCY_KEY, DELIVERY_LATENCY_SUM_KEY, DELIVERY_FAILURES_KEY)
+        responses = [HttpResponse(), HttpResponse(status=500)]
+
+        def dummy_send(_, request, **kwargs):
+            """
+            A dummy implementation of Session.send() which succeeds for the first request only.
+            """
+            return responses.pop(0)
+
+        webhooks_queue = []
+        for i in range(1, 3):
+            site = Site.objects.create(name=f'Site {i}', slug=f'site-{i}')
+            enqueue_object(
+                webhooks_queue,
+                instance=site,
+                user=self.user,
+                request_id=uuid.uuid4(),
+                action=ObjectChangeActionChoices.ACTION_CREATE
+            )
+        flush_webhooks(webhooks_queue)
+        with patch.object(Session, 'send', dummy_send):
+            jobs = self.queue.jobs
+            process_webhook(**jobs[0].kwargs)
+            with self.assertRaises(RequestException):
+                process_webhook(**jobs[1].kwargs)
+
+        # Both deliveries are recorded, along with the failure of the second
+        latency, failures = WebhookDeliveryCollector().collect()
+        samples = {(sample.name, sample.labels.get('le')): sample.value for sample in latency.samples}
+        self.assertEqual(samples[('netbox_webhook_delivery_seconds_count', None)], 2)
+        self.assertEqual(samples[('netbox_webhook_delivery_seconds_bucket', '+Inf')], 2)
+        self.assertEqual(latency.samples[0].labels['endpoint'], 'localhost')
+        self.assertEqual(failures.samples[0].name, 'netbox_webhook_delivery_failures_total')
+        self.assertEqual(failures.samples[0].labels, {'endpoint': 'localhost'})
+        self.assertEqual(failures.samples[0].value, 1)
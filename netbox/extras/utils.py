@@ -1,9 +1,13 @@
+import logging
+
 from django.db.models import Q
 from django.utils.deconstruct import deconstructible
 from taggit.managers import _TaggableManager
 
 from netbox.registry import registry
 
+logger = logging.getLogger('netbox.extras.utils')
+
 
 def is_taggable(obj):
     """
@@ -88,3 +92,22 @@ def is_report(obj):
         return issubclass(obj, Report) and obj != Report
     except TypeError:
         return False
+
+
+def preload_modules():
+    """
+    Load all script and report modules, caching them for subsequent use within the current process (and any processes
+    forked from it, such as RQ work horses).
+    """
+    from .models import ReportModule, ScriptModule
+
+    count = 0
+    for model in (ScriptModule, ReportModule):
+        for module in model.objects.all():
+            try:
+                module.get_module()
+                count += 1
+            except Exception as e:
+                logger.warning(f"Failed to load module {module.python_name}: {e}")
+
+    return count
@@ -9,9 +9,10 @@ from django.utils.translation import gettext as _
 from django.views.generic import View
 
 from core.choices import JobStatusChoices, ManagedFileRootPathChoices
+from core.filtersets import JobLogEntryFilterSet
 from core.forms import ManagedFileForm
 from core.models import Job
-from core.tables import JobTable
+from core.tables import JobLogEntryTable, JobTable
 from extras.dashboard.forms import DashboardWidgetAddForm, DashboardWidgetForm
 from extras.dashboard.utils import get_widget_class
 from netbox.views import generic
@@ -22,6 +23,7 @@ from utilities.templatetags.builtins.filters import render_markdown
 from utilities.utils import copy_safe_request, count_related, get_viewname, normalize_querydict, shallow_compare_dict
 from utilities.views import ContentTypePermissionRequiredMixin, register_model_view
 from . import filtersets, forms, tables
+from .choices import LogLevelChoices
 from .forms.reports import ReportForm
 from .models import *
 from .reports import run_report
@@ -976,6 +978,23 @@ class ReportJobsView(ContentTypePermissionRequiredMixin, View):
         })
 
 
+def get_job_log_table(request, job, exclude=()):
+    """
+    Return a paginated table of the log entries recorded by a Job, filtered by the level and/or section specified in
+    the request (if any).
+    """
+    log_entries = JobLogEntryFilterSet(request.GET, job.log_entries.all()).qs
+    table = JobLogEntryTable(
+        data=log_entries,
+        exclude=exclude,
+        orderable=False,
+        user=request.user
+    )
+    table.configure(request)
+
+    return table
+
+
 class ReportResultView(ContentTypePermissionRequiredMixin, View):
     """
     Display a Job pertaining to the execution of a Report.
@@ -989,21 +1008,21 @@ class ReportResultView(ContentTypePermissionRequiredMixin, View):
 
         module = job.object
         report = module.reports[job.name]
+        context = {
+            'report': report,
+            'job': job,
+            'table': get_job_log_table(request, job),
+            'log_levels': LogLevelChoices,
+        }
 
         # If this is an HTMX request, return only the result HTML
         if is_htmx(request):
-            response = render(request, 'extras/htmx/report_result.html', {
-                'report': report,
-                'job': job,
-            })
+            response = render(request, 'extras/htmx/report_result.html', context)
             if job.completed or not job.started:
                 response.status_code = 286
             return response
 
-        return render(request, 'extras/report_result.html', {
-            'report': report,
-            'job': job,
-        })
+        return render(request, 'extras/report_result.html', context)
 
 
 #
@@ -1159,21 +1178,21 @@ class ScriptResultView(ContentTypePermissionRequiredMixin, View):
 
         module = job.object
         script = module.scripts[job.name]()
+        context = {
+            'script': script,
+            'job': job,
+            'table': get_job_log_table(request, job, exclude=('section', 'object')),
+            'log_levels': LogLevelChoices,
+        }
 
         # If this is an HTMX request, return only the result HTML
         if is_htmx(request):
-            response = render(request, 'extras/htmx/script_result.html', {
-                'script': script,
-                'job': job,
-            })
+            response = render(request, 'extras/htmx/script_result.html', context)
             if job.completed or not job.started:
                 response.status_code = 286
             return response
 
-        return render(request, 'extras/script_result.html', {
-            'script': script,
-            'job': job,
-        })
+        return render(request, 'extras/script_result.html', context)
 
 
 #
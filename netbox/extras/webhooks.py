@@ -1,9 +1,12 @@
 import hashlib
 import hmac
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.utils import timezone
 from django_rq import get_queue
+from rq import Retry
 
 from netbox.config import get_config
 from netbox.constants import RQ_QUEUE_DEFAULT
@@ -13,6 +16,8 @@ from utilities.utils import serialize_object
 from .choices import *
 from .models import Webhook
 
+WEBHOOKS_MAP_CACHE_KEY = 'webhooks_map'
+
 
 def serialize_for_webhook(instance):
     """
@@ -54,10 +59,74 @@ def generate_signature(request_body, secret):
     return hmac_prep.hexdigest()
 
 
+def get_webhook_retry():
+    """
+    Return the retry policy for webhook jobs: up to WEBHOOK_RETRY_MAX retries, with the interval between attempts
+    doubling each time. Returns None if retries are disabled.
+    """
+    if not settings.WEBHOOK_RETRY_MAX:
+        return None
+    return Retry(
+        max=settings.WEBHOOK_RETRY_MAX,
+        interval=[settings.WEBHOOK_RETRY_INTERVAL * 2 ** i for i in range(settings.WEBHOOK_RETRY_MAX)]
+    )
+
+
+def get_webhooks_map():
+    """
+    Return a mapping of (content type ID, event) to the IDs of all enabled Webhooks assigned to that content type and
+    event. The map is cached until invalidate_webhooks_map() is called.
+    """
+    webhooks_map = cache.get(WEBHOOKS_MAP_CACHE_KEY)
+    if webhooks_map is None:
+        webhooks_map = {}
+        events = (
+            (ObjectChangeActionChoices.ACTION_CREATE, 'type_create'),
+            (ObjectChangeActionChoices.ACTION_UPDATE, 'type_update'),
+            (ObjectChangeActionChoices.ACTION_DELETE, 'type_delete'),
+        )
+        webhooks = Webhook.objects.filter(enabled=True).values_list(
+            'pk', 'content_types', 'type_create', 'type_update', 'type_delete', named=True
+        )
+        for webhook in webhooks:
+            for event, action_flag in events:
+                if getattr(webhook, action_flag) and webhook.content_types:
+                    webhooks_map.setdefault((webhook.content_types, event), []).append(webhook.pk)
+        cache.set(WEBHOOKS_MAP_CACHE_KEY, webhooks_map, None)
+
+    return webhooks_map
+
+
+def invalidate_webhooks_map():
+    """
+    Discard the cached map of enabled Webhooks (e.g. because a Webhook has been modified).
+    """
+    cache.delete(WEBHOOKS_MAP_CACHE_KEY)
+
+
+def get_webhook_data(content_type_id, object_id, event, snapshots=None):
+    """
+    Serialize an object for which serialization was deferred when its webhooks were enqueued. Returns the serialized
+    data and the completed snapshots, or None if the object no longer exists.
+    """
+    content_type = ContentType.objects.get_for_id(content_type_id)
+    try:
+        instance = content_type.get_object_for_this_type(pk=object_id)
+    except content_type.model_class().DoesNotExist:
+        return None
+
+    prechange = snapshots.get('prechange') if snapshots else None
+    snapshots = get_snapshots(instance, event)
+    snapshots['prechange'] = prechange
+
+    return serialize_for_webhook(instance), snapshots
+
+
 def enqueue_object(queue, instance, user, request_id, action):
     """
-    Enqueue a serialized representation of a created/updated/deleted object for the processing of
-    webhooks once the request has completed.
+    Enqueue a created/updated/deleted object for the processing of webhooks once the request has completed.
+    Serialization of created and updated objects is deferred to the webhooks worker. Deleted objects are serialized
+    immediately, but only if an enabled Webhook exists for them.
     """
     # Determine whether this type of object supports webhooks
     app_label = instance._meta.app_label
@@ -65,12 +134,23 @@ def enqueue_object(queue, instance, user, request_id, action):
     if model_name not in registry['model_features']['webhooks'].get(app_label, []):
         return
 
+    content_type = ContentType.objects.get_for_model(instance)
+    data = None
+    snapshots = {
+        'prechange': getattr(instance, '_prechange_snapshot', None),
+        'postchange': None,
+    }
+    if action == ObjectChangeActionChoices.ACTION_DELETE:
+        if (content_type.pk, action) not in get_webhooks_map():
+            return
+        data = serialize_for_webhook(instance)
+
     queue.append({
-        'content_type': ContentType.objects.get_for_model(instance),
+        'content_type': content_type,
         'object_id': instance.pk,
         'event': action,
-        'data': serialize_for_webhook(instance),
-        'snapshots': get_snapshots(instance, action),
+        'data': data,
+        'snapshots': snapshots,
         'username': user.username,
         'request_id': request_id
     })
@@ -80,41 +160,63 @@ def flush_webhooks(queue):
     """
     Flush a list of object representation to RQ for webhook processing.
     """
+    if not queue:
+        return
+
+    # Resolve the enabled Webhooks for each queued object
+    webhooks_map = get_webhooks_map()
+    queue = [
+        (data, webhooks_map[(data['content_type'].pk, data['event'])]) for data in queue
+        if (data['content_type'].pk, data['event']) in webhooks_map
+    ]
+    if not queue:
+        return
+    webhooks = Webhook.objects.filter(
+        pk__in={pk for _, webhook_ids in queue for pk in webhook_ids},
+        enabled=True
+    ).in_bulk()
+
     rq_queue_name = get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT)
     rq_queue = get_queue(rq_queue_name)
-    webhooks_cache = {
-        'type_create': {},
-        'type_update': {},
-        'type_delete': {},
-    }
-
-    for data in queue:
+    retry = get_webhook_retry()
 
-        action_flag = {
-            ObjectChangeActionChoices.ACTION_CREATE: 'type_create',
-            ObjectChangeActionChoices.ACTION_UPDATE: 'type_update',
-            ObjectChangeActionChoices.ACTION_DELETE: 'type_delete',
-        }[data['event']]
+    # Compile the events for each Webhook
+    events = {}
+    for data, webhook_ids in queue:
         content_type = data['content_type']
-
-        # Cache applicable Webhooks
-        if content_type not in webhooks_cache[action_flag]:
-            webhooks_cache[action_flag][content_type] = Webhook.objects.filter(
-                **{action_flag: True},
-                content_types=content_type,
-                enabled=True
-            )
-        webhooks = webhooks_cache[action_flag][content_type]
-
-        for webhook in webhooks:
-            rq_queue.enqueue(
-                "extras.webhooks_worker.process_webhook",
-                webhook=webhook,
-                model_name=content_type.model,
-                event=data['event'],
-                data=data['data'],
-                snapshots=data['snapshots'],
-                timestamp=str(timezone.now()),
-                username=data['username'],
-                request_id=data['request_id']
-            )
+        event = {
+            'model_name': content_type.model,
+            'event': data['event'],
+            'data': data['data'],
+            'snapshots': data['snapshots'],
+            'timestamp': str(timezone.now()),
+            'username': data['username'],
+            'request_id': data['request_id'],
+            'content_type_id': content_type.pk,
+            'object_id': data['object_id'],
+        }
+        for webhook_id in webhook_ids:
+            if webhook_id in webhooks:
+                events.setdefault(webhook_id, []).append(event)
+
+    for webhook_id, webhook_events in events.items():
+        webhook = webhooks[webhook_id]
+
+        # Deliver multiple events in a single request, if batching is enabled. Webhooks with a custom body template
+        # always receive events individually.
+        if settings.WEBHOOK_BATCH_SIZE > 1 and not webhook.body_template:
+            for i in range(0, len(webhook_events), settings.WEBHOOK_BATCH_SIZE):
+                rq_queue.enqueue(
+                    "extras.webhooks_worker.process_webhook_batch",
+                    webhook=webhook,
+                    events=webhook_events[i:i + settings.WEBHOOK_BATCH_SIZE],
+                    retry=retry
+                )
+        else:
+            for event in webhook_events:
+                rq_queue.enqueue(
+                    "extras.webhooks_worker.process_webhook",
+                    webhook=webhook,
+                    retry=retry,
+                    **event
+                )
@@ -1,16 +1,198 @@
+import bisect
+import itertools
+import json
 import logging
+import time
+import urllib.parse
 
+import django_rq
 import requests
 from django.conf import settings
 from django_rq import job
 from jinja2.exceptions import TemplateError
+from prometheus_client import Histogram
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily
+from prometheus_client.utils import floatToGoString
+from redis.exceptions import RedisError
+from rest_framework.utils.encoders import JSONEncoder
+from rq import get_current_job
 
+from netbox.config import get_config
+from netbox.constants import RQ_QUEUE_DEFAULT
+from utilities.jinja2 import get_template, get_template_cache_key
 from .conditions import ConditionSet
 from .constants import WEBHOOK_EVENT_TYPES
-from .webhooks import generate_signature
+from .webhooks import generate_signature, get_webhook_data
 
 logger = logging.getLogger('netbox.webhooks_worker')
 
+# Persistent HTTP sessions (and their connection pools) for each endpoint, retained for the life of the worker process.
+# (Webhook jobs are executed within the worker process itself by NetBoxWorker; see utilities.rqworker.)
+_sessions = {}
+
+# Compiled webhooks, keyed by webhook ID and revision
+_compiled_webhooks = {}
+
+# The upper bounds of the delivery latency histogram's buckets
+DELIVERY_LATENCY_BUCKETS = Histogram.DEFAULT_BUCKETS
+
+# The Redis hashes in which delivery metrics are recorded (see record_delivery())
+DELIVERY_LATENCY_KEY = 'netbox:webhook_delivery_seconds'
+DELIVERY_LATENCY_SUM_KEY = 'netbox:webhook_delivery_seconds_sum'
+DELIVERY_FAILURES_KEY = 'netbox:webhook_delivery_failures'
+
+
+class CompiledWebhook:
+    """
+    The parsed conditions and compiled templates of a Webhook. These are cached for each revision of a Webhook (as
+    indicated by its last_updated time) so that they need not be processed for each event.
+    """
+    def __init__(self, webhook):
+        self.conditions = ConditionSet(webhook.conditions) if webhook.conditions else None
+        self.headers_template = self._get_template(webhook, 'additional_headers')
+        self.body_template = self._get_template(webhook, 'body_template')
+        self.payload_url_template = get_template(
+            webhook.payload_url, cache_key=get_template_cache_key(webhook, 'payload_url')
+        )
+
+    @staticmethod
+    def _get_template(webhook, field_name):
+        if template_code := getattr(webhook, field_name):
+            return get_template(template_code, cache_key=get_template_cache_key(webhook, field_name))
+        return None
+
+    def render_headers(self, context):
+        """
+        Render additional_headers and return a dict of Header: Value pairs.
+        """
+        if self.headers_template is None:
+            return {}
+        ret = {}
+        data = self.headers_template.render(**context)
+        for line in data.splitlines():
+            header, value = line.split(':', 1)
+            ret[header.strip()] = value.strip()
+        return ret
+
+    def render_body(self, context):
+        """
+        Render the body template, if defined. Otherwise, dump the context as a JSON object.
+        """
+        if self.body_template is not None:
+            return self.body_template.render(**context)
+        return json.dumps(context, cls=JSONEncoder)
+
+    def render_payload_url(self, context):
+        """
+        Render the payload URL.
+        """
+        return self.payload_url_template.render(**context)
+
+
+def get_compiled_webhook(webhook):
+    """
+    Return the CompiledWebhook for the given revision of a Webhook.
+    """
+    if webhook.pk is None:
+        return CompiledWebhook(webhook)
+    key = (webhook.pk, webhook.last_updated)
+    if key not in _compiled_webhooks:
+        # Discard any previous revisions of the webhook
+        for k in [k for k in _compiled_webhooks if k[0] == webhook.pk]:
+            del _compiled_webhooks[k]
+        _compiled_webhooks[key] = CompiledWebhook(webhook)
+    return _compiled_webhooks[key]
+
+
+def get_session(webhook, url):
+    """
+    Return a persistent Session for the endpoint (scheme and host) of the given URL, with the webhook's SSL
+    verification settings applied.
+    """
+    verify = webhook.ca_file_path or webhook.ssl_verification
+    parsed_url = urllib.parse.urlsplit(url)
+    key = (parsed_url.scheme, parsed_url.netloc, verify)
+    if key not in _sessions:
+        session = requests.Session()
+        session.verify = verify
+        _sessions[key] = session
+    return _sessions[key]
+
+
+def get_metrics_connection():
+    """
+    Return the Redis connection in which webhook delivery metrics are recorded.
+    """
+    return django_rq.get_connection(get_config().QUEUE_MAPPINGS.get('webhook', RQ_QUEUE_DEFAULT))
+
+
+def record_delivery(url, duration, failed):
+    """
+    Record the latency of a request to the given URL, and whether it failed. The metrics are recorded in Redis, as RQ
+    workers do not expose metrics themselves, and are exported by WebhookDeliveryCollector.
+    """
+    if not settings.METRICS_ENABLED:
+        return
+
+    endpoint = urllib.parse.urlsplit(url).netloc
+    bucket = bisect.bisect_left(DELIVERY_LATENCY_BUCKETS, duration)
+    try:
+        with get_metrics_connection().pipeline() as pipeline:
+            pipeline.hincrby(DELIVERY_LATENCY_KEY, f'{bucket} {endpoint}', 1)
+            pipeline.hincrbyfloat(DELIVERY_LATENCY_SUM_KEY, endpoint, duration)
+            if failed:
+                pipeline.hincrby(DELIVERY_FAILURES_KEY, endpoint, 1)
+            pipeline.execute()
+    except RedisError as e:
+        logger.warning(f"Unable to record webhook delivery metrics: {e}")
+
+
+class WebhookDeliveryCollector:
+    """
+    A Prometheus collector which exports the per-endpoint webhook delivery metrics recorded by RQ workers.
+    """
+    def describe(self):
+        # Avoid querying Redis when the collector is registered
+        return []
+
+    def collect(self):
+        latency = HistogramMetricFamily(
+            'netbox_webhook_delivery_seconds',
+            'Time taken to deliver webhook requests',
+            labels=['endpoint']
+        )
+        failures = CounterMetricFamily(
+            'netbox_webhook_delivery_failures',
+            'Webhook requests which failed to be delivered',
+            labels=['endpoint']
+        )
+
+        try:
+            connection = get_metrics_connection()
+            bucket_counts = connection.hgetall(DELIVERY_LATENCY_KEY)
+            sums = connection.hgetall(DELIVERY_LATENCY_SUM_KEY)
+            failure_counts = connection.hgetall(DELIVERY_FAILURES_KEY)
+        except RedisError as e:
+            logger.warning(f"Unable to retrieve webhook delivery metrics: {e}")
+            return
+
+        counts = {}
+        for field, count in bucket_counts.items():
+            bucket, endpoint = field.decode().split(' ', 1)
+            counts.setdefault(endpoint, [0] * len(DELIVERY_LATENCY_BUCKETS))[int(bucket)] = int(count)
+        for endpoint, endpoint_counts in sorted(counts.items()):
+            buckets = zip(DELIVERY_LATENCY_BUCKETS, itertools.accumulate(endpoint_counts))
+            latency.add_metric(
+                [endpoint],
+                buckets=[(floatToGoString(bound), count) for bound, count in buckets],
+                sum_value=float(sums.get(endpoint.encode(), 0))
+            )
+        for endpoint, count in sorted(failure_counts.items()):
+            failures.add_metric([endpoint.decode()], int(count))
+
+        yield latency
+        yield failures
+
 
 def eval_conditions(webhook, data):
     """
@@ -21,22 +203,28 @@ def eval_conditions(webhook, data):
         return True
 
     logger.debug(f'Evaluating webhook conditions: {webhook.conditions}')
-    if ConditionSet(webhook.conditions).eval(data):
+    if get_compiled_webhook(webhook).conditions.eval(data):
         return True
 
     return False
 
 
-@job('default')
-def process_webhook(webhook, model_name, event, data, timestamp, username, request_id=None, snapshots=None):
+def get_context(webhook, model_name, event, data, timestamp, username, request_id=None, snapshots=None,
+                content_type_id=None, object_id=None):
     """
-    Make a POST request to the defined Webhook
+    Return the context data for a webhook event, or None if the event should not be delivered.
     """
+    # Serialize the object if this was deferred when the webhook was enqueued
+    if data is None and object_id is not None:
+        if (webhook_data := get_webhook_data(content_type_id, object_id, event, snapshots)) is None:
+            logger.info(f"Skipping webhook {webhook}: {model_name} {object_id} no longer exists")
+            return None
+        data, snapshots = webhook_data
+
     # Evaluate webhook conditions (if any)
     if not eval_conditions(webhook, data):
-        return
+        return None
 
-    # Prepare context data for headers & body templates
     context = {
         'event': WEBHOOK_EVENT_TYPES[event],
         'timestamp': timestamp,
@@ -50,33 +238,23 @@ def process_webhook(webhook, model_name, event, data, timestamp, username, reque
             'snapshots': snapshots
         })
 
-    # Build the headers for the HTTP request
-    headers = {
-        'Content-Type': webhook.http_content_type,
-    }
-    try:
-        headers.update(webhook.render_headers(context))
-    except (TemplateError, ValueError) as e:
-        logger.error(f"Error parsing HTTP headers for webhook {webhook}: {e}")
-        raise e
+    return context
 
-    # Render the request body
-    try:
-        body = webhook.render_body(context)
-    except TemplateError as e:
-        logger.error(f"Error rendering request body for webhook {webhook}: {e}")
-        raise e
 
+def send_request(webhook, url, headers, body):
+    """
+    Send a request to the webhook's endpoint, recording its latency and any failure.
+    """
     # Prepare the HTTP request
     params = {
         'method': webhook.http_method,
-        'url': webhook.render_payload_url(context),
-        'headers': headers,
+        'url': url,
+        'headers': {
+            'Content-Type': webhook.http_content_type,
+            **headers,
+        },
         'data': body.encode('utf8'),
     }
-    logger.info(
-        f"Sending {params['method']} request to {params['url']} ({context['model']} {context['event']})"
-    )
     logger.debug(params)
     try:
         prepared_request = requests.Request(**params).prepare()
@@ -89,11 +267,17 @@ def process_webhook(webhook, model_name, event, data, timestamp, username, reque
         prepared_request.headers['X-Hook-Signature'] = generate_signature(prepared_request.body, webhook.secret)
 
     # Send the request
-    with requests.Session() as session:
-        session.verify = webhook.ssl_verification
-        if webhook.ca_file_path:
-            session.verify = webhook.ca_file_path
+    session = get_session(webhook, url)
+    start = time.monotonic()
+    failed = True
+    try:
         response = session.send(prepared_request, proxies=settings.HTTP_PROXIES)
+        failed = not 200 <= response.status_code <= 299
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Request failed: {e}")
+        raise e
+    finally:
+        record_delivery(url, time.monotonic() - start, failed)
 
     if 200 <= response.status_code <= 299:
         logger.info(f"Request succeeded; response status {response.status_code}")
@@ -103,3 +287,91 @@ def process_webhook(webhook, model_name, event, data, timestamp, username, reque
         raise requests.exceptions.RequestException(
             f"Status {response.status_code} returned with content '{response.content}', webhook FAILED to process."
         )
+
+
+def render_request(webhook, context, body_context=None):
+    """
+    Render the URL, headers, and body of a request for the given context. If body_context is specified, it is used to
+    render the request body in place of the context.
+    """
+    compiled_webhook = get_compiled_webhook(webhook)
+
+    try:
+        headers = compiled_webhook.render_headers(context)
+    except (TemplateError, ValueError) as e:
+        logger.error(f"Error parsing HTTP headers for webhook {webhook}: {e}")
+        raise e
+
+    try:
+        body = compiled_webhook.render_body(body_context if body_context is not None else context)
+    except TemplateError as e:
+        logger.error(f"Error rendering request body for webhook {webhook}: {e}")
+        raise e
+
+    return compiled_webhook.render_payload_url(context), headers, body
+
+
+@job('default')
+def process_webhook(webhook, model_name, event, data, timestamp, username, request_id=None, snapshots=None,
+                    content_type_id=None, object_id=None):
+    """
+    Make a POST request to the defined Webhook
+    """
+    context = get_context(
+        webhook, model_name, event, data, timestamp, username, request_id, snapshots, content_type_id, object_id
+    )
+    if context is None:
+        return
+
+    url, headers, body = render_request(webhook, context)
+    logger.info(f"Sending {webhook.http_method} request to {url} ({context['model']} {context['event']})")
+
+    return send_request(webhook, url, headers, body)
+
+
+@job('default')
+def process_webhook_batch(webhook, events):
+    """
+    Deliver multiple events to the defined Webhook. Events destined for the same URL are delivered in a single
+    request, the body of which is a list of the events' context data.
+
+    The URLs to which events have been delivered are recorded on the job, so that only the failed requests are sent
+    again if the job is retried.
+    """
+    # Group the events by payload URL
+    batches = {}
+    for event in events:
+        context = get_context(webhook, **event)
+        if context is None:
+            continue
+        url = get_compiled_webhook(webhook).render_payload_url(context)
+        batches.setdefault(url, []).append(context)
+
+    rq_job = get_current_job()
+    delivered_urls = rq_job.meta.setdefault('delivered_urls', []) if rq_job else []
+
+    results = []
+    errors = []
+    for url, contexts in batches.items():
+        if url in delivered_urls:
+            logger.info(f"Skipping {url}: events have already been delivered")
+            continue
+
+        # Headers are rendered using the context of the first event in the batch
+        _, headers, body = render_request(webhook, contexts[0], body_context=contexts)
+        logger.info(f"Sending {webhook.http_method} request to {url} ({len(contexts)} events)")
+        try:
+            results.append(send_request(webhook, url, headers, body))
+        except requests.exceptions.RequestException as e:
+            errors.append(e)
+            continue
+
+        delivered_urls.append(url)
+        if rq_job:
+            rq_job.save_meta()
+
+    # Fail the job (so that it may be retried) if any request failed
+    if errors:
+        raise errors[0]
+
+    return results
@@ -1,5 +1,9 @@
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
 from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django_pglocks import advisory_lock
 from drf_spectacular.utils import extend_schema
@@ -11,6 +15,7 @@ from rest_framework.views import APIView
 from circuits.models import Provider
 from dcim.models import Site
 from ipam import filtersets
+from ipam.choices import PrefixStatusChoices
 from ipam.models import *
 from netbox.api.viewsets import NetBoxModelViewSet
 from netbox.api.viewsets.mixins import ObjectValidationMixin
@@ -192,6 +197,43 @@ class L2VPNTerminationViewSet(NetBoxModelViewSet):
 # Views
 #
 
+@contextmanager
+def parent_advisory_lock(lock_name, parent, ancestors=(), order_by=None):
+    """
+    Hold an exclusive advisory lock specific to the given parent object while objects are allocated within it. This
+    serializes allocations within the same parent while allowing those within different parents to proceed in parallel.
+
+    A shared lock is also held on each of the parent's ancestors (e.g. containing Prefixes, from which the same
+    resources can be allocated), so that allocations within a parent are serialized with allocations within any of its
+    ancestors. To avoid deadlocks, all locks (including that of the parent) are acquired in a single global order, by
+    the given key function and then by ID: Objects may be ancestors of one another (e.g. duplicate Prefixes).
+    """
+    lock_key = ADVISORY_LOCK_KEYS[lock_name]
+    locks = sorted(
+        [(ancestor, True) for ancestor in ancestors] + [(parent, False)],
+        key=lambda lock: (order_by(lock[0]) if order_by else (), lock[0].pk)
+    )
+    with ExitStack() as stack:
+        for obj, shared in locks:
+            stack.enter_context(advisory_lock((lock_key, obj.pk & 0x7FFFFFFF), shared=shared))
+        yield
+
+
+def get_prefix_length(prefix):
+    return prefix.prefix.prefixlen
+
+
+def get_prefix_ancestors(prefix):
+    """
+    Return all Prefixes from which the space within the given Prefix may also be allocated: those containing (or equal
+    to) it within the same VRF, and containers in the global table.
+    """
+    return Prefix.objects.filter(
+        Q(vrf=prefix.vrf) | Q(vrf__isnull=True, status=PrefixStatusChoices.STATUS_CONTAINER),
+        prefix__net_contains_or_equals=str(prefix.prefix)
+    ).exclude(pk=prefix.pk)
+
+
 def get_results_limit(request):
     """
     Return the lesser of the specified limit (if any) and the configured MAX_PAGE_SIZE.
@@ -225,51 +267,51 @@ class AvailableASNsView(ObjectValidationMixin, APIView):
         return Response(serializer.data)
 
     @extend_schema(methods=["post"], responses={201: serializers.ASNSerializer(many=True)})
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-asns'])
     def post(self, request, pk):
         self.queryset = self.queryset.restrict(request.user, 'add')
         asnrange = get_object_or_404(ASNRange.objects.restrict(request.user), pk=pk)
 
-        # Normalize to a list of objects
-        requested_asns = request.data if isinstance(request.data, list) else [request.data]
-
-        # Determine if the requested number of IPs is available
-        available_asns = asnrange.get_available_asns()
-        if len(available_asns) < len(requested_asns):
-            return Response(
-                {
-                    "detail": f"An insufficient number of ASNs are available within {asnrange} "
-                              f"({len(requested_asns)} requested, {len(available_asns)} available)"
-                },
-                status=status.HTTP_409_CONFLICT
-            )
+        with parent_advisory_lock('asnrange-available-asns', asnrange):
+            # Normalize to a list of objects
+            requested_asns = request.data if isinstance(request.data, list) else [request.data]
+
+            # Determine if the requested number of IPs is available
+            available_asns = asnrange.get_available_asns()
+            if len(available_asns) < len(requested_asns):
+                return Response(
+                    {
+                        "detail": f"An insufficient number of ASNs are available within {asnrange} "
+                                  f"({len(requested_asns)} requested, {len(available_asns)} available)"
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            # Assign ASNs from the list of available IPs and copy VRF assignment from the parent
+            for i, requested_asn in enumerate(requested_asns):
+                requested_asn.update({
+                    'rir': asnrange.rir.pk,
+                    'range': asnrange.pk,
+                    'asn': available_asns[i],
+                })
+
+            # Initialize the serializer with a list or a single object depending on what was requested
+            context = {'request': request}
+            if isinstance(request.data, list):
+                serializer = serializers.ASNSerializer(data=requested_asns, many=True, context=context)
+            else:
+                serializer = serializers.ASNSerializer(data=requested_asns[0], context=context)
 
-        # Assign ASNs from the list of available IPs and copy VRF assignment from the parent
-        for i, requested_asn in enumerate(requested_asns):
-            requested_asn.update({
-                'rir': asnrange.rir.pk,
-                'range': asnrange.pk,
-                'asn': available_asns[i],
-            })
-
-        # Initialize the serializer with a list or a single object depending on what was requested
-        context = {'request': request}
-        if isinstance(request.data, list):
-            serializer = serializers.ASNSerializer(data=requested_asns, many=True, context=context)
-        else:
-            serializer = serializers.ASNSerializer(data=requested_asns[0], context=context)
-
-        # Create the new IP address(es)
-        if serializer.is_valid():
-            try:
-                with transaction.atomic():
-                    created = serializer.save()
-                    self._validate_objects(created)
-            except ObjectDoesNotExist:
-                raise PermissionDenied()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            # Create the new IP address(es)
+            if serializer.is_valid():
+                try:
+                    with transaction.atomic():
+                        created = serializer.save()
+                        self._validate_objects(created)
+                except ObjectDoesNotExist:
+                    raise PermissionDenied()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -294,67 +336,69 @@ class AvailablePrefixesView(ObjectValidationMixin, APIView):
         return Response(serializer.data)
 
     @extend_schema(methods=["post"], responses={201: serializers.PrefixSerializer(many=True)})
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-prefixes'])
     def post(self, request, pk):
         self.queryset = self.queryset.restrict(request.user, 'add')
         prefix = get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
-        available_prefixes = prefix.get_available_prefixes()
 
-        # Validate Requested Prefixes' length
-        serializer = serializers.PrefixLengthSerializer(
-            data=request.data if isinstance(request.data, list) else [request.data],
-            many=True,
-            context={
-                'request': request,
-                'prefix': prefix,
-            }
-        )
-        if not serializer.is_valid():
-            return Response(
-                serializer.errors,
-                status=status.HTTP_400_BAD_REQUEST
+        ancestors = get_prefix_ancestors(prefix)
+        with parent_advisory_lock('prefix-available-prefixes', prefix, ancestors, order_by=get_prefix_length):
+            available_prefixes = prefix.get_available_prefixes()
+
+            # Validate Requested Prefixes' length
+            serializer = serializers.PrefixLengthSerializer(
+                data=request.data if isinstance(request.data, list) else [request.data],
+                many=True,
+                context={
+                    'request': request,
+                    'prefix': prefix,
+                }
             )
-
-        requested_prefixes = serializer.validated_data
-        # Allocate prefixes to the requested objects based on availability within the parent
-        for i, requested_prefix in enumerate(requested_prefixes):
-
-            # Find the first available prefix equal to or larger than the requested size
-            for available_prefix in available_prefixes.iter_cidrs():
-                if requested_prefix['prefix_length'] >= available_prefix.prefixlen:
-                    allocated_prefix = '{}/{}'.format(available_prefix.network, requested_prefix['prefix_length'])
-                    requested_prefix['prefix'] = allocated_prefix
-                    requested_prefix['vrf'] = prefix.vrf.pk if prefix.vrf else None
-                    break
-            else:
+            if not serializer.is_valid():
                 return Response(
-                    {
-                        "detail": "Insufficient space is available to accommodate the requested prefix size(s)"
-                    },
-                    status=status.HTTP_409_CONFLICT
+                    serializer.errors,
+                    status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Remove the allocated prefix from the list of available prefixes
-            available_prefixes.remove(allocated_prefix)
-
-        # Initialize the serializer with a list or a single object depending on what was requested
-        context = {'request': request}
-        if isinstance(request.data, list):
-            serializer = serializers.PrefixSerializer(data=requested_prefixes, many=True, context=context)
-        else:
-            serializer = serializers.PrefixSerializer(data=requested_prefixes[0], context=context)
+            requested_prefixes = serializer.validated_data
+            # Allocate prefixes to the requested objects based on availability within the parent
+            for i, requested_prefix in enumerate(requested_prefixes):
+
+                # Find the first available prefix equal to or larger than the requested size
+                for available_prefix in available_prefixes.iter_cidrs():
+                    if requested_prefix['prefix_length'] >= available_prefix.prefixlen:
+                        allocated_prefix = '{}/{}'.format(available_prefix.network, requested_prefix['prefix_length'])
+                        requested_prefix['prefix'] = allocated_prefix
+                        requested_prefix['vrf'] = prefix.vrf.pk if prefix.vrf else None
+                        break
+                else:
+                    return Response(
+                        {
+                            "detail": "Insufficient space is available to accommodate the requested prefix size(s)"
+                        },
+                        status=status.HTTP_409_CONFLICT
+                    )
+
+                # Remove the allocated prefix from the list of available prefixes
+                available_prefixes.remove(allocated_prefix)
+
+            # Initialize the serializer with a list or a single object depending on what was requested
+            context = {'request': request}
+            if isinstance(request.data, list):
+                serializer = serializers.PrefixSerializer(data=requested_prefixes, many=True, context=context)
+            else:
+                serializer = serializers.PrefixSerializer(data=requested_prefixes[0], context=context)
 
-        # Create the new Prefix(es)
-        if serializer.is_valid():
-            try:
-                with transaction.atomic():
-                    created = serializer.save()
-                    self._validate_objects(created)
-            except ObjectDoesNotExist:
-                raise PermissionDenied()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            # Create the new Prefix(es)
+            if serializer.is_valid():
+                try:
+                    with transaction.atomic():
+                        created = serializer.save()
+                        self._validate_objects(created)
+                except ObjectDoesNotExist:
+                    raise PermissionDenied()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -366,9 +410,18 @@ class AvailablePrefixesView(ObjectValidationMixin, APIView):
 class AvailableIPAddressesView(ObjectValidationMixin, APIView):
     queryset = IPAddress.objects.all()
 
+    lock_name = None
+    lock_order = None
+
     def get_parent(self, request, pk):
         raise NotImplemented()
 
+    def get_parent_ancestors(self, parent):
+        """
+        Return any objects containing the parent, within which the same IP addresses may be allocated.
+        """
+        return []
+
     @extend_schema(methods=["get"], responses={200: serializers.AvailableIPSerializer(many=True)})
     def get(self, request, pk):
         parent = self.get_parent(request, pk)
@@ -376,7 +429,7 @@ class AvailableIPAddressesView(ObjectValidationMixin, APIView):
 
         # Calculate available IPs within the parent
         ip_list = []
-        for index, ip in enumerate(parent.get_available_ips(), start=1):
+        for index, ip in enumerate(parent.iter_available_ips(), start=1):
             ip_list.append(ip)
             if index == limit:
                 break
@@ -389,49 +442,51 @@ class AvailableIPAddressesView(ObjectValidationMixin, APIView):
         return Response(serializer.data)
 
     @extend_schema(methods=["post"], responses={201: serializers.IPAddressSerializer(many=True)})
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-ips'])
     def post(self, request, pk):
         self.queryset = self.queryset.restrict(request.user, 'add')
         parent = self.get_parent(request, pk)
 
-        # Normalize to a list of objects
-        requested_ips = request.data if isinstance(request.data, list) else [request.data]
-
-        # Determine if the requested number of IPs is available
-        available_ips = parent.get_available_ips()
-        if available_ips.size < len(requested_ips):
-            return Response(
-                {
-                    "detail": f"An insufficient number of IP addresses are available within {parent} "
-                              f"({len(requested_ips)} requested, {len(available_ips)} available)"
-                },
-                status=status.HTTP_409_CONFLICT
-            )
+        # Hold a shared lock on all IP allocations, to prevent conflicts with the creation of individual IPs
+        with advisory_lock(ADVISORY_LOCK_KEYS['available-ips'], shared=True), \
+                parent_advisory_lock(self.lock_name, parent, self.get_parent_ancestors(parent), self.lock_order):
+            # Normalize to a list of objects
+            requested_ips = request.data if isinstance(request.data, list) else [request.data]
 
-        # Assign addresses from the list of available IPs and copy VRF assignment from the parent
-        available_ips = iter(available_ips)
-        for requested_ip in requested_ips:
-            requested_ip['address'] = f'{next(available_ips)}/{parent.mask_length}'
-            requested_ip['vrf'] = parent.vrf.pk if parent.vrf else None
-
-        # Initialize the serializer with a list or a single object depending on what was requested
-        context = {'request': request}
-        if isinstance(request.data, list):
-            serializer = serializers.IPAddressSerializer(data=requested_ips, many=True, context=context)
-        else:
-            serializer = serializers.IPAddressSerializer(data=requested_ips[0], context=context)
-
-        # Create the new IP address(es)
-        if serializer.is_valid():
-            try:
-                with transaction.atomic():
-                    created = serializer.save()
-                    self._validate_objects(created)
-            except ObjectDoesNotExist:
-                raise PermissionDenied()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            # Determine if the requested number of IPs is available
+            available_ips = list(islice(parent.iter_available_ips(), len(requested_ips)))
+            if len(available_ips) < len(requested_ips):
+                return Response(
+                    {
+                        "detail": f"An insufficient number of IP addresses are available within {parent} "
+                                  f"({len(requested_ips)} requested, {len(available_ips)} available)"
+                    },
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            # Assign addresses from the list of available IPs and copy VRF assignment from the parent
+            available_ips = iter(available_ips)
+            for requested_ip in requested_ips:
+                requested_ip['address'] = f'{next(available_ips)}/{parent.mask_length}'
+                requested_ip['vrf'] = parent.vrf.pk if parent.vrf else None
+
+            # Initialize the serializer with a list or a single object depending on what was requested
+            context = {'request': request}
+            if isinstance(request.data, list):
+                serializer = serializers.IPAddressSerializer(data=requested_ips, many=True, context=context)
+            else:
+                serializer = serializers.IPAddressSerializer(data=requested_ips[0], context=context)
+
+            # Create the new IP address(es)
+            if serializer.is_valid():
+                try:
+                    with transaction.atomic():
+                        created = serializer.save()
+                        self._validate_objects(created)
+                except ObjectDoesNotExist:
+                    raise PermissionDenied()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -441,12 +496,18 @@ class AvailableIPAddressesView(ObjectValidationMixin, APIView):
 
 
 class PrefixAvailableIPAddressesView(AvailableIPAddressesView):
+    lock_name = 'prefix-available-ips'
+    lock_order = staticmethod(get_prefix_length)
 
     def get_parent(self, request, pk):
         return get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
 
+    def get_parent_ancestors(self, parent):
+        return get_prefix_ancestors(parent)
+
 
 class IPRangeAvailableIPAddressesView(AvailableIPAddressesView):
+    lock_name = 'iprange-available-ips'
 
     def get_parent(self, request, pk):
         return get_object_or_404(IPRange.objects.restrict(request.user), pk=pk)
@@ -469,57 +530,58 @@ class AvailableVLANsView(ObjectValidationMixin, APIView):
         return Response(serializer.data)
 
     @extend_schema(methods=["post"], responses={201: serializers.VLANSerializer(many=True)})
-    @advisory_lock(ADVISORY_LOCK_KEYS['available-vlans'])
     def post(self, request, pk):
         self.queryset = self.queryset.restrict(request.user, 'add')
         vlangroup = get_object_or_404(VLANGroup.objects.restrict(request.user), pk=pk)
-        available_vlans = vlangroup.get_available_vids()
-        many = isinstance(request.data, list)
-
-        # Validate requested VLANs
-        serializer = serializers.CreateAvailableVLANSerializer(
-            data=request.data if many else [request.data],
-            many=True,
-            context={
-                'request': request,
-                'group': vlangroup,
-            }
-        )
-        if not serializer.is_valid():
-            return Response(
-                serializer.errors,
-                status=status.HTTP_400_BAD_REQUEST
+
+        with parent_advisory_lock('vlangroup-available-vlans', vlangroup):
+            available_vlans = vlangroup.get_available_vids()
+            many = isinstance(request.data, list)
+
+            # Validate requested VLANs
+            serializer = serializers.CreateAvailableVLANSerializer(
+                data=request.data if many else [request.data],
+                many=True,
+                context={
+                    'request': request,
+                    'group': vlangroup,
+                }
             )
+            if not serializer.is_valid():
+                return Response(
+                    serializer.errors,
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        requested_vlans = serializer.validated_data
-
-        for i, requested_vlan in enumerate(requested_vlans):
-            try:
-                requested_vlan['vid'] = available_vlans.pop(0)
-                requested_vlan['group'] = vlangroup.pk
-            except IndexError:
-                return Response({
-                    "detail": "The requested number of VLANs is not available"
-                }, status=status.HTTP_409_CONFLICT)
-
-        # Initialize the serializer with a list or a single object depending on what was requested
-        context = {'request': request}
-        if many:
-            serializer = serializers.VLANSerializer(data=requested_vlans, many=True, context=context)
-        else:
-            serializer = serializers.VLANSerializer(data=requested_vlans[0], context=context)
-
-        # Create the new VLAN(s)
-        if serializer.is_valid():
-            try:
-                with transaction.atomic():
-                    created = serializer.save()
-                    self._validate_objects(created)
-            except ObjectDoesNotExist:
-                raise PermissionDenied()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            requested_vlans = serializer.validated_data
+
+            for i, requested_vlan in enumerate(requested_vlans):
+                try:
+                    requested_vlan['vid'] = available_vlans.pop(0)
+                    requested_vlan['group'] = vlangroup.pk
+                except IndexError:
+                    return Response({
+                        "detail": "The requested number of VLANs is not available"
+                    }, status=status.HTTP_409_CONFLICT)
+
+            # Initialize the serializer with a list or a single object depending on what was requested
+            context = {'request': request}
+            if many:
+                serializer = serializers.VLANSerializer(data=requested_vlans, many=True, context=context)
+            else:
+                serializer = serializers.VLANSerializer(data=requested_vlans[0], context=context)
+
+            # Create the new VLAN(s)
+            if serializer.is_valid():
+                try:
+                    with transaction.atomic():
+                        created = serializer.save()
+                        self._validate_objects(created)
+                except ObjectDoesNotExist:
+                    raise PermissionDenied()
+                return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def get_serializer_class(self):
         if self.request.method == "GET":
@@ -12,7 +12,7 @@ from ipam.choices import *
 from ipam.constants import *
 from ipam.fields import IPNetworkField, IPAddressField
 from ipam.managers import IPAddressManager
-from ipam.querysets import PrefixQuerySet
+from ipam.querysets import IPRangeQuerySet, PrefixQuerySet
 from ipam.validators import DNSValidator
 from netbox.config import get_config
 from netbox.models import OrganizationalModel, PrimaryModel
@@ -431,20 +431,64 @@ class Prefix(GetAvailablePrefixesMixin, PrimaryModel):
             available_ips -= netaddr.IPSet([netaddr.IPAddress(self.prefix.first)])
         return available_ips
 
+    def iter_available_ip_ranges(self):
+        """
+        Yield each range of available IPs within this prefix as a netaddr.IPRange, in ascending order. Unlike
+        get_available_ips(), available ranges are computed by the database and read in chunks as they are consumed
+        (see ipam.utils.iter_available_ip_ranges()).
+        """
+        from ipam.utils import iter_available_ip_ranges
+
+        if self.mark_utilized:
+            return
+
+        first_ip = netaddr.IPAddress(self.prefix.first, self.family)
+        last_ip = netaddr.IPAddress(self.prefix.last, self.family)
+
+        # IPv6 /127's, pool, or IPv4 /31-/32 sets are fully usable
+        fully_usable = (
+            (self.family == 6 and self.prefix.prefixlen >= 127) or self.is_pool or
+            (self.family == 4 and self.prefix.prefixlen >= 31)
+        )
+        if not fully_usable:
+            # Omit the network (and for IPv4, broadcast) addresses
+            first_ip += 1
+            if self.family == 4:
+                last_ip -= 1
+
+        yield from iter_available_ip_ranges(first_ip, last_ip, self.get_child_ips(), self.get_child_ranges())
+
+    def iter_available_ips(self):
+        """
+        Yield each available IP within this prefix (as a netaddr.IPAddress), in ascending order.
+        """
+        for ip_range in self.iter_available_ip_ranges():
+            yield from ip_range
+
+    def count_available_ips(self):
+        """
+        Return the number of available IPs within this prefix.
+        """
+        return sum(ip_range.size for ip_range in self.iter_available_ip_ranges())
+
     def get_first_available_ip(self):
         """
         Return the first available IP within the prefix (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        first_available_ip = next(self.iter_available_ips(), None)
+        if first_available_ip is None:
             return None
-        return '{}/{}'.format(next(available_ips.__iter__()), self.prefix.prefixlen)
+        return '{}/{}'.format(first_available_ip, self.prefix.prefixlen)
 
     def get_utilization(self):
         """
         Determine the utilization of the prefix and return it as a percentage. For Prefixes with a status of
         "container", calculate utilization based on child prefixes. For all others, count child IP addresses.
         """
+        # Use the annotated value, if present (see PrefixQuerySet.annotate_utilization())
+        if hasattr(self, 'utilization'):
+            return self.utilization
+
         if self.mark_utilized:
             return 100
 
@@ -516,6 +560,8 @@ class IPRange(PrimaryModel):
         help_text=_("Treat as 100% utilized")
     )
 
+    objects = IPRangeQuerySet.as_manager()
+
     clone_fields = (
         'vrf', 'tenant', 'status', 'role', 'description',
     )
@@ -640,16 +686,26 @@ class IPRange(PrimaryModel):
 
         return netaddr.IPSet(range) - child_ips
 
+    def iter_available_ips(self):
+        """
+        Yield each available IP within this range (as a netaddr.IPAddress), in ascending order. Unlike
+        get_available_ips(), available IPs are computed by the database and read only as they are consumed.
+        """
+        from ipam.utils import iter_available_ip_ranges
+
+        for ip_range in iter_available_ip_ranges(self.start_address.ip, self.end_address.ip, self.get_child_ips()):
+            yield from ip_range
+
     @cached_property
     def first_available_ip(self):
         """
         Return the first available IP within the range (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        first_available_ip = next(self.iter_available_ips(), None)
+        if first_available_ip is None:
             return None
 
-        return '{}/{}'.format(next(available_ips.__iter__()), self.start_address.prefixlen)
+        return '{}/{}'.format(first_available_ip, self.start_address.prefixlen)
 
     @cached_property
     def utilization(self):
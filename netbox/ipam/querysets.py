@@ -1,10 +1,38 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
+from django.db.models import (
+    Case, DecimalField, Exists, F, FloatField, Func, IntegerField, OuterRef, Q, Subquery, Value, When,
+)
 from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce, Floor, Least
+from django.db.models.lookups import Exact, GreaterThanOrEqual, LessThanOrEqual
 
+from ipam.choices import PrefixStatusChoices
+from ipam.lookups import Host, Inet, NetContained, NetContains, NetHostContained
+from utilities.query_functions import EmptyGroupByCount, EmptyGroupBySum
 from utilities.querysets import RestrictedQuerySet
 
 
+class PrefixSize(Func):
+    """
+    Return the number of addresses within an IP prefix, as an arbitrary-precision numeric value.
+    """
+    arity = 1
+    template = (
+        'POWER(2::numeric, CASE FAMILY(%(expressions)s) WHEN 4 THEN 32 ELSE 128 END - MASKLEN(%(expressions)s))'
+    )
+    output_field = DecimalField()
+
+
+def same_vrf(vrf):
+    """
+    Return a condition matching objects assigned to the given VRF (treating a null VRF as the global table).
+    """
+    return Exact(
+        Coalesce('vrf', 0, output_field=IntegerField()),
+        Coalesce(vrf, 0, output_field=IntegerField())
+    )
+
+
 class PrefixQuerySet(RestrictedQuerySet):
 
     def annotate_hierarchy(self):
@@ -29,6 +57,114 @@ class PrefixQuerySet(RestrictedQuerySet):
             )
         )
 
+    def annotate_utilization(self):
+        """
+        Annotate the utilization of each Prefix (as a percentage), as returned by get_utilization(). For containers,
+        this is the proportion of the prefix covered by child prefixes (excluding any child prefixes nested within
+        others). For all other prefixes, it is the proportion of usable addresses consumed by child IP ranges and by
+        child IP addresses which do not fall within a child range.
+        """
+        from .models import IPAddress, IPRange, Prefix
+
+        # Sum the sizes of all distinct child prefixes which are not nested within another child prefix
+        child_prefixes = Prefix.objects.filter(
+            NetContained(F('prefix'), OuterRef('prefix')),
+            same_vrf(OuterRef('vrf')),
+        ).filter(
+            ~Exists(Prefix.objects.filter(
+                Q(
+                    NetContained(F('prefix'), OuterRef(OuterRef('prefix'))),
+                    NetContains(F('prefix'), OuterRef('prefix'))
+                ) | Q(prefix=OuterRef('prefix'), pk__lt=OuterRef('pk')),
+                same_vrf(OuterRef('vrf')),
+            ))
+        ).order_by().annotate(
+            total=EmptyGroupBySum(PrefixSize('prefix'))
+        ).values('total')
+
+        # Sum the sizes of all child IP ranges
+        child_ranges = IPRange.objects.filter(
+            NetHostContained(F('start_address'), OuterRef('prefix')),
+            NetHostContained(F('end_address'), OuterRef('prefix')),
+            same_vrf(OuterRef('vrf')),
+        ).order_by().annotate(
+            total=EmptyGroupBySum('size')
+        ).values('total')
+
+        # Count all unique child IP addresses which do not fall within a child IP range
+        child_ips = IPAddress.objects.filter(
+            NetHostContained(F('address'), OuterRef('prefix')),
+            same_vrf(OuterRef('vrf')),
+        ).filter(
+            ~Exists(IPRange.objects.filter(
+                NetHostContained(F('start_address'), OuterRef(OuterRef('prefix'))),
+                NetHostContained(F('end_address'), OuterRef(OuterRef('prefix'))),
+                same_vrf(OuterRef('vrf')),
+                LessThanOrEqual(Inet(Host('start_address')), Inet(Host(OuterRef('address')))),
+                GreaterThanOrEqual(Inet(Host('end_address')), Inet(Host(OuterRef('address')))),
+            ))
+        ).order_by().annotate(
+            total=EmptyGroupByCount(Host('address'), distinct=True)
+        ).values('total')
+
+        # The network and broadcast addresses of IPv4 prefixes larger than a /31 are not usable (unless a pool)
+        unusable_ips = Case(
+            When(prefix__family=4, prefix__net_mask_length__lt=31, is_pool=False, then=Value(2)),
+            default=Value(0)
+        )
+
+        return self.annotate(
+            utilization=Cast(
+                Case(
+                    When(mark_utilized=True, then=Value(100)),
+                    When(status=PrefixStatusChoices.STATUS_CONTAINER, then=Least(
+                        Coalesce(Subquery(child_prefixes), 0, output_field=DecimalField()) * 100 /
+                        PrefixSize('prefix'),
+                        Value(100),
+                        output_field=DecimalField()
+                    )),
+                    default=Least(
+                        (
+                            Coalesce(Subquery(child_ranges), 0, output_field=IntegerField()) +
+                            Coalesce(Subquery(child_ips), 0, output_field=IntegerField())
+                        ) * 100 / (PrefixSize('prefix') - unusable_ips),
+                        Value(100),
+                        output_field=DecimalField()
+                    ),
+                    output_field=DecimalField()
+                ),
+                FloatField()
+            )
+        )
+
+
+class IPRangeQuerySet(RestrictedQuerySet):
+
+    def annotate_utilization(self):
+        """
+        Annotate the utilization of each IPRange (as a percentage), overriding its utilization property.
+        """
+        from .models import IPAddress
+
+        child_ips = IPAddress.objects.filter(
+            same_vrf(OuterRef('vrf')),
+            address__gte=OuterRef('start_address'),
+            address__lte=OuterRef('end_address')
+        ).order_by().annotate(
+            total=EmptyGroupByCount(Host('address'), distinct=True)
+        ).values('total')
+
+        return self.annotate(
+            utilization=Case(
+                When(mark_utilized=True, then=Value(100)),
+                default=Cast(
+                    Floor(Subquery(child_ips) * Value(100.0) / F('size')),
+                    IntegerField()
+                ),
+                output_field=IntegerField()
+            )
+        )
+
 
 class VLANQuerySet(RestrictedQuerySet):
 
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from netaddr import IPNetwork
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ipam.models import IPAddress, Prefix
+from users.models import Token
+
+logger = logging.getLogger('netbox.tests.ipam')
+
+
+class AvailableIPConcurrencyTest(TransactionTestCase):
+    """
+    Benchmark the concurrent allocation of available IP addresses via the REST API, verifying that no address is
+    allocated more than once. Each worker thread makes a series of requests using its own database connection.
+    """
+    threads = 8
+    allocations = 5
+
+    def setUp(self):
+        user = User.objects.create_user(username='testuser', is_superuser=True)
+        token = Token.objects.create(user=user)
+        self.header = {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+
+    def allocate(self, prefixes):
+        """
+        Allocate IP addresses concurrently, with each thread allocating from the corresponding prefix. Returns the
+        response status codes and the elapsed time.
+        """
+        results = []
+
+        def worker(prefix):
+            client = APIClient()
+            url = reverse('ipam-api:prefix-available-ips', kwargs={'pk': prefix.pk})
+            try:
+                for _ in range(self.allocations):
+                    response = client.post(url, {}, format='json', **self.header)
+                    results.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(prefix,)) for prefix in prefixes]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        logger.info(
+            f"Allocated {len(results)} IPs from {len(set(prefixes))} prefix(es) using {len(threads)} threads in "
+            f"{elapsed:.2f}s ({len(results) / elapsed:.1f}/s)"
+        )
+        return results, elapsed
+
+    def assertNoDuplicateAddresses(self):
+        addresses = [str(ip.address.ip) for ip in IPAddress.objects.all()]
+        self.assertEqual(len(addresses), len(set(addresses)))
+
+    def test_allocate_within_single_prefix(self):
+        prefix = Prefix.objects.create(prefix=IPNetwork('192.0.2.0/24'))
+
+        results, _ = self.allocate([prefix] * self.threads)
+        self.assertEqual(results, [status.HTTP_201_CREATED] * self.threads * self.allocations)
+        self.assertEqual(IPAddress.objects.count(), self.threads * self.allocations)
+        self.assertNoDuplicateAddresses()
+
+    def test_allocate_within_multiple_prefixes(self):
+        prefixes = [
+            Prefix.objects.create(prefix=IPNetwork(f'10.0.{i}.0/24')) for i in range(self.threads)
+        ]
+
+        results, _ = self.allocate(prefixes)
+        self.assertEqual(results, [status.HTTP_201_CREATED] * self.threads * self.allocations)
+        for prefix in prefixes:
+            self.assertEqual(prefix.get_child_ips().count(), self.allocations)
+        self.assertNoDuplicateAddresses()
+
+    def test_allocate_within_nested_prefixes(self):
+        # Allocations within a child prefix must be serialized with those within its parent
+        parent = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/16'))
+        child = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+
+        results, _ = self.allocate([parent, child] * (self.threads // 2))
+        self.assertEqual(results, [status.HTTP_201_CREATED] * self.threads * self.allocations)
+        self.assertNoDuplicateAddresses()
+
+    def test_allocate_within_duplicate_prefixes(self):
+        # Duplicate prefixes are ancestors of one another; allocations within them must not deadlock
+        prefixes = [
+            Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24')),
+            Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24')),
+        ]
+
+        results, _ = self.allocate(prefixes * (self.threads // 2))
+        self.assertEqual(results, [status.HTTP_201_CREATED] * self.threads * self.allocations)
+        self.assertNoDuplicateAddresses()
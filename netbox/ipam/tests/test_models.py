@@ -1,5 +1,8 @@
+from unittest.mock import patch
+
 from netaddr import IPNetwork, IPSet
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase, override_settings
 
 from dcim.models import Interface, Device, DeviceRole, DeviceType, Manufacturer, Site
@@ -160,6 +163,54 @@ class TestPrefix(TestCase):
 
         self.assertEqual(available_ips, missing_ips)
 
+    def test_iter_available_ips(self):
+
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/28'))
+        IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('10.0.0.1/26')),
+            IPAddress(address=IPNetwork('10.0.0.3/26')),
+            IPAddress(address=IPNetwork('10.0.0.5/26')),
+            IPAddress(address=IPNetwork('10.0.0.7/26')),
+            IPAddress(address=IPNetwork('10.0.0.10/26')),  # Within the IP range
+            IPAddress(address=IPNetwork('10.0.0.15/26')),  # Broadcast address
+        ))
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.9/26'),
+            end_address=IPNetwork('10.0.0.12/26')
+        )
+        missing_ips = [
+            '10.0.0.2',
+            '10.0.0.4',
+            '10.0.0.6',
+            '10.0.0.8',
+            '10.0.0.13',
+            '10.0.0.14',
+        ]
+
+        self.assertEqual([str(ip) for ip in parent_prefix.iter_available_ips()], missing_ips)
+        self.assertEqual(parent_prefix.count_available_ips(), len(missing_ips))
+        self.assertEqual(
+            [str(ip_range) for ip_range in parent_prefix.iter_available_ip_ranges()],
+            ['10.0.0.2-10.0.0.2', '10.0.0.4-10.0.0.4', '10.0.0.6-10.0.0.6', '10.0.0.8-10.0.0.8', '10.0.0.13-10.0.0.14']
+        )
+
+    def test_iter_available_ips_without_server_side_cursors(self):
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/29'))
+        IPAddress.objects.create(address=IPNetwork('10.0.0.3/29'))
+
+        # A regular cursor should be used when server-side cursors have been disabled
+        with patch.dict(connection.settings_dict, {'DISABLE_SERVER_SIDE_CURSORS': True}), \
+                patch.object(connection, 'chunked_cursor') as chunked_cursor:
+            available_ips = [str(ip) for ip in parent_prefix.iter_available_ips()]
+        chunked_cursor.assert_not_called()
+        self.assertEqual(available_ips, ['10.0.0.1', '10.0.0.2', '10.0.0.4', '10.0.0.5', '10.0.0.6'])
+
+    def test_iter_available_ips_pool(self):
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/30'), is_pool=True)
+        IPAddress.objects.create(address=IPNetwork('10.0.0.1/30'))
+
+        self.assertEqual([str(ip) for ip in parent_prefix.iter_available_ips()], ['10.0.0.0', '10.0.0.2', '10.0.0.3'])
+
     def test_get_first_available_prefix(self):
 
         prefixes = Prefix.objects.bulk_create((
@@ -223,6 +274,28 @@ class TestPrefix(TestCase):
         IPRange.objects.create(start_address=IPNetwork('10.0.0.33/24'), end_address=IPNetwork('10.0.0.64/24'))
         self.assertEqual(prefix.get_utilization(), 64 / 254 * 100)  # ~25% utilization
 
+    def test_annotate_utilization(self):
+        prefixes = (
+            Prefix(prefix=IPNetwork('10.0.0.0/24'), status=PrefixStatusChoices.STATUS_CONTAINER),
+            Prefix(prefix=IPNetwork('10.0.0.0/26')),
+            Prefix(prefix=IPNetwork('10.0.0.0/27')),
+            Prefix(prefix=IPNetwork('10.0.0.128/26')),
+            Prefix(prefix=IPNetwork('10.1.0.0/24'), mark_utilized=True),
+        )
+        Prefix.objects.bulk_create(prefixes)
+        IPAddress.objects.bulk_create([
+            IPAddress(address=IPNetwork(f'10.0.0.{i}/24')) for i in range(1, 41)
+        ])
+        IPRange.objects.create(start_address=IPNetwork('10.0.0.33/24'), end_address=IPNetwork('10.0.0.64/24'))
+
+        for prefix in Prefix.objects.annotate_utilization():
+            self.assertAlmostEqual(prefix.utilization, Prefix.objects.get(pk=prefix.pk).get_utilization())
+            self.assertEqual(prefix.get_utilization(), prefix.utilization)
+        self.assertEqual(Prefix.objects.annotate_utilization().get(pk=prefixes[0].pk).utilization, 50)
+
+        iprange = IPRange.objects.annotate_utilization().get()
+        self.assertEqual(iprange.utilization, IPRange.objects.get(pk=iprange.pk).utilization)
+
     #
     # Uniqueness enforcement tests
     #
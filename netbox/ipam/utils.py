@@ -1,8 +1,45 @@
 import netaddr
+from django.db import connections
 
 from .constants import *
 from .models import ASN, Prefix, VLAN
 
+# Number of available ranges to read from the database at a time
+AVAILABLE_IP_RANGES_CHUNK_SIZE = 100
+
+AVAILABLE_IP_RANGES_SQL = """
+WITH limits AS (
+    SELECT %s::inet AS lower_ip, %s::inet AS upper_ip
+),
+used AS (
+    {used_sql}
+),
+bounds AS (
+    SELECT first_ip, MAX(last_ip) OVER (
+        ORDER BY first_ip, last_ip ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+    ) AS prev_ip
+    FROM used
+),
+gaps AS (
+    SELECT
+        CASE
+            WHEN prev_ip IS NULL THEN lower_ip
+            WHEN prev_ip < upper_ip THEN GREATEST(prev_ip + 1, lower_ip)
+        END AS gap_start,
+        CASE WHEN first_ip > lower_ip THEN LEAST(first_ip - 1, upper_ip) END AS gap_end
+    FROM bounds, limits
+    UNION ALL
+    SELECT
+        CASE
+            WHEN last_ip IS NULL THEN lower_ip
+            WHEN last_ip < upper_ip THEN GREATEST(last_ip + 1, lower_ip)
+        END,
+        upper_ip
+    FROM (SELECT MAX(last_ip) AS last_ip FROM used) u, limits
+)
+SELECT host(gap_start), host(gap_end) FROM gaps WHERE gap_start <= gap_end ORDER BY gap_start
+"""
+
 
 def add_requested_prefixes(parent, prefix_list, show_available=True, show_assigned=True):
     """
@@ -184,3 +221,45 @@ def rebuild_prefixes(vrf):
 
     # Final flush of any remaining Prefixes
     Prefix.objects.bulk_update(update_queue, ['_depth', '_children'])
+
+
+def iter_available_ip_ranges(first_ip, last_ip, child_ips, child_ranges=None):
+    """
+    Yield each range of available IP addresses between first_ip and last_ip (inclusive) as a netaddr.IPRange, in
+    ascending order. The gaps between child IP addresses and ranges are computed by the database, and are read from it
+    using a server-side cursor in chunks as they are consumed.
+
+    Ranges are computed lazily (such that only those consumed are computed) only within a transaction. In autocommit
+    mode, the server-side cursor is declared WITH HOLD, so the database computes the full result before the first
+    chunk is returned. If server-side cursors are disabled (DISABLE_SERVER_SIDE_CURSORS, e.g. when connecting through
+    a transaction pooler such as pgbouncer), a regular cursor is used and the full result is retrieved at once.
+
+    :param first_ip: The first IP address (netaddr.IPAddress) which may be allocated
+    :param last_ip: The last IP address (netaddr.IPAddress) which may be allocated
+    :param child_ips: QuerySet of IPAddresses which are in use
+    :param child_ranges: QuerySet of IPRanges which are in use (optional)
+    """
+    ips_sql, params = child_ips.order_by().values_list('address').query.sql_with_params()
+    used_sql = f'SELECT host(address)::inet AS first_ip, host(address)::inet AS last_ip FROM ({ips_sql}) ips'
+    params = [str(first_ip), str(last_ip), *params]
+    if child_ranges is not None:
+        ranges_sql, ranges_params = child_ranges.order_by().values_list(
+            'start_address', 'end_address'
+        ).query.sql_with_params()
+        used_sql += (
+            f' UNION ALL SELECT host(start_address)::inet, host(end_address)::inet FROM ({ranges_sql}) ranges'
+        )
+        params.extend(ranges_params)
+
+    # As with QuerySet.iterator(), use a server-side cursor unless these have been disabled
+    connection = connections[child_ips.db]
+    if connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        cursor = connection.cursor()
+    else:
+        cursor = connection.chunked_cursor()
+
+    with cursor:
+        cursor.execute(AVAILABLE_IP_RANGES_SQL.format(used_sql=used_sql), params)
+        while rows := cursor.fetchmany(AVAILABLE_IP_RANGES_CHUNK_SIZE):
+            for start, end in rows:
+                yield netaddr.IPRange(start, end)
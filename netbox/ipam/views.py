@@ -476,7 +476,7 @@ class RoleBulkDeleteView(generic.BulkDeleteView):
 #
 
 class PrefixListView(generic.ObjectListView):
-    queryset = Prefix.objects.all()
+    queryset = Prefix.objects.annotate_utilization()
     filterset = filtersets.PrefixFilterSet
     filterset_form = forms.PrefixFilterForm
     table = tables.PrefixTable
@@ -582,7 +582,7 @@ class PrefixIPRangesView(generic.ObjectChildrenView):
     def get_children(self, request, parent):
         return parent.get_child_ranges().restrict(request.user, 'view').prefetch_related(
             'tenant__group',
-        )
+        ).annotate_utilization()
 
     def get_extra_context(self, request, instance):
         return {
@@ -654,7 +654,7 @@ class PrefixBulkDeleteView(generic.BulkDeleteView):
 #
 
 class IPRangeListView(generic.ObjectListView):
-    queryset = IPRange.objects.all()
+    queryset = IPRange.objects.annotate_utilization()
     filterset = filtersets.IPRangeFilterSet
     filterset_form = forms.IPRangeFilterForm
     table = tables.IPRangeTable
@@ -1,6 +1,14 @@
+import atexit
+import copy
+import hashlib
 import logging
+import threading
+import time
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, When
 from django.utils import timezone
 from rest_framework import authentication, exceptions
 from rest_framework.permissions import BasePermission, DjangoObjectPermissions, SAFE_METHODS
@@ -9,6 +17,130 @@ from netbox.config import get_config
 from users.models import Token
 from utilities.request import get_client_ip
 
+TOKEN_CACHE_VERSION_KEY = 'api_token_cache_version'
+
+# The minimum interval (in seconds) between updates of a token's last_used time, and the maximum interval for which
+# pending last_used times are held before being written to the database
+TOKEN_LAST_USED_INTERVAL = 60
+TOKEN_LAST_USED_FLUSH_INTERVAL = 10
+
+# Token last_used times recorded by this process within the past TOKEN_LAST_USED_INTERVAL, and those pending a write
+# to the database
+_token_last_used = {}
+_pending_last_used = {}
+_last_used_lock = threading.Lock()
+_last_used_flushed = time.monotonic()
+_last_used_timer = None
+
+
+def get_token_cache_key(key, version=None):
+    """
+    Return the cache key for the API token with the given key. The token's key is hashed so that it is not exposed
+    in the cache.
+    """
+    if version is None:
+        version = cache.get(TOKEN_CACHE_VERSION_KEY, 0)
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return f'api_token_{version}_{digest}'
+
+
+def invalidate_token_cache(user=None):
+    """
+    Discard the cached tokens belonging to the given user or, if no user is specified, all cached tokens.
+
+    The tokens are discarded immediately, so that the change is reflected within the current transaction, and again
+    once the transaction has been committed, as other requests may meanwhile have cached them from the previously
+    committed state.
+    """
+    if user is None:
+        def invalidate():
+            try:
+                cache.incr(TOKEN_CACHE_VERSION_KEY)
+            except ValueError:
+                cache.set(TOKEN_CACHE_VERSION_KEY, 1, None)
+    else:
+        # Look up the user's token keys only once, while the transaction is still open
+        keys = list(Token.objects.filter(user=user).values_list('key', flat=True))
+
+        def invalidate():
+            version = cache.get(TOKEN_CACHE_VERSION_KEY, 0)
+            cache.delete_many([get_token_cache_key(key, version) for key in keys])
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def record_token_use(token):
+    """
+    Record the use of a Token. Its last_used time is updated at most once per TOKEN_LAST_USED_INTERVAL, and written
+    to the database in a batch along with those of any other tokens used (see flush_token_usage()). Pending times are
+    written by a timer if no request has done so within TOKEN_LAST_USED_FLUSH_INTERVAL, and when the process exits.
+    """
+    global _last_used_timer
+
+    now = timezone.now()
+    last_used = _token_last_used.get(token.pk, token.last_used)
+    if last_used is None or (now - last_used).total_seconds() > TOKEN_LAST_USED_INTERVAL:
+        with _last_used_lock:
+            _token_last_used[token.pk] = now
+            _pending_last_used[token.pk] = now
+            if _last_used_timer is None:
+                _last_used_timer = threading.Timer(TOKEN_LAST_USED_FLUSH_INTERVAL, _flush_token_usage_on_timer)
+                _last_used_timer.daemon = True
+                _last_used_timer.start()
+
+
+def _flush_token_usage_on_timer():
+    """
+    Write any pending last_used times which have not been written by a request, and close the database connection
+    opened by the timer thread.
+    """
+    global _last_used_timer
+
+    with _last_used_lock:
+        _last_used_timer = None
+    try:
+        flush_token_usage(force=True)
+    finally:
+        connection.close()
+
+
+def flush_token_usage(force=False, **kwargs):
+    """
+    Write the pending last_used times of all tokens to the database in a single query. This is called when each
+    request finishes, but writes at most once per TOKEN_LAST_USED_FLUSH_INTERVAL unless force is True.
+    """
+    global _last_used_flushed
+
+    with _last_used_lock:
+        if not _pending_last_used or (
+            not force and time.monotonic() - _last_used_flushed < TOKEN_LAST_USED_FLUSH_INTERVAL
+        ):
+            return
+        pending = _pending_last_used.copy()
+        _pending_last_used.clear()
+        _last_used_flushed = time.monotonic()
+
+        # Forget any times recorded longer ago than TOKEN_LAST_USED_INTERVAL, as they no longer defer updates
+        now = timezone.now()
+        for pk, last_used in list(_token_last_used.items()):
+            if (now - last_used).total_seconds() > TOKEN_LAST_USED_INTERVAL:
+                del _token_last_used[pk]
+
+    # If maintenance mode is enabled, assume the database is read-only, and disable updating tokens' last_used times
+    if get_config().MAINTENANCE_MODE:
+        logger = logging.getLogger('netbox.auth.login')
+        logger.debug("Maintenance mode enabled: Disabling update of tokens' last used timestamps")
+        return
+
+    Token.objects.filter(pk__in=pending).update(
+        last_used=Case(*[When(pk=pk, then=last_used) for pk, last_used in pending.items()])
+    )
+
+
+# Write any pending last_used times when the process exits (e.g. when a worker is recycled)
+atexit.register(flush_token_usage, force=True)
+
 
 class TokenAuthentication(authentication.TokenAuthentication):
     """
@@ -38,26 +170,39 @@ class TokenAuthentication(authentication.TokenAuthentication):
         return result
 
     def authenticate_credentials(self, key):
-        model = self.get_model()
-        try:
-            token = model.objects.prefetch_related('user').get(key=key)
-        except model.DoesNotExist:
-            raise exceptions.AuthenticationFailed("Invalid token")
+        # Retrieve the token and its user from the cache, if possible
+        if settings.API_TOKEN_CACHE_TIMEOUT:
+            cache_key = get_token_cache_key(key)
+            if (cached := cache.get(cache_key)) is not None:
+                token, user = cached
+            else:
+                token, user = self.get_token_and_user(key)
+                cache.set(cache_key, (token, self._get_cacheable_user(user)), settings.API_TOKEN_CACHE_TIMEOUT)
+        else:
+            token, user = self.get_token_and_user(key)
 
         # Update last used, but only once per minute at most. This reduces write load on the database
-        if not token.last_used or (timezone.now() - token.last_used).total_seconds() > 60:
-            # If maintenance mode is enabled, assume the database is read-only, and disable updating the token's
-            # last_used time upon authentication.
-            if get_config().MAINTENANCE_MODE:
-                logger = logging.getLogger('netbox.auth.login')
-                logger.debug("Maintenance mode enabled: Disabling update of token's last used timestamp")
-            else:
-                Token.objects.filter(pk=token.pk).update(last_used=timezone.now())
+        record_token_use(token)
 
         # Enforce the Token's expiration time, if one has been set.
         if token.is_expired:
             raise exceptions.AuthenticationFailed("Token expired")
 
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive")
+
+        return user, token
+
+    def get_token_and_user(self, key):
+        """
+        Retrieve the Token with the given key and its user, along with the user's permissions.
+        """
+        model = self.get_model()
+        try:
+            token = model.objects.prefetch_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Invalid token")
+
         user = token.user
         # When LDAP authentication is active try to load user data from LDAP directory
         if settings.REMOTE_AUTH_BACKEND == 'netbox.authentication.LDAPBackend':
@@ -71,11 +216,22 @@ class TokenAuthentication(authentication.TokenAuthentication):
                 # If the user is found in the LDAP directory use it, if not fallback to the local user
                 if ldap_user:
                     user = ldap_user
+                    ldap_backend.get_all_permissions(user)
 
-        if not user.is_active:
-            raise exceptions.AuthenticationFailed("User inactive")
+        # Resolve the user's object permissions (if not done already) so that they may be cached along with the user
+        if not hasattr(user, '_object_perm_cache'):
+            from netbox.authentication import ObjectPermissionBackend
+            ObjectPermissionBackend().get_all_permissions(user)
 
-        return user, token
+        return token, user
+
+    @staticmethod
+    def _get_cacheable_user(user):
+        # Omit the LDAP user object (if any), which cannot be cached. Its permissions have already been resolved.
+        if 'ldap_user' in user.__dict__:
+            user = copy.copy(user)
+            del user.__dict__['ldap_user']
+        return user
 
 
 class TokenPermissions(DjangoObjectPermissions):
@@ -5,9 +5,12 @@ from django.db import transaction
 from django.db.models import ProtectedError
 from rest_framework import mixins as drf_mixins
 from rest_framework.response import Response
+from rest_framework.serializers import ListSerializer
 from rest_framework.viewsets import GenericViewSet
 
+from extras.signals import clear_webhooks
 from utilities.exceptions import AbortRequest
+from utilities.mptt import delay_tree_updates
 from . import mixins
 
 __all__ = (
@@ -84,6 +87,11 @@ class NetBoxModelViewSet(
 
         return super().get_serializer(*args, **kwargs)
 
+    def handle_exception(self, exc):
+        # Discard any queued webhooks and change records, as the changes they represent have been rolled back
+        clear_webhooks.send(sender=self)
+        return super().handle_exception(exc)
+
     def dispatch(self, request, *args, **kwargs):
         logger = logging.getLogger(f'netbox.api.views.{self.__class__.__name__}')
 
@@ -116,9 +124,12 @@ class NetBoxModelViewSet(
         logger = logging.getLogger(f'netbox.api.views.{self.__class__.__name__}')
         logger.info(f"Creating new {model._meta.verbose_name}")
 
+        # Defer the maintenance of any MPTT trees when creating objects in bulk
+        tree_models = [model] if isinstance(serializer, ListSerializer) else []
+
         # Enforce object-level permissions on save()
         try:
-            with transaction.atomic():
+            with transaction.atomic(), delay_tree_updates(*tree_models):
                 instance = serializer.save()
                 self._validate_objects(instance)
         except ObjectDoesNotExist:
@@ -12,6 +12,7 @@ from netbox.api.exceptions import SerializerNotFound
 from netbox.api.serializers import BulkOperationSerializer
 from netbox.constants import NESTED_SERIALIZER_PREFIX
 from utilities.api import get_serializer_for_model
+from utilities.mptt import delay_tree_updates
 
 __all__ = (
     'BriefModeMixin',
@@ -171,7 +172,7 @@ class BulkDestroyModelMixin:
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_bulk_destroy(self, objects):
-        with transaction.atomic():
+        with transaction.atomic(), delay_tree_updates(objects.model):
             for obj in objects:
                 if hasattr(obj, 'snapshot'):
                     obj.snapshot()
@@ -5,17 +5,21 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend, RemoteUserBackend as _RemoteUserBackend
 from django.contrib.auth.models import Group, AnonymousUser
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
 from django.db.models import Q
 
-from users.constants import CONSTRAINT_TOKEN_USER
 from users.models import ObjectPermission
 from utilities.permissions import (
-    permission_is_exempt, qs_filter_from_constraints, resolve_permission, resolve_permission_ct,
+    compile_constraints, get_constraints_filter, permission_is_exempt, resolve_permission, resolve_permission_ct,
 )
 
 UserModel = get_user_model()
 
+OBJECT_PERMISSIONS_CACHE_TIMEOUT = 3600
+OBJECT_PERMISSIONS_CACHE_VERSION_KEY = 'object_permissions_version'
+
 AUTH_BACKEND_ATTRS = {
     # backend name: title, MDI icon name
     'amazon': ('Amazon AWS', 'aws'),
@@ -60,15 +64,80 @@ def get_saml_idps():
     return getattr(settings, "SOCIAL_AUTH_SAML_ENABLED_IDPS", {}).keys()
 
 
+def get_object_permissions_cache_key(user, version=None):
+    """
+    Return the key under which the object permissions of the given user are cached. The user's creation time is
+    included to distinguish it from any other user which may since have been assigned the same ID.
+    """
+    if version is None:
+        version = cache.get(OBJECT_PERMISSIONS_CACHE_VERSION_KEY, 0)
+    created = getattr(user, 'date_joined', None)
+    return f'object_permissions_{version}_{user.pk}_{created.timestamp() if created else ""}'
+
+
+def invalidate_object_permissions(user=None):
+    """
+    Discard the cached object permissions of the given user or, if no user is specified, of all users.
+
+    The permissions are discarded immediately, so that the change is reflected within the current transaction, and
+    again once the transaction has been committed, as other requests may meanwhile have cached them from the
+    previously committed state.
+    """
+    if user is None:
+        def invalidate():
+            try:
+                cache.incr(OBJECT_PERMISSIONS_CACHE_VERSION_KEY)
+            except ValueError:
+                cache.set(OBJECT_PERMISSIONS_CACHE_VERSION_KEY, 1, None)
+    else:
+        # Determine the cache key now, as the user's ID is cleared once it has been deleted
+        cache_key = get_object_permissions_cache_key(user)
+
+        def invalidate():
+            cache.delete(cache_key)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
 class ObjectPermissionMixin:
 
     def get_all_permissions(self, user_obj, obj=None):
         if not user_obj.is_active or user_obj.is_anonymous:
             return dict()
         if not hasattr(user_obj, '_object_perm_cache'):
-            user_obj._object_perm_cache = self.get_object_permissions(user_obj)
+            self.load_object_permissions(user_obj)
         return user_obj._object_perm_cache
 
+    def load_object_permissions(self, user_obj):
+        """
+        Assign to the user its object permissions and the compiled Q filters for their constraints. These are cached
+        for each user (where possible) and shared across requests until invalidated.
+        """
+        cache_key = self.get_object_permissions_cache_key(user_obj)
+        if cache_key and (cached := cache.get(cache_key)) is not None:
+            user_obj._object_perm_cache, user_obj._object_perm_filters = cached
+            return
+
+        perms = self.get_object_permissions(user_obj)
+
+        # Reference the user within constraints by a bare instance, which can be cached along with the filters
+        token_user = UserModel(pk=user_obj.pk, username=user_obj.username)
+        filters = {
+            perm_name: compile_constraints(constraints, token_user) for perm_name, constraints in perms.items()
+        }
+
+        user_obj._object_perm_cache = perms
+        user_obj._object_perm_filters = filters
+        if cache_key:
+            cache.set(cache_key, (perms, filters), OBJECT_PERMISSIONS_CACHE_TIMEOUT)
+
+    def get_object_permissions_cache_key(self, user_obj):
+        """
+        Return the key under which the user's object permissions are cached, or None if they may not be cached.
+        """
+        return get_object_permissions_cache_key(user_obj)
+
     def get_permission_filter(self, user_obj):
         return Q(users=user_obj) | Q(groups__user=user_obj)
 
@@ -123,11 +192,8 @@ class ObjectPermissionMixin:
         if model._meta.label_lower != '.'.join((app_label, model_name)):
             raise ValueError(f"Invalid permission {perm} for model {model}")
 
-        # Compile a QuerySet filter that matches all instances of the specified model
-        tokens = {
-            CONSTRAINT_TOKEN_USER: user_obj,
-        }
-        qs_filter = qs_filter_from_constraints(object_permissions[perm], tokens)
+        # Retrieve the compiled QuerySet filter that matches all permitted instances of the specified model
+        qs_filter = get_constraints_filter(user_obj, perm)
 
         # Permission to perform the requested action on the object depends on whether the specified object matches
         # the specified constraints. Note that this check is made against the *database* record representing the object,
@@ -308,6 +374,12 @@ try:
                     hasattr(user_obj.ldap_user, "group_names")):
                 permission_filter = permission_filter | Q(groups__name__in=user_obj.ldap_user.group_names)
             return permission_filter
+
+        def get_object_permissions_cache_key(self, user_obj):
+            # Permissions derived from LDAP group membership are not cached
+            if self.settings.FIND_GROUP_PERMS and hasattr(user_obj, 'ldap_user'):
+                return None
+            return super().get_object_permissions_cache_key(user_obj)
 except ModuleNotFoundError:
     pass
 
@@ -1,8 +1,10 @@
 import logging
 import threading
+import time
 
 from django.conf import settings
 from django.core.cache import cache
+from django.core.signals import setting_changed
 from django.db.utils import DatabaseError
 
 from .parameters import PARAMS
@@ -14,34 +16,58 @@ __all__ = (
     'PARAMS',
 )
 
-_thread_locals = threading.local()
+# Minimum interval (in seconds) between checks of the cached configuration version
+CONFIG_POLL_INTERVAL = 1
+
+_config = None
+_last_polled = 0
+_lock = threading.Lock()
 
 logger = logging.getLogger('netbox.config')
 
 
 def get_config():
     """
-    Return the current NetBox configuration, pulling it from cache if not already loaded in memory.
+    Return the current NetBox configuration. The configuration is loaded once per process and retained until a new
+    revision is detected in the cache, which is checked at most once every CONFIG_POLL_INTERVAL seconds.
     """
-    if not hasattr(_thread_locals, 'config'):
-        _thread_locals.config = Config()
-        logger.debug("Initialized configuration")
-    return _thread_locals.config
+    global _config, _last_polled
+
+    config = _config
+    if config is not None and time.monotonic() - _last_polled < CONFIG_POLL_INTERVAL:
+        return config
 
+    with _lock:
+        if _config is None:
+            _config = Config()
+            logger.debug("Initialized configuration")
+        elif time.monotonic() - _last_polled >= CONFIG_POLL_INTERVAL:
+            if cache.get('config_version') != _config.version:
+                _config = Config()
+                logger.debug("Reloaded configuration")
+        _last_polled = time.monotonic()
+        return _config
 
-def clear_config():
+
+def clear_config(**kwargs):
     """
-    Delete the currently loaded configuration, if any.
+    Delete the currently loaded configuration, if any, so that it is reloaded upon next access.
     """
-    if hasattr(_thread_locals, 'config'):
-        del _thread_locals.config
+    global _config
+    if _config is not None:
+        _config = None
         logger.debug("Cleared configuration")
 
 
+# Configuration values defined in settings may be overridden (e.g. by tests)
+setting_changed.connect(clear_config, dispatch_uid='clear_config')
+
+
 class Config:
     """
-    Fetch and store in memory the current NetBox configuration. This class must be instantiated prior to access, and
-    must be re-instantiated each time it's necessary to check for updates to the cached config.
+    Fetch and store in memory the current NetBox configuration. Each parameter is resolved once upon initialization
+    from settings.py, the cached configuration revision, or the parameter's default value (in that order of
+    precedence). Instances are not updated; a new instance must be created to check for updates to the cached config.
     """
     def __init__(self):
         self._populate_from_cache()
@@ -49,6 +75,14 @@ class Config:
             self._populate_from_db()
         self.defaults = {param.name: param.default for param in PARAMS}
 
+        # Assign each parameter as an instance attribute to avoid resolving it on every access
+        for name, default in self.defaults.items():
+            if hasattr(settings, name):
+                value = getattr(settings, name)
+            else:
+                value = self.config.get(name, default)
+            setattr(self, name, value)
+
     def __getattr__(self, item):
 
         # Check for hard-coded configuration in settings.py
@@ -59,10 +93,6 @@ class Config:
         if item in self.config:
             return self.config[item]
 
-        # Fall back to the parameter's default value
-        if item in self.defaults:
-            return self.defaults[item]
-
         raise AttributeError(f"Invalid configuration parameter: {item}")
 
     def _populate_from_cache(self):
@@ -1,6 +1,12 @@
 # Prefix for nested serializers
 NESTED_SERIALIZER_PREFIX = 'Nested'
 
+# Number of objects retrieved from the database at a time when streaming exported data
+EXPORT_CHUNK_SIZE = 2000
+
+# Number of records saved per transaction when importing objects as a background job
+IMPORT_BATCH_SIZE = 500
+
 # RQ queue names
 RQ_QUEUE_DEFAULT = 'default'
 RQ_QUEUE_HIGH = 'high'
@@ -15,4 +21,11 @@ ADVISORY_LOCK_KEYS = {
     'available-ips': 100200,
     'available-vlans': 100300,
     'available-asns': 100400,
+
+    # Per-parent locks, the keys for which are combined with the ID of the parent object
+    'prefix-available-prefixes': 100101,
+    'prefix-available-ips': 100201,
+    'iprange-available-ips': 100202,
+    'vlangroup-available-vlans': 100301,
+    'asnrange-available-asns': 100401,
 }
@@ -1,10 +1,20 @@
 from contextvars import ContextVar
 
 __all__ = (
+    'bulk_create_signals',
+    'cable_graph',
+    'cablepath_queue',
     'current_request',
+    'objectchange_queue',
+    'search_queue',
     'webhooks_queue',
 )
 
 
+bulk_create_signals = ContextVar('bulk_create_signals', default=False)
+cable_graph = ContextVar('cable_graph', default=None)
+cablepath_queue = ContextVar('cablepath_queue', default=None)
 current_request = ContextVar('current_request', default=None)
+objectchange_queue = ContextVar('objectchange_queue', default=None)
 webhooks_queue = ContextVar('webhooks_queue', default=[])
+search_queue = ContextVar('search_queue', default=None)
@@ -0,0 +1,89 @@
+import logging
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.choices import JobStatusChoices
+from extras.context_managers import change_logging, flush_objectchanges
+from extras.signals import clear_webhooks
+from utilities.exceptions import AbortRequest, PermissionsViolation
+from utilities.forms.bulk_import import RelatedObjectResolver
+from utilities.mptt import delay_tree_updates
+from .constants import IMPORT_BATCH_SIZE
+
+__all__ = (
+    'run_bulk_import',
+)
+
+logger = logging.getLogger('netbox.jobs')
+
+
+def run_bulk_import(job, view, records, headers, request, batch_size=IMPORT_BATCH_SIZE, **kwargs):
+    """
+    Import objects in bulk as a background job, using the given BulkImportView class. Related objects are resolved
+    for all records up front, and the records are then validated and saved in batches, each within its own
+    transaction. The numbers of objects created and updated are recorded in the job's data as each batch is committed.
+    If a record is invalid, the job is terminated and the errors recorded; batches already committed are retained.
+    """
+    job.data = {
+        'total': len(records),
+        'created': 0,
+        'updated': 0,
+    }
+    job.start()
+
+    # Initialize the view for the requesting user, enforcing permissions as its dispatch() would
+    view = view()
+    view.setup(request)
+    view.queryset = view.get_queryset(request)
+    if not view.has_permission():
+        job.data['errors'] = [f"User {request.user} does not have permission to import these objects"]
+        job.terminate(status=JobStatusChoices.STATUS_ERRORED)
+        return
+
+    resolver = RelatedObjectResolver(records)
+
+    for offset in range(0, len(records), batch_size):
+        batch = records[offset:offset + batch_size]
+        update_count = sum(1 for record in batch if record.get('id'))
+        errors = None
+
+        # Defer the maintenance of any MPTT trees only if the batch creates new objects exclusively (see
+        # delay_tree_updates())
+        tree_models = [] if update_count else [view.queryset.model]
+
+        with change_logging(request):
+            try:
+                with transaction.atomic(), delay_tree_updates(*tree_models):
+                    saved_objects = view.import_records(
+                        batch, headers, request, resolver=resolver, offset=offset
+                    )
+
+                    # Enforce object-level permissions
+                    saved_pks = [obj.pk for obj in saved_objects]
+                    if view.queryset.filter(pk__in=saved_pks).count() != len(saved_pks):
+                        raise PermissionsViolation
+
+                    # Record the changes within the transaction
+                    flush_objectchanges()
+            except ValidationError as e:
+                errors = e.messages
+            except (AbortRequest, PermissionsViolation) as e:
+                errors = [e.message]
+            except Exception as e:
+                logger.error(f"Error importing records {offset + 1}-{offset + len(batch)}: {e}")
+                errors = [f"{type(e).__name__}: {e}"]
+
+            if errors:
+                clear_webhooks.send(sender=view)
+
+        if errors:
+            job.data['errors'] = errors
+            job.terminate(status=JobStatusChoices.STATUS_ERRORED)
+            return
+
+        job.data['created'] += len(saved_objects) - update_count
+        job.data['updated'] += update_count
+        job.save(update_fields=['data'])
+
+    job.terminate()
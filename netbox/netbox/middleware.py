@@ -11,7 +11,7 @@ from django.db.utils import InternalError
 from django.http import Http404, HttpResponseRedirect
 
 from extras.context_managers import change_logging
-from netbox.config import clear_config, get_config
+from netbox.config import get_config
 from netbox.views import handler_500
 from utilities.api import is_api_request, rest_api_server_error
 
@@ -53,9 +53,6 @@ class CoreMiddleware:
         if is_api_request(request):
             response['API-Version'] = settings.REST_FRAMEWORK_VERSION
 
-        # Clear any cached dynamic config parameters after each request.
-        clear_config()
-
         return response
 
     def process_exception(self, request, exception):
@@ -2,6 +2,7 @@ import json
 from collections import defaultdict
 from functools import cached_property
 
+from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.core.validators import ValidationError
@@ -161,8 +162,9 @@ class CustomFieldsMixin(models.Model):
         {'primary_site': <Site: DM-NYC>, 'cust_id': 'DMI01', 'is_active': True}
         ```
         """
+        objects = self._get_custom_field_objects(self.custom_fields)
         return {
-            cf.name: cf.deserialize(self.custom_field_data.get(cf.name))
+            cf.name: cf.deserialize(self.custom_field_data.get(cf.name), objects)
             for cf in self.custom_fields
         }
 
@@ -180,6 +182,17 @@ class CustomFieldsMixin(models.Model):
         from extras.models import CustomField
         return CustomField.objects.get_for_model(self)
 
+    def _get_custom_field_objects(self, custom_fields):
+        """
+        Return the objects referenced by this instance's object and multi-object custom fields. These are taken from
+        the objects resolved for a set of instances (e.g. a page of results) by prefetch_custom_field_objects(), if
+        any; otherwise each type of object is retrieved with a single query.
+        """
+        from extras.models import resolve_custom_field_objects
+        if (objects := getattr(self, '_custom_field_objects', None)) is not None:
+            return objects
+        return resolve_custom_field_objects([self], custom_fields)
+
     def get_custom_fields(self, omit_hidden=False):
         """
         Return a dictionary of custom fields for a single object in the form `{field: value}`.
@@ -195,14 +208,16 @@ class CustomFieldsMixin(models.Model):
         """
         from extras.models import CustomField
         data = {}
+        custom_fields = CustomField.objects.get_for_model(self)
+        objects = self._get_custom_field_objects(custom_fields)
 
-        for field in CustomField.objects.get_for_model(self):
+        for field in custom_fields:
             # Skip fields that are hidden if 'omit_hidden' is set
             if omit_hidden and field.ui_visibility == CustomFieldVisibilityChoices.VISIBILITY_HIDDEN:
                 continue
 
             value = self.custom_field_data.get(field.name)
-            data[field] = field.deserialize(value)
+            data[field] = field.deserialize(value, objects)
 
         return data
 
@@ -225,9 +240,11 @@ class CustomFieldsMixin(models.Model):
             ui_visibility=CustomFieldVisibilityChoices.VISIBILITY_HIDDEN
         )
 
+        objects = self._get_custom_field_objects(visible_custom_fields)
+
         for cf in visible_custom_fields:
             value = self.custom_field_data.get(cf.name)
-            value = cf.deserialize(value)
+            value = cf.deserialize(value, objects)
             groups[cf.group_name][cf] = value
 
         return dict(groups)
@@ -250,6 +267,10 @@ class CustomFieldsMixin(models.Model):
         # Validate all field values
         for field_name, value in self.custom_field_data.items():
             if field_name not in custom_fields:
+                # The data of a deleted (or renamed) field persists until the background job updating all objects'
+                # custom field data has run
+                if settings.CUSTOM_FIELD_DATA_JOBS:
+                    continue
                 raise ValidationError(f"Unknown field name '{field_name}' in custom field data.")
             try:
                 custom_fields[field_name].validate(value)
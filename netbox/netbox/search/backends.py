@@ -1,16 +1,23 @@
+import re
 from collections import defaultdict
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models import F, Window, Q
-from django.db.models.functions import window
+from django.db.models import F, FloatField, Max, OuterRef, Subquery, TextField, Value, Window, Q
+from django.db.models.functions import Coalesce, window
 from django.db.models.signals import post_delete, post_save
 from django.utils.module_loading import import_string
+from django_rq import get_queue
 import netaddr
 from netaddr.core import AddrFormatError
 
 from extras.models import CachedValue, CustomField
+from netbox.config import get_config
+from netbox.constants import RQ_QUEUE_DEFAULT
+from netbox.context import search_queue
+from netbox.signals import post_bulk_create
 from netbox.registry import registry
 from utilities.querysets import RestrictedPrefetch
 from utilities.utils import title
@@ -18,6 +25,7 @@ from . import FieldTypes, LookupTypes, get_indexer
 
 DEFAULT_LOOKUP_TYPE = LookupTypes.PARTIAL
 MAX_RESULTS = 1000
+FLUSH_BATCH_SIZE = 2000
 
 
 class SearchBackend:
@@ -58,14 +66,46 @@ class SearchBackend:
         """
         Receiver for the post_save signal, responsible for caching object creation/changes.
         """
+        if self.defer(instance):
+            return
         self.cache(instance, remove_existing=not created)
 
+    def bulk_caching_handler(self, sender, instances, **kwargs):
+        """
+        Receiver for the post_bulk_create signal, responsible for caching the creation of multiple objects.
+        """
+        instances = [instance for instance in instances if not self.defer(instance)]
+        if instances:
+            self.cache(instances, remove_existing=False)
+
     def removal_handler(self, sender, instance, **kwargs):
         """
         Receiver for the post_delete signal, responsible for caching object deletion.
         """
+        if self.defer(instance):
+            return
         self.remove(instance)
 
+    def defer(self, instance):
+        """
+        Record an instance for deferred reindexing if a search queue is active for the current context. Returns True
+        if the instance does not need to be cached immediately.
+        """
+        queue = search_queue.get()
+        if queue is None:
+            return False
+
+        try:
+            get_indexer(instance)
+        except KeyError:
+            # Not a cacheable object
+            return True
+
+        label = f'{instance._meta.app_label}.{instance._meta.model_name}'
+        queue.setdefault(label, set()).add(instance.pk)
+
+        return True
+
     def cache(self, instances, indexer=None, remove_existing=True):
         """
         Create or update the cached representation of an instance.
@@ -78,6 +118,20 @@ class SearchBackend:
         """
         raise NotImplementedError
 
+    def flush(self, queue):
+        """
+        Refresh the cached representations of all objects recorded in a search queue, which maps model labels to sets
+        of primary keys. Objects which no longer exist are removed from the cache.
+        """
+        raise NotImplementedError
+
+    def get_stale_objects(self, queryset):
+        """
+        Filter a queryset to return only those objects whose cached representations predate their most recent
+        change. Backends which cannot determine this should return the queryset unmodified.
+        """
+        return queryset
+
     def clear(self, object_types=None):
         """
         Delete *all* cached data (optionally filtered by object type).
@@ -101,8 +155,10 @@ class SearchBackend:
 
 class CachedValueSearchBackend(SearchBackend):
 
-    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
-
+    def get_query_filter(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        """
+        Return a Q object matching the cached values for the given search value and lookup type.
+        """
         query_filter = Q(**{f'value__{lookup}': value})
 
         if object_types:
@@ -119,6 +175,11 @@ class CachedValueSearchBackend(SearchBackend):
             except (AddrFormatError, ValueError):
                 pass
 
+        return query_filter
+
+    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        query_filter = self.get_query_filter(value, object_types=object_types, lookup=lookup)
+
         # Construct the base queryset to retrieve matching results
         queryset = CachedValue.objects.filter(query_filter).annotate(
             # Annotate the rank of each result for its object according to its weight
@@ -129,6 +190,12 @@ class CachedValueSearchBackend(SearchBackend):
             )
         )[:MAX_RESULTS]
 
+        return self._get_results(queryset, user=user)
+
+    def _get_results(self, queryset, user=None, ordering=None):
+        """
+        Evaluate a windowed CachedValue queryset, returning only the top-ranked result for each object.
+        """
         # Construct a Prefetch to pre-fetch only those related objects for which the
         # user has permission to view.
         if user:
@@ -139,10 +206,10 @@ class CachedValueSearchBackend(SearchBackend):
         # Wrap the base query to return only the lowest-weight result for each object
         # Hat-tip to https://blog.oyam.dev/django-filter-by-window-function/ for the solution
         sql, params = queryset.query.sql_with_params()
-        results = CachedValue.objects.prefetch_related(*prefetch).raw(
-            f"SELECT * FROM ({sql}) t WHERE row_number = 1",
-            params
-        )
+        sql = f"SELECT * FROM ({sql}) t WHERE row_number = 1"
+        if ordering:
+            sql += f" ORDER BY {ordering}"
+        results = CachedValue.objects.prefetch_related(*prefetch).raw(sql, params)
 
         # Omit any results pertaining to an object the user does not have permission to view
         ret = []
@@ -184,16 +251,7 @@ class CachedValueSearchBackend(SearchBackend):
 
             # Generate cache data
             for field in indexer.to_cache(instance, custom_fields=custom_fields):
-                buffer.append(
-                    CachedValue(
-                        object_type=content_type,
-                        object_id=instance.pk,
-                        field=field.name,
-                        type=field.type,
-                        weight=field.weight,
-                        value=field.value
-                    )
-                )
+                buffer.append(self.get_cached_value(content_type, instance, field))
 
             # Check whether the buffer needs to be flushed
             if len(buffer) >= 2000:
@@ -206,6 +264,19 @@ class CachedValueSearchBackend(SearchBackend):
 
         return counter
 
+    def get_cached_value(self, content_type, instance, field):
+        """
+        Return an unsaved CachedValue representing a single field (an ObjectFieldValue) of the given instance.
+        """
+        return CachedValue(
+            object_type=content_type,
+            object_id=instance.pk,
+            field=field.name,
+            type=field.type,
+            weight=field.weight,
+            value=field.value
+        )
+
     def remove(self, instance):
         # Avoid attempting to query for non-cacheable objects
         try:
@@ -219,6 +290,49 @@ class CachedValueSearchBackend(SearchBackend):
         # Call _raw_delete() on the queryset to avoid first loading instances into memory
         return qs._raw_delete(using=qs.db)
 
+    def flush(self, queue):
+        counter = 0
+
+        for label, pks in queue.items():
+            try:
+                indexer = registry['search'][label]
+            except KeyError:
+                continue
+            content_type = ContentType.objects.get_for_model(indexer.model)
+            pks = list(pks)
+
+            for i in range(0, len(pks), FLUSH_BATCH_SIZE):
+                batch = pks[i:i + FLUSH_BATCH_SIZE]
+
+                # Wipe out any previously cached values for the batch of objects
+                qs = CachedValue.objects.filter(object_type=content_type, object_id__in=batch)
+                qs._raw_delete(using=qs.db)
+
+                # Cache the objects which still exist
+                counter += self.cache(
+                    indexer.model.objects.filter(pk__in=batch).iterator(),
+                    indexer=indexer,
+                    remove_existing=False
+                )
+
+        return counter
+
+    def get_stale_objects(self, queryset):
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        cache_timestamp = CachedValue.objects.filter(
+            object_type=content_type,
+            object_id=OuterRef('pk')
+        ).order_by().values('object_id').annotate(
+            timestamp=Max('timestamp')
+        ).values('timestamp')
+
+        # Include objects which have no cached values or have been modified since they were last cached
+        return queryset.annotate(
+            cache_timestamp=Subquery(cache_timestamp)
+        ).filter(
+            Q(cache_timestamp__isnull=True) | Q(last_updated__gt=F('cache_timestamp'))
+        )
+
     def clear(self, object_types=None):
         qs = CachedValue.objects.all()
         if object_types:
@@ -238,6 +352,68 @@ class CachedValueSearchBackend(SearchBackend):
         return CachedValue.objects.count()
 
 
+class PostgresFullTextSearchBackend(CachedValueSearchBackend):
+    """
+    A variant of CachedValueSearchBackend which maintains a full text search vector alongside each cached value, and
+    ranks results using PostgreSQL's text search and trigram similarity functions. The supporting database extension
+    and indexes must first be installed by running the `migratesearchcache` management command.
+    """
+    search_config = 'simple'
+
+    @staticmethod
+    def get_search_query(value):
+        """
+        Return a raw tsquery string which prefix-matches every word in the given value, or None if the value contains
+        no searchable words.
+        """
+        words = re.findall(r'\w+', value.lower())
+        if not words:
+            return None
+        return ' & '.join(f"'{word}':*" for word in words)
+
+    def get_query_filter(self, value, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        query_filter = super().get_query_filter(value, object_types=object_types, lookup=lookup)
+
+        # For partial matches, also match on the search vector so that multi-word queries match regardless of order
+        if lookup == LookupTypes.PARTIAL and (raw_query := self.get_search_query(value)):
+            vector_filter = Q(search_vector=SearchQuery(raw_query, config=self.search_config, search_type='raw'))
+            if object_types:
+                vector_filter &= Q(object_type__in=object_types)
+            query_filter |= vector_filter
+
+        return query_filter
+
+    def search(self, value, user=None, object_types=None, lookup=DEFAULT_LOOKUP_TYPE):
+        query_filter = self.get_query_filter(value, object_types=object_types, lookup=lookup)
+
+        # Rank each result by its text search rank (if any) plus the trigram similarity of its value to the query
+        rank = TrigramWordSimilarity(value, 'value')
+        if lookup == LookupTypes.PARTIAL and (raw_query := self.get_search_query(value)):
+            search_query = SearchQuery(raw_query, config=self.search_config, search_type='raw')
+            rank += Coalesce(SearchRank(F('search_vector'), search_query), 0, output_field=FloatField())
+
+        queryset = CachedValue.objects.filter(query_filter).annotate(
+            rank=rank
+        ).annotate(
+            # Select the lowest-weight (and then highest-ranked) result for each object
+            row_number=Window(
+                expression=window.RowNumber(),
+                partition_by=[F('object_type'), F('object_id')],
+                order_by=[F('weight').asc(), F('rank').desc()],
+            )
+        ).order_by('-rank', 'weight')[:MAX_RESULTS]
+
+        return self._get_results(queryset, user=user, ordering='rank DESC, weight')
+
+    def get_cached_value(self, content_type, instance, field):
+        cached_value = super().get_cached_value(content_type, instance, field)
+        cached_value.search_vector = SearchVector(
+            Value(str(field.value), output_field=TextField()),
+            config=self.search_config
+        )
+        return cached_value
+
+
 def get_backend():
     """
     Initializes and returns the configured search backend.
@@ -251,8 +427,34 @@ def get_backend():
     return backend_cls()
 
 
+def flush_search_queue(queue):
+    """
+    Process a queue of deferred search cache updates, either immediately or by enqueuing a background job, according
+    to SEARCH_INDEXING_MODE.
+    """
+    if not queue:
+        return
+
+    if settings.SEARCH_INDEXING_MODE == 'background':
+        rq_queue_name = get_config().QUEUE_MAPPINGS.get('search', RQ_QUEUE_DEFAULT)
+        get_queue(rq_queue_name).enqueue(
+            'netbox.search.backends.process_search_queue',
+            queue={label: list(pks) for label, pks in queue.items()}
+        )
+    else:
+        process_search_queue(queue)
+
+
+def process_search_queue(queue):
+    """
+    Refresh the search cache for all objects in a queue of deferred updates.
+    """
+    return search_backend.flush(queue)
+
+
 search_backend = get_backend()
 
 # Connect handlers to the appropriate model signals
 post_save.connect(search_backend.caching_handler)
+post_bulk_create.connect(search_backend.bulk_caching_handler)
 post_delete.connect(search_backend.removal_handler)
@@ -83,6 +83,7 @@ DEPLOYMENT_ID = hashlib.sha256(SECRET_KEY.encode('utf-8')).hexdigest()[:16]
 # Set static config parameters
 ADMINS = getattr(configuration, 'ADMINS', [])
 ALLOW_TOKEN_RETRIEVAL = getattr(configuration, 'ALLOW_TOKEN_RETRIEVAL', True)
+API_TOKEN_CACHE_TIMEOUT = getattr(configuration, 'API_TOKEN_CACHE_TIMEOUT', 60)
 AUTH_PASSWORD_VALIDATORS = getattr(configuration, 'AUTH_PASSWORD_VALIDATORS', [])
 BASE_PATH = getattr(configuration, 'BASE_PATH', '')
 if BASE_PATH:
@@ -95,6 +96,8 @@ CORS_ORIGIN_WHITELIST = getattr(configuration, 'CORS_ORIGIN_WHITELIST', [])
 CSRF_COOKIE_NAME = getattr(configuration, 'CSRF_COOKIE_NAME', 'csrftoken')
 CSRF_COOKIE_SECURE = getattr(configuration, 'CSRF_COOKIE_SECURE', False)
 CSRF_TRUSTED_ORIGINS = getattr(configuration, 'CSRF_TRUSTED_ORIGINS', [])
+CUSTOM_FIELD_DATA_BATCH_SIZE = getattr(configuration, 'CUSTOM_FIELD_DATA_BATCH_SIZE', 10000)
+CUSTOM_FIELD_DATA_JOBS = getattr(configuration, 'CUSTOM_FIELD_DATA_JOBS', False)
 DATE_FORMAT = getattr(configuration, 'DATE_FORMAT', 'N j, Y')
 DATETIME_FORMAT = getattr(configuration, 'DATETIME_FORMAT', 'N j, Y g:i a')
 DEBUG = getattr(configuration, 'DEBUG', False)
@@ -142,6 +145,7 @@ REPORTS_ROOT = getattr(configuration, 'REPORTS_ROOT', os.path.join(BASE_DIR, 're
 RQ_DEFAULT_TIMEOUT = getattr(configuration, 'RQ_DEFAULT_TIMEOUT', 300)
 SCRIPTS_ROOT = getattr(configuration, 'SCRIPTS_ROOT', os.path.join(BASE_DIR, 'scripts')).rstrip('/')
 SEARCH_BACKEND = getattr(configuration, 'SEARCH_BACKEND', 'netbox.search.backends.CachedValueSearchBackend')
+SEARCH_INDEXING_MODE = getattr(configuration, 'SEARCH_INDEXING_MODE', 'immediate')
 SECURE_SSL_REDIRECT = getattr(configuration, 'SECURE_SSL_REDIRECT', False)
 SENTRY_DSN = getattr(configuration, 'SENTRY_DSN', DEFAULT_SENTRY_DSN)
 SENTRY_ENABLED = getattr(configuration, 'SENTRY_ENABLED', False)
@@ -158,6 +162,9 @@ STORAGE_BACKEND = getattr(configuration, 'STORAGE_BACKEND', None)
 STORAGE_CONFIG = getattr(configuration, 'STORAGE_CONFIG', {})
 TIME_FORMAT = getattr(configuration, 'TIME_FORMAT', 'g:i a')
 TIME_ZONE = getattr(configuration, 'TIME_ZONE', 'UTC')
+WEBHOOK_BATCH_SIZE = getattr(configuration, 'WEBHOOK_BATCH_SIZE', 1)
+WEBHOOK_RETRY_INTERVAL = getattr(configuration, 'WEBHOOK_RETRY_INTERVAL', 60)
+WEBHOOK_RETRY_MAX = getattr(configuration, 'WEBHOOK_RETRY_MAX', 0)
 ENABLE_LOCALIZATION = getattr(configuration, 'ENABLE_LOCALIZATION', False)
 
 # Check for hard-coded dynamic config parameters
@@ -178,6 +185,12 @@ if RELEASE_CHECK_URL:
     except ValidationError as err:
         raise ImproperlyConfigured(str(err))
 
+# Validate search indexing mode
+if SEARCH_INDEXING_MODE not in ('immediate', 'deferred', 'background'):
+    raise ImproperlyConfigured(
+        f"Invalid SEARCH_INDEXING_MODE: {SEARCH_INDEXING_MODE}. Must be 'immediate', 'deferred', or 'background'."
+    )
+
 
 #
 # Database
@@ -3,3 +3,7 @@ from django.dispatch import Signal
 
 # Signals that a model has completed its clean() method
 post_clean = Signal()
+
+# Signals that multiple instances of a model have been created via bulk_create(). This is sent in place of post_save
+# for each instance where batched signals have been enabled (see netbox.context.bulk_create_signals).
+post_bulk_create = Signal()
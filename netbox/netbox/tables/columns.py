@@ -464,7 +464,26 @@ class CustomFieldColumn(tables.Column):
             return f'<a href="{item.get_absolute_url()}">{escape(item)}</a>'
         return escape(item)
 
-    def render(self, value):
+    @staticmethod
+    def _get_custom_field_objects(table):
+        """
+        Resolve the objects referenced by object and multi-object custom fields for all rows in the current page of
+        the table at once, caching the result on the page (or on the table, if it is not paginated). The result is
+        also attached to each row's record, for use by its `cf` property.
+        """
+        from extras.models import prefetch_custom_field_objects
+
+        page = getattr(table, 'page', None)
+        cache = page if page is not None else table
+        if not hasattr(cache, '_custom_field_objects'):
+            rows = page.object_list if page is not None else table.rows
+            custom_fields = [
+                column.column.customfield for column in table.columns if isinstance(column.column, CustomFieldColumn)
+            ]
+            cache._custom_field_objects = prefetch_custom_field_objects([row.record for row in rows], custom_fields)
+        return cache._custom_field_objects
+
+    def render(self, value, table):
         if self.customfield.type == CustomFieldTypeChoices.TYPE_BOOLEAN and value is True:
             return mark_safe('<i class="mdi mdi-check-bold text-success"></i>')
         if self.customfield.type == CustomFieldTypeChoices.TYPE_BOOLEAN and value is False:
@@ -474,23 +493,24 @@ class CustomFieldColumn(tables.Column):
         if self.customfield.type == CustomFieldTypeChoices.TYPE_MULTISELECT:
             return ', '.join(v for v in value)
         if self.customfield.type == CustomFieldTypeChoices.TYPE_MULTIOBJECT:
+            objects = self._get_custom_field_objects(table)
             return mark_safe(', '.join(
-                self._linkify_item(obj) for obj in self.customfield.deserialize(value)
+                self._linkify_item(obj) for obj in self.customfield.deserialize(value, objects)
             ))
         if self.customfield.type == CustomFieldTypeChoices.TYPE_LONGTEXT and value:
             return render_markdown(value)
         if self.customfield.type == CustomFieldTypeChoices.TYPE_DATE and value:
             return date_format(parse_date(value), format="SHORT_DATE_FORMAT")
         if value is not None:
-            obj = self.customfield.deserialize(value)
+            obj = self.customfield.deserialize(value, self._get_custom_field_objects(table))
             return mark_safe(self._linkify_item(obj))
         return self.default
 
-    def value(self, value):
+    def value(self, value, table):
         if isinstance(value, list):
-            return ','.join(str(v) for v in self.customfield.deserialize(value))
+            return ','.join(str(v) for v in self.customfield.deserialize(value, self._get_custom_field_objects(table)))
         if value is not None:
-            return self.customfield.deserialize(value)
+            return self.customfield.deserialize(value, self._get_custom_field_objects(table))
         return self.default
 
 
@@ -1,17 +1,24 @@
+from itertools import islice
+from types import SimpleNamespace
+
 import django_tables2 as tables
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
 from django.db.models.fields.related import RelatedField
 from django.urls import reverse
 from django.urls.exceptions import NoReverseMatch
+from django.utils.encoding import force_str
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext as _
 from django_tables2.data import TableQuerysetData
+from django_tables2.rows import BoundRow
 
 from extras.models import CustomField, CustomLink
 from extras.choices import CustomFieldVisibilityChoices
+from netbox.constants import EXPORT_CHUNK_SIZE
 from netbox.tables import columns
 from utilities.paginator import EnhancedPaginator, get_paginate_count
 from utilities.utils import get_viewname, highlight_string, title
@@ -131,6 +138,27 @@ class BaseTable(tables.Table):
             self._objects_count = sum(1 for obj in self.data if hasattr(obj, 'pk'))
         return self._objects_count
 
+    def iter_export_values(self, exclude_columns=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        Yield the column headers and then the exported values of each row, as with as_values(). Rather than evaluating
+        the entire queryset at once, records are retrieved from the database in chunks, each of which is presented to
+        the columns as the current page of the table while its values are resolved.
+        """
+        exclude_columns = exclude_columns or ()
+        columns = [
+            column for column in self.columns.iterall()
+            if not (column.column.exclude_from_export or column.name in exclude_columns)
+        ]
+        yield [force_str(column.header, strings_only=True) for column in columns]
+
+        data = self.data.data
+        records = data.iterator(chunk_size=chunk_size) if isinstance(data, QuerySet) else iter(data)
+        while chunk := list(islice(records, chunk_size)):
+            rows = [BoundRow(record, table=self) for record in chunk]
+            self.page = SimpleNamespace(object_list=rows)
+            for row in rows:
+                yield [force_str(row.get_cell_value(column.name), strings_only=True) for column in columns]
+
     def configure(self, request):
         """
         Configure the table for a specific request context. This performs pagination and records
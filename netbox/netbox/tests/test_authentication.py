@@ -1,16 +1,22 @@
 import datetime
+from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth.models import Group, User
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.test import Client
 from django.test.utils import override_settings
 from django.urls import reverse
+from django.utils import timezone
 from netaddr import IPNetwork
 from rest_framework.test import APIClient
 
 from dcim.models import Site
 from ipam.models import Prefix
+from netbox.api import authentication as api_authentication
+from netbox.api.authentication import TokenAuthentication, flush_token_usage, get_token_cache_key, record_token_use
+from netbox.authentication import ObjectPermissionBackend, get_object_permissions_cache_key
 from users.models import ObjectPermission, Token
 from utilities.testing import TestCase
 from utilities.testing.api import APITestCase
@@ -32,9 +38,71 @@ class TokenAuthenticationTestCase(APITestCase):
         self.assertEqual(response.status_code, 200)
 
         # Check that the token's last_used time has been updated
+        flush_token_usage(force=True)
         token.refresh_from_db()
         self.assertIsNotNone(token.last_used)
 
+    @patch('netbox.api.authentication._last_used_timer', None)
+    @patch('netbox.api.authentication.connection')
+    @patch('netbox.api.authentication.threading.Timer')
+    def test_token_last_used_flush(self, timer, connection):
+        token = Token.objects.create(user=self.user)
+        stale_token = Token.objects.create(user=self.user)
+        stale_time = timezone.now() - datetime.timedelta(seconds=api_authentication.TOKEN_LAST_USED_INTERVAL + 1)
+        api_authentication._token_last_used[stale_token.pk] = stale_time
+
+        # Recording the use of a token schedules a flush of the pending last_used times
+        record_token_use(token)
+        timer.assert_called_once()
+        self.assertIn(token.pk, api_authentication._pending_last_used)
+
+        # The scheduled flush writes the pending times, and times which no longer defer updates are forgotten
+        api_authentication._flush_token_usage_on_timer()
+        connection.close.assert_called_once()
+        token.refresh_from_db()
+        self.assertIsNotNone(token.last_used)
+        self.assertEqual(api_authentication._pending_last_used, {})
+        self.assertIn(token.pk, api_authentication._token_last_used)
+        self.assertNotIn(stale_token.pk, api_authentication._token_last_used)
+
+        # A second use within TOKEN_LAST_USED_INTERVAL is not recorded
+        record_token_use(token)
+        self.assertEqual(api_authentication._pending_last_used, {})
+
+    @override_settings(LOGIN_REQUIRED=True, EXEMPT_VIEW_PERMISSIONS=['*'], API_TOKEN_CACHE_TIMEOUT=60)
+    def test_token_cache(self):
+        url = reverse('dcim-api:site-list')
+        token = Token.objects.create(user=self.user)
+
+        # The token is retrieved from the database only for the first request
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(0):
+            token_user = TokenAuthentication().authenticate_credentials(token.key)[0]
+        self.assertEqual(token_user, self.user)
+
+        # Deactivating the user invalidates the cached token
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 403)
+
+        # Deleting the token invalidates the cached token
+        self.user.is_active = True
+        self.user.save()
+        with self.captureOnCommitCallbacks() as callbacks:
+            token.delete()
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 403)
+
+        # Tokens cached from the previously committed state (e.g. by a concurrent request) are discarded once the
+        # transaction has been committed
+        cache.set(get_token_cache_key(token.key), (token, self.user))
+        for callback in callbacks:
+            callback()
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 403)
+
     @override_settings(LOGIN_REQUIRED=True, EXEMPT_VIEW_PERMISSIONS=['*'])
     def test_token_expiration(self):
         url = reverse('dcim-api:site-list')
@@ -591,3 +659,44 @@ class ObjectPermissionAPIViewTestCase(TestCase):
                       kwargs={'pk': self.prefixes[0].pk})
         response = self.client.delete(url, format='json', **self.header)
         self.assertEqual(response.status_code, 204)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=[])
+    def test_object_permissions_cache(self):
+        obj_perm = ObjectPermission(
+            name='Test permission',
+            constraints={'site__name': 'Site 1'},
+            actions=['view']
+        )
+        obj_perm.save()
+        obj_perm.users.add(self.user)
+        obj_perm.object_types.add(ContentType.objects.get_for_model(Prefix))
+
+        # Object permissions and their compiled constraints are retrieved from the cache once loaded
+        backend = ObjectPermissionBackend()
+        backend.get_all_permissions(User.objects.get(pk=self.user.pk))
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(backend.has_perm(user, 'ipam.view_prefix'))
+            Prefix.objects.restrict(user, 'view')
+        self.assertEqual(Prefix.objects.restrict(user, 'view').count(), 3)
+
+        # Modifying the permission invalidates the cache
+        obj_perm.constraints = {'site__name': 'Site 2'}
+        with self.captureOnCommitCallbacks() as callbacks:
+            obj_perm.save()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(
+            list(Prefix.objects.restrict(user, 'view').values_list('pk', flat=True)),
+            [prefix.pk for prefix in self.prefixes[3:6]]
+        )
+
+        # Permissions cached from the previously committed state (e.g. by a concurrent request) are discarded once the
+        # transaction has been committed
+        cache.set(get_object_permissions_cache_key(user), ({}, {}))
+        for callback in callbacks:
+            callback()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(
+            list(Prefix.objects.restrict(user, 'view').values_list('pk', flat=True)),
+            [prefix.pk for prefix in self.prefixes[3:6]]
+        )
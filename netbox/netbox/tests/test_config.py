@@ -66,3 +66,25 @@ class ConfigTestCase(TestCase):
         self.assertEqual(config.version, configrevision.pk)
 
         clear_config()
+
+    @override_settings(CACHES=CACHES)
+    def test_config_reused(self):
+        CONFIG_DATA = {'BANNER_TOP': 'C'}
+        cache.clear()
+
+        configrevision = ConfigRevision.objects.create(data=CONFIG_DATA)
+        configrevision.activate()
+
+        # The loaded configuration is retained across calls
+        config = get_config()
+        self.assertIs(get_config(), config)
+        self.assertEqual(config.BANNER_TOP, 'C')
+
+        # Activating a new revision discards the loaded configuration
+        configrevision = ConfigRevision.objects.create(data={'BANNER_TOP': 'D'})
+        configrevision.activate()
+        config = get_config()
+        self.assertEqual(config.BANNER_TOP, 'D')
+        self.assertEqual(config.version, configrevision.pk)
+
+        clear_config()
@@ -1,10 +1,20 @@
+import uuid
+from unittest.mock import patch
+
+import django_rq
 from django.contrib.contenttypes.models import ContentType
-from django.test import override_settings
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
 
+from core.choices import JobStatusChoices
+from core.models import Job
 from dcim.models import *
+from dcim.views import SiteBulkImportView
+from netbox.jobs import run_bulk_import
 from users.models import ObjectPermission
 from utilities.choices import ImportFormatChoices
-from utilities.testing import ModelViewTestCase, create_tags
+from utilities.testing import ModelViewTestCase, TestCase, create_tags
+from utilities.utils import copy_safe_request
 
 
 class CSVImportTestCase(ModelViewTestCase):
@@ -85,3 +95,125 @@ class CSVImportTestCase(ModelViewTestCase):
         # Test POST with permission
         self.assertHttpStatus(self.client.post(self._get_url('import'), data), 200)
         self.assertEqual(Region.objects.count(), 0)
+
+
+class BackgroundImportTestCase(TestCase):
+    headers = {'name': None, 'slug': None, 'status': None}
+
+    def get_records(self, count, **kwargs):
+        return [
+            {'name': f'Site {i}', 'slug': f'site-{i}', 'status': 'active', **kwargs} for i in range(1, count + 1)
+        ]
+
+    def run_import(self, records, batch_size=2):
+        """
+        Run a background import of Sites as the test user, returning the Job.
+        """
+        request = RequestFactory().post('/')
+        request.user = self.user
+        request.id = uuid.uuid4()
+        content_type = ContentType.objects.get_for_model(Site)
+        job = Job.objects.create(
+            object_type=ContentType.objects.get_for_model(ContentType),
+            object_id=content_type.pk,
+            name='Import sites',
+            user=self.user,
+            job_id=uuid.uuid4()
+        )
+        run_bulk_import(
+            job, SiteBulkImportView, records, self.headers, copy_safe_request(request), batch_size=batch_size
+        )
+        job.refresh_from_db()
+        return job
+
+    def test_import_in_batches(self):
+        self.add_permissions('dcim.add_site')
+
+        with patch.object(SiteBulkImportView, 'import_records', autospec=True,
+                          side_effect=SiteBulkImportView.import_records) as import_records:
+            job = self.run_import(self.get_records(5))
+
+        self.assertEqual(import_records.call_count, 3)
+        self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(job.data, {'total': 5, 'created': 5, 'updated': 0})
+        self.assertEqual(Site.objects.count(), 5)
+
+    def test_import_updates(self):
+        self.add_permissions('dcim.add_site', 'dcim.change_site')
+        sites = Site.objects.bulk_create(Site(name=f'Site {i}', slug=f'site-{i}') for i in range(1, 4))
+        records = [{'id': str(site.pk), 'description': 'Foo'} for site in sites]
+        records.append({'name': 'Site 4', 'slug': 'site-4', 'status': 'active'})
+
+        job = self.run_import(records)
+
+        self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(job.data, {'total': 4, 'created': 1, 'updated': 3})
+        self.assertEqual(Site.objects.filter(description='Foo').count(), 3)
+
+    def test_import_invalid_record(self):
+        self.add_permissions('dcim.add_site')
+        records = self.get_records(5)
+        records[2]['status'] = 'invalid'
+
+        job = self.run_import(records)
+
+        # The job fails at the invalid record, retaining the batches already committed
+        self.assertEqual(job.status, JobStatusChoices.STATUS_ERRORED)
+        self.assertEqual(job.data['created'], 2)
+        self.assertEqual(len(job.data['errors']), 1)
+        self.assertTrue(job.data['errors'][0].startswith('Record 3 status:'))
+        self.assertEqual(sorted(Site.objects.values_list('name', flat=True)), ['Site 1', 'Site 2'])
+
+    def test_import_without_permission(self):
+        job = self.run_import(self.get_records(2))
+
+        self.assertEqual(job.status, JobStatusChoices.STATUS_ERRORED)
+        self.assertEqual(job.data['errors'], [f"User {self.user} does not have permission to import these objects"])
+        self.assertFalse(Site.objects.exists())
+
+    def test_import_with_constrained_permission(self):
+        obj_perm = ObjectPermission(name='Test permission', constraints={'name': 'Site 1'}, actions=['add'])
+        obj_perm.save()
+        obj_perm.users.add(self.user)
+        obj_perm.object_types.add(ContentType.objects.get_for_model(Site))
+
+        job = self.run_import(self.get_records(2))
+
+        # Sites which violate the permission's constraints are not imported
+        self.assertEqual(job.status, JobStatusChoices.STATUS_ERRORED)
+        self.assertEqual(job.data['created'], 0)
+        self.assertEqual(job.data['errors'], ["Operation failed due to object-level permissions violation"])
+        self.assertFalse(Site.objects.exists())
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=['*'], QUEUE_MAPPINGS={'contenttype': 'low'})
+    def test_import_view_background_job(self):
+        self.add_permissions('dcim.add_site')
+        url = reverse('dcim:site_import')
+        data = {
+            'format': ImportFormatChoices.CSV,
+            'data': 'name,slug,status\nSite 1,site-1,active\nSite 2,site-2,active',
+            'background_job': True,
+        }
+        queue = django_rq.get_queue('low')
+        queue.empty()
+
+        # The job must not be enqueued if no worker is running for the queue to which it is assigned
+        with patch('netbox.views.generic.bulk_views.get_workers_for_queue', return_value=0) as get_workers:
+            response = self.client.post(url, data)
+        get_workers.assert_called_once_with('low')
+        self.assertHttpStatus(response, 200)
+        self.assertFalse(Job.objects.exists())
+
+        with patch('netbox.views.generic.bulk_views.get_workers_for_queue', return_value=1):
+            response = self.client.post(url, data)
+        job = Job.objects.get()
+        self.assertRedirects(response, job.get_absolute_url(), fetch_redirect_response=False)
+        self.assertFalse(Site.objects.exists())
+
+        # Run the job enqueued on the queue
+        rq_job = queue.fetch_job(str(job.job_id))
+        self.assertEqual(rq_job.kwargs['records'], self.get_records(2))
+        rq_job.func(**rq_job.kwargs)
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatusChoices.STATUS_COMPLETED)
+        self.assertEqual(sorted(Site.objects.values_list('name', flat=True)), ['Site 1', 'Site 2'])
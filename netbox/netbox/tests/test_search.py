@@ -1,10 +1,22 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.search import SearchQuery
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
 
 from dcim.models import Site
 from dcim.search import SiteIndex
+from extras.management.commands.reindex import CHECKPOINT_CACHE_KEY, reindex_chunk
 from extras.models import CachedValue
-from netbox.search.backends import search_backend
+from netbox.context import search_queue
+from netbox.search import LookupTypes
+from netbox.search.backends import PostgresFullTextSearchBackend, search_backend
 
 
 class SearchBackendTestCase(TestCase):
@@ -151,3 +163,232 @@ class SearchBackendTestCase(TestCase):
         self.assertEqual(len(results), 1)
         results = search_backend.search('xxxxx')
         self.assertEqual(len(results), 0)
+
+    def test_deferred_caching(self):
+        """
+        Test that objects saved or deleted while a search queue is active are reindexed only when the queue is flushed.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+        deleted_site = Site.objects.first()
+        search_backend.cache(deleted_site)
+
+        token = search_queue.set({})
+        try:
+            site = Site(name='Site 4', slug='site-4')
+            site.save()
+            deleted_site_pk = deleted_site.pk
+            deleted_site.delete()
+            queue = search_queue.get()
+        finally:
+            search_queue.reset(token)
+
+        self.assertEqual(queue, {'dcim.site': {site.pk, deleted_site_pk}})
+        self.assertFalse(
+            CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists()
+        )
+        self.assertTrue(
+            CachedValue.objects.filter(object_type=content_type, object_id=deleted_site_pk).exists()
+        )
+
+        search_backend.flush(queue)
+        self.assertTrue(
+            CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists()
+        )
+        self.assertFalse(
+            CachedValue.objects.filter(object_type=content_type, object_id=deleted_site_pk).exists()
+        )
+
+    def test_get_stale_objects(self):
+        """
+        Test that only objects which are uncached or modified since being cached are identified as stale.
+        """
+        sites = Site.objects.all()
+        search_backend.cache(sites)
+        self.assertFalse(search_backend.get_stale_objects(Site.objects.all()).exists())
+
+        # Modify one site without updating its cached values
+        site = sites.first()
+        Site.objects.filter(pk=site.pk).update(last_updated=timezone.now() + timedelta(minutes=1))
+        self.assertListEqual(
+            list(search_backend.get_stale_objects(Site.objects.all()).values_list('pk', flat=True)),
+            [site.pk]
+        )
+
+
+class PostgresFullTextSearchBackendTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # The trigram similarity functions used to rank results are provided by the pg_trgm extension
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+        sites = (
+            Site(
+                name='Site 1',
+                slug='site-1',
+                facility='Alpha',
+                description='First test site',
+                physical_address='123 Fake St Lincoln NE 68588'
+            ),
+            Site(
+                name='Site 2',
+                slug='site-2',
+                facility='Bravo',
+                description='Second test site',
+                physical_address='725 Cyrus Valleys Suite 761 Douglasfort NE 57761'
+            ),
+            Site(
+                name='Site 3',
+                slug='site-3',
+                facility='Alphabet Soup',
+                description='Third test site',
+                physical_address='2321 Dovie Dale East Cristobal AK 71959'
+            ),
+        )
+        Site.objects.bulk_create(sites)
+
+    def setUp(self):
+        self.backend = PostgresFullTextSearchBackend()
+        self.backend.cache(Site.objects.all())
+        self.sites = {site.name: site for site in Site.objects.all()}
+
+    def test_cache(self):
+        """
+        Test that a search vector is recorded for each cached value.
+        """
+        content_type = ContentType.objects.get_for_model(Site)
+        cached_values = CachedValue.objects.filter(object_type=content_type)
+        self.assertEqual(cached_values.count(), len(SiteIndex.fields) * 3)
+        self.assertFalse(cached_values.filter(search_vector__isnull=True).exists())
+
+        # The search vector matches each word of the cached value
+        search_query = SearchQuery('cyrus & douglasfort', config='simple', search_type='raw')
+        matches = cached_values.filter(search_vector=search_query)
+        self.assertEqual(
+            list(matches.values_list('object_id', 'field')),
+            [(self.sites['Site 2'].pk, 'physical_address')]
+        )
+
+    def test_search(self):
+        """
+        Test that partial searches match each word of the query as a prefix, in any order.
+        """
+        results = self.backend.search('site first')
+        self.assertEqual([r.object for r in results], [self.sites['Site 1']])
+        results = self.backend.search('doug cyr')
+        self.assertEqual([r.object for r in results], [self.sites['Site 2']])
+        self.assertEqual(results[0].field, 'physical_address')
+        self.assertEqual(len(self.backend.search('site')), 3)
+        self.assertEqual(len(self.backend.search('xxxxx')), 0)
+        self.assertEqual(len(self.backend.search('&|!')), 0)
+
+    def test_search_ranking(self):
+        """
+        Test that results are ranked by the similarity of their values to the query.
+        """
+        results = self.backend.search('alpha')
+        self.assertEqual([r.object for r in results], [self.sites['Site 1'], self.sites['Site 3']])
+        self.assertGreater(results[0].rank, results[1].rank)
+
+        # Only the lowest-weight matching value is returned for each object
+        results = self.backend.search('site 2')
+        self.assertEqual([r.object for r in results], [self.sites['Site 2']])
+        self.assertEqual(results[0].field, 'name')
+
+    def test_search_lookups(self):
+        """
+        Test that lookups other than partial matches do not match on the search vector.
+        """
+        results = self.backend.search('alpha', lookup=LookupTypes.EXACT)
+        self.assertEqual([r.object for r in results], [self.sites['Site 1']])
+        self.assertEqual(len(self.backend.search('site first', lookup=LookupTypes.EXACT)), 0)
+        self.assertEqual(len(self.backend.search('alpha', lookup=LookupTypes.STARTSWITH)), 2)
+        self.assertEqual(len(self.backend.search('test site', lookup=LookupTypes.ENDSWITH)), 3)
+
+        # Results are limited to the specified object types
+        device_type = ContentType.objects.get_by_natural_key('dcim', 'device')
+        self.assertEqual(len(self.backend.search('site first', object_types=[device_type])), 0)
+
+    def test_remove(self):
+        """
+        Test that removing an object deletes its cached values, and thus omits it from search results.
+        """
+        site = self.sites['Site 1']
+        self.backend.remove(site)
+
+        content_type = ContentType.objects.get_for_model(Site)
+        self.assertFalse(CachedValue.objects.filter(object_type=content_type, object_id=site.pk).exists())
+        self.assertEqual(len(self.backend.search('site first')), 0)
+        self.assertEqual(len(self.backend.search('site')), 2)
+
+    def test_get_search_query(self):
+        """
+        Test the construction of prefix-matching text search queries.
+        """
+        self.assertEqual(
+            PostgresFullTextSearchBackend.get_search_query('First Site'),
+            "'first':* & 'site':*"
+        )
+        self.assertEqual(
+            PostgresFullTextSearchBackend.get_search_query("site-1 & 'x'"),
+            "'site':* & '1':* & 'x':*"
+        )
+        self.assertIsNone(
+            PostgresFullTextSearchBackend.get_search_query('&|!')
+        )
+
+
+class ReindexCommandTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Site.objects.bulk_create([
+            Site(name=f'Site {i}', slug=f'site-{i}') for i in range(1, 8)
+        ])
+
+    def test_interrupt_and_resume(self):
+        """
+        Test that an interrupted reindex resumes from the last completed chunk.
+        """
+        cache.delete(CHECKPOINT_CACHE_KEY)
+        content_type = ContentType.objects.get_for_model(Site)
+        chunk_size = 2
+        started = []
+
+        def reindex(label, start, end, lazy=False):
+            # Interrupt the reindex once two chunks have been completed
+            if len(started) == 2:
+                raise RuntimeError('Interrupted')
+            started.append(start)
+            return reindex_chunk(label, start, end, lazy=lazy)
+
+        with patch('extras.management.commands.reindex.reindex_chunk', reindex):
+            with self.assertRaises(RuntimeError):
+                call_command('reindex', 'dcim.site', chunk_size=chunk_size, stdout=StringIO())
+
+        # The checkpoint records the primary key below which all chunks have been completed
+        first = Site.objects.order_by('pk').first().pk // chunk_size * chunk_size
+        cursor = cache.get(CHECKPOINT_CACHE_KEY)['cursors']['dcim.site']
+        self.assertEqual(started, [first, first + chunk_size])
+        self.assertEqual(cursor, first + 2 * chunk_size)
+        self.assertSetEqual(
+            set(CachedValue.objects.filter(object_type=content_type).values_list('object_id', flat=True)),
+            set(Site.objects.filter(pk__lt=cursor).values_list('pk', flat=True))
+        )
+
+        # Deleting the first site does not shift the boundaries of the remaining chunks
+        Site.objects.order_by('pk').first().delete()
+
+        # Resuming the reindex processes only the chunks which have not been completed
+        started.clear()
+        with patch('extras.management.commands.reindex.reindex_chunk', side_effect=reindex_chunk) as mock:
+            call_command('reindex', 'dcim.site', chunk_size=chunk_size, resume=True, stdout=StringIO())
+        starts = [call.args[1] for call in mock.call_args_list]
+        self.assertTrue(starts)
+        self.assertTrue(all(start >= cursor and start % chunk_size == 0 for start in starts))
+        self.assertSetEqual(
+            set(CachedValue.objects.filter(object_type=content_type).values_list('object_id', flat=True)),
+            set(Site.objects.values_list('pk', flat=True))
+        )
+        self.assertIsNone(cache.get(CHECKPOINT_CACHE_KEY))
@@ -9,7 +9,7 @@ from extras.plugins.urls import plugin_admin_patterns, plugin_patterns, plugin_a
 from netbox.api.views import APIRootView, StatusView
 from netbox.graphql.schema import schema
 from netbox.graphql.views import GraphQLView
-from netbox.views import HomeView, StaticMediaFailureView, SearchView, htmx
+from netbox.views import HomeView, MetricsView, StaticMediaFailureView, SearchView, htmx
 from users.views import LoginView, LogoutView
 from .admin import admin_site
 
@@ -82,7 +82,7 @@ if settings.DEBUG:
 
 if settings.METRICS_ENABLED:
     _patterns += [
-        path('', include('django_prometheus.urls')),
+        path('metrics', MetricsView.as_view(), name='prometheus-django-metrics'),
     ]
 
 # Prepend BASE_PATH
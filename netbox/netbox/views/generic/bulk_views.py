@@ -9,21 +9,26 @@ from django.db import transaction, IntegrityError
 from django.db.models import ManyToManyField, ProtectedError
 from django.db.models.fields.reverse_related import ManyToManyRel
 from django.forms import ModelMultipleChoiceField, MultipleHiddenInput
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from django_tables2.export import TableExport
 
+from core.models import Job
+from extras.context_managers import flush_objectchanges
 from extras.models import ExportTemplate
 from extras.signals import clear_webhooks
+from netbox.constants import EXPORT_CHUNK_SIZE
+from netbox.jobs import run_bulk_import
 from utilities.error_handlers import handle_protectederror
 from utilities.exceptions import AbortRequest, AbortTransaction, PermissionsViolation
 from utilities.forms import BulkRenameForm, ConfirmationForm, restrict_form_fields
-from utilities.forms.bulk_import import BulkImportForm
+from utilities.forms.bulk_import import BulkImportForm, RelatedObjectResolver
 from utilities.htmx import is_embedded, is_htmx
+from utilities.mptt import delay_tree_updates
 from utilities.permissions import get_permission_for_model
-from utilities.utils import get_viewname
+from utilities.rqworker import get_queue_for_model, get_workers_for_queue
+from utilities.utils import copy_safe_request, get_viewname, iter_csv
 from utilities.views import GetReturnURLMixin
 from .base import BaseMultiObjectView
 from .mixins import ActionsMixin, TableMixin
@@ -64,15 +69,17 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
 
     def export_yaml(self):
         """
-        Export the queryset of objects as concatenated YAML documents.
+        Export the queryset of objects as concatenated YAML documents, yielding each document in turn. Objects are
+        retrieved from the database in chunks.
         """
-        yaml_data = [obj.to_yaml() for obj in self.queryset]
-
-        return '---\n'.join(yaml_data)
+        for i, obj in enumerate(self.queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+            if i:
+                yield '---\n'
+            yield obj.to_yaml()
 
     def export_table(self, table, columns=None, filename=None):
         """
-        Export all table data in CSV format.
+        Export all table data in CSV format. The response is streamed, with rows retrieved from the database in chunks.
 
         Args:
             table: The Table instance to export
@@ -86,14 +93,14 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
             exclude_columns.update({
                 col for col in all_columns if col not in columns
             })
-        exporter = TableExport(
-            export_format=TableExport.CSV,
-            table=table,
-            exclude_columns=exclude_columns
-        )
-        return exporter.response(
-            filename=filename or f'netbox_{self.queryset.model._meta.verbose_name_plural}.csv'
+        response = StreamingHttpResponse(
+            iter_csv(table.iter_export_values(exclude_columns=exclude_columns)),
+            content_type='text/csv; charset=utf-8'
         )
+        filename = filename or f'netbox_{self.queryset.model._meta.verbose_name_plural}.csv'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        return response
 
     def export_template(self, template, request):
         """
@@ -148,7 +155,7 @@ class ObjectListView(BaseMultiObjectView, ActionsMixin, TableMixin):
 
             # Check for YAML export support on the model
             elif hasattr(model, 'to_yaml'):
-                response = HttpResponse(self.export_yaml(), content_type='text/yaml')
+                response = StreamingHttpResponse(self.export_yaml(), content_type='text/yaml')
                 filename = 'netbox_{}.yaml'.format(self.queryset.model._meta.verbose_name_plural)
                 response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
                 return response
@@ -263,6 +270,9 @@ class BulkCreateView(GetReturnURLMixin, BaseMultiObjectView):
                     if self.queryset.filter(pk__in=[obj.pk for obj in new_objs]).count() != len(new_objs):
                         raise PermissionsViolation
 
+                    # Record the changes within the transaction
+                    flush_objectchanges()
+
                 # If we make it to this point, validation has succeeded on all new objects.
                 msg = f"Added {len(new_objs)} {model._meta.verbose_name_plural}"
                 logger.info(msg)
@@ -315,13 +325,9 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
 
     def _save_object(self, model_form, request):
 
-        # Save the primary object
+        # Save the primary object. (Object-level permissions are enforced for all imported objects once saved.)
         obj = self.save_object(model_form, request)
 
-        # Enforce object-level permissions
-        if not self.queryset.filter(pk=obj.pk).first():
-            raise PermissionsViolation()
-
         # Iterate through the related object forms (if any), validating and saving each instance.
         for field_name, related_object_form in self.related_object_forms.items():
 
@@ -363,9 +369,36 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
         return object_form.save()
 
     def create_and_update_objects(self, form, request):
-        saved_objects = []
-
         records = list(form.cleaned_data['data'])
+        headers = getattr(form, '_csv_headers', None)
+
+        # Defer the maintenance of any MPTT trees until all records have been saved. This applies only to the creation
+        # of new objects: Existing objects may be moved within their trees, which cannot be deferred.
+        tree_models = [] if any(record.get('id') for record in records) else [self.queryset.model]
+
+        try:
+            with delay_tree_updates(*tree_models):
+                return self.import_records(records, headers, request)
+        except ValidationError as e:
+            # Replicate errors on the import form for display
+            form.add_error(None, e)
+            raise ValidationError("")
+
+    def import_records(self, records, headers, request, resolver=None, offset=0):
+        """
+        Create or update an object from each of the given records, returning the saved objects. Raises a
+        ValidationError describing the errors for the first invalid record encountered.
+
+        Args:
+            records: A list of dictionaries, each representing an object
+            headers: A dictionary mapping CSV column headers to the accessors of related objects (if any)
+            request: The current request
+            resolver: The RelatedObjectResolver used to look up related objects. If None, related objects are resolved
+                for the given records only.
+            offset: The number of records preceding those given, used to number records in error messages
+        """
+        saved_objects = []
+        resolver = resolver or RelatedObjectResolver(records)
 
         # Prefetch objects to be updated, if any
         prefetch_ids = [int(record['id']) for record in records if record.get('id')]
@@ -374,7 +407,7 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
             for obj in self.queryset.model.objects.filter(id__in=prefetch_ids)
         } if prefetch_ids else {}
 
-        for i, record in enumerate(records, start=1):
+        for i, record in enumerate(records, start=offset + 1):
             instance = None
             object_id = int(record.pop('id')) if record.get('id') else None
 
@@ -383,16 +416,17 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
                 try:
                     instance = prefetched_objects[object_id]
                 except KeyError:
-                    form.add_error('data', f"Row {i}: Object with ID {object_id} does not exist")
-                    raise ValidationError('')
+                    raise ValidationError({
+                        'data': f"Row {i}: Object with ID {object_id} does not exist"
+                    })
 
             # Instantiate the model form for the object
             model_form_kwargs = {
                 'data': record,
                 'instance': instance,
             }
-            if hasattr(form, '_csv_headers'):
-                model_form_kwargs['headers'] = form._csv_headers  # Add CSV headers
+            if headers is not None:
+                model_form_kwargs['headers'] = headers  # Add CSV headers
             model_form = self.model_form(**model_form_kwargs)
 
             # When updating, omit all form fields other than those specified in the record. (No
@@ -403,20 +437,22 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
                     del model_form.fields[field_name]
 
             restrict_form_fields(model_form, request.user)
+            resolver.bind(model_form)
 
             if model_form.is_valid():
                 obj = self._save_object(model_form, request)
                 saved_objects.append(obj)
             else:
                 # Replicate model form errors for display
-                for field, errors in model_form.errors.items():
-                    for err in errors:
+                errors = []
+                for field, field_errors in model_form.errors.items():
+                    for err in field_errors:
                         if field == '__all__':
-                            form.add_error(None, f'Record {i}: {err}')
+                            errors.append(f'Record {i}: {err}')
                         else:
-                            form.add_error(None, f'Record {i} {field}: {err}')
+                            errors.append(f'Record {i} {field}: {err}')
 
-                raise ValidationError("")
+                raise ValidationError(errors)
 
         return saved_objects
 
@@ -440,7 +476,31 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
         model = self.model_form._meta.model
         form = BulkImportForm(request.POST, request.FILES)
 
-        if form.is_valid():
+        if form.is_valid() and form.cleaned_data['background_job']:
+            logger.debug("Import form validation was successful; enqueuing background job")
+
+            # Allow execution only if an RQ worker process is running. The job pertains to the model's ContentType, so
+            # is assigned to the queue for ContentTypes (see Job.enqueue()).
+            content_type = ContentType.objects.get_for_model(model)
+            if not get_workers_for_queue(get_queue_for_model(ContentType._meta.model_name)):
+                form.add_error(None, "Unable to import in the background: RQ worker process not running.")
+
+            else:
+                job = Job.enqueue(
+                    run_bulk_import,
+                    instance=content_type,
+                    name=f"Import {model._meta.verbose_name_plural}",
+                    user=request.user,
+                    view=self.__class__,
+                    records=list(form.cleaned_data['data']),
+                    headers=getattr(form, '_csv_headers', None),
+                    request=copy_safe_request(request)
+                )
+                messages.info(request, f"Importing {model._meta.verbose_name_plural} in the background")
+
+                return redirect(job.get_absolute_url())
+
+        elif form.is_valid():
             logger.debug("Import form validation was successful")
 
             try:
@@ -452,6 +512,9 @@ class BulkImportView(GetReturnURLMixin, BaseMultiObjectView):
                     if self.queryset.filter(pk__in=[obj.pk for obj in new_objs]).count() != len(new_objs):
                         raise PermissionsViolation
 
+                    # Record the changes within the transaction
+                    flush_objectchanges()
+
                 if new_objs:
                     msg = f"Imported {len(new_objs)} {model._meta.verbose_name_plural}"
                     logger.info(msg)
@@ -609,6 +672,9 @@ class BulkEditView(GetReturnURLMixin, BaseMultiObjectView):
                         if object_count != len(updated_objects):
                             raise PermissionsViolation
 
+                        # Record the changes within the transaction
+                        flush_objectchanges()
+
                     if updated_objects:
                         msg = f'Updated {len(updated_objects)} {model._meta.verbose_name_plural}'
                         logger.info(msg)
@@ -712,6 +778,9 @@ class BulkRenameView(GetReturnURLMixin, BaseMultiObjectView):
                             if self.queryset.filter(pk__in=renamed_pks).count() != len(selected_objects):
                                 raise PermissionsViolation
 
+                            # Record the changes within the transaction
+                            flush_objectchanges()
+
                             model_name = self.queryset.model._meta.verbose_name_plural
                             messages.success(request, f"Renamed {len(selected_objects)} {model_name}")
                             return redirect(self.get_return_url(request))
@@ -788,19 +857,25 @@ class BulkDeleteView(GetReturnURLMixin, BaseMultiObjectView):
                 queryset = self.queryset.filter(pk__in=pk_list)
                 deleted_count = queryset.count()
                 try:
-                    for obj in queryset:
-                        # Take a snapshot of change-logged models
-                        if hasattr(obj, 'snapshot'):
-                            obj.snapshot()
-                        obj.delete()
+                    with transaction.atomic():
+                        for obj in queryset:
+                            # Take a snapshot of change-logged models
+                            if hasattr(obj, 'snapshot'):
+                                obj.snapshot()
+                            obj.delete()
+
+                        # Record the changes within the transaction
+                        flush_objectchanges()
 
                 except ProtectedError as e:
                     logger.info("Caught ProtectedError while attempting to delete objects")
+                    clear_webhooks.send(sender=self)
                     handle_protectederror(queryset, request, e)
                     return redirect(self.get_return_url(request))
 
                 except AbortRequest as e:
                     logger.debug(e.message)
+                    clear_webhooks.send(sender=self)
                     messages.error(request, mark_safe(e.message))
                     return redirect(self.get_return_url(request))
 
@@ -911,6 +986,9 @@ class BulkComponentCreateView(GetReturnURLMixin, BaseMultiObjectView):
                         if self.queryset.filter(pk__in=[obj.pk for obj in new_components]).count() != len(new_components):
                             raise PermissionsViolation
 
+                        # Record the changes within the transaction
+                        flush_objectchanges()
+
                 except IntegrityError:
                     clear_webhooks.send(sender=self)
 
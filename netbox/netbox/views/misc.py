@@ -1,15 +1,20 @@
+import os
 import re
 from collections import namedtuple
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import redirect, render
 from django.views.generic import View
 from django_tables2 import RequestConfig
 from packaging import version
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
 
 from extras.dashboard.utils import get_dashboard
+from extras.webhooks_worker import WebhookDeliveryCollector
 from netbox.forms import SearchForm
 from netbox.search import LookupTypes
 from netbox.search.backends import search_backend
@@ -19,6 +24,7 @@ from utilities.paginator import EnhancedPaginator, get_paginate_count
 
 __all__ = (
     'HomeView',
+    'MetricsView',
     'SearchView',
 )
 
@@ -53,6 +59,22 @@ class HomeView(View):
         })
 
 
+class MetricsView(View):
+    """
+    Export Prometheus metrics. This replaces django_prometheus' ExportToDjangoView, so that the metrics recorded by RQ
+    workers (see WebhookDeliveryCollector) are also exported when the Prometheus client's multiprocess mode is in use.
+    """
+    def get(self, request):
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ or 'prometheus_multiproc_dir' in os.environ:
+            registry = CollectorRegistry()
+            MultiProcessCollector(registry)
+            registry.register(WebhookDeliveryCollector())
+        else:
+            registry = REGISTRY
+
+        return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
 class SearchView(View):
 
     def get(self, request):
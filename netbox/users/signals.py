@@ -1,6 +1,14 @@
 import logging
-from django.dispatch import receiver
+
+from django.contrib.auth.models import Group, User
 from django.contrib.auth.signals import user_login_failed
+from django.core.signals import request_finished
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from netbox.api.authentication import flush_token_usage, invalidate_token_cache
+from netbox.authentication import invalidate_object_permissions
+from .models import ObjectPermission, Token
 
 
 @receiver(user_login_failed)
@@ -8,3 +16,44 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
     logger = logging.getLogger('netbox.auth.login')
     username = credentials.get("username")
     logger.info(f"Failed login attempt for username: {username}")
+
+
+#
+# Token and permission caching
+#
+
+@receiver((post_save, post_delete), sender=User)
+def handle_user_changed(sender, instance, **kwargs):
+    """
+    Discard the cached API tokens and object permissions of a user when it is modified or deleted.
+    """
+    invalidate_token_cache(user=instance)
+    invalidate_object_permissions(user=instance)
+
+
+@receiver((post_save, post_delete), sender=Token)
+def handle_token_changed(sender, **kwargs):
+    """
+    Discard all cached API tokens when a token is modified or deleted.
+    """
+    invalidate_token_cache()
+
+
+@receiver((post_save, post_delete), sender=Group)
+@receiver((post_save, post_delete), sender=ObjectPermission)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=ObjectPermission.object_types.through)
+@receiver(m2m_changed, sender=ObjectPermission.groups.through)
+@receiver(m2m_changed, sender=ObjectPermission.users.through)
+def handle_permissions_changed(sender, **kwargs):
+    """
+    Discard all cached API tokens and object permissions when a group, group membership, or permission is modified,
+    as this may affect the permissions of any number of users.
+    """
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_token_cache()
+        invalidate_object_permissions()
+
+
+# Write the last_used times of recently used tokens to the database after each request
+request_finished.connect(flush_token_usage, dispatch_uid='flush_token_usage')
@@ -1,17 +1,25 @@
 import csv
 import json
+from collections import defaultdict
 from io import StringIO
 
 import yaml
 from django import forms
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.utils.translation import gettext as _
 
 from core.forms.mixins import SyncedDataMixin
 from utilities.choices import ImportFormatChoices
 from utilities.forms.utils import parse_csv
+from .fields import CSVContentTypeField, CSVModelChoiceField
 from .mixins import BootstrapMixin
 from ..choices import ImportMethodChoices
 
+__all__ = (
+    'BulkImportForm',
+    'RelatedObjectResolver',
+)
+
 
 class BulkImportForm(BootstrapMixin, SyncedDataMixin, forms.Form):
     import_method = forms.ChoiceField(
@@ -31,6 +39,11 @@ class BulkImportForm(BootstrapMixin, SyncedDataMixin, forms.Form):
         choices=ImportFormatChoices,
         initial=ImportFormatChoices.AUTO
     )
+    background_job = forms.BooleanField(
+        required=False,
+        label=_('Background job'),
+        help_text=_("Import the data as a background job, saving records in batches")
+    )
 
     data_field = 'data'
 
@@ -140,3 +153,67 @@ class BulkImportForm(BootstrapMixin, SyncedDataMixin, forms.Form):
             })
 
         return records
+
+
+class RelatedObjectResolver:
+    """
+    Resolves the related objects referenced by the records being imported in bulk. Rather than each CSVModelChoiceField
+    looking up its object individually, the objects matching every value of the field throughout all records are
+    retrieved with a single query for each field, accessor, and queryset.
+
+    Args:
+        records: The list of records (dictionaries) being imported
+    """
+    def __init__(self, records):
+        self.records = records
+        self._objects = {}
+
+    def bind(self, form):
+        """
+        Assign the resolved related objects to the fields of a model form. This must be called after the form has been
+        instantiated and its fields' querysets restricted, and before it is validated.
+        """
+        for field_name, field in form.fields.items():
+            if isinstance(field, CSVModelChoiceField) and not isinstance(field, CSVContentTypeField):
+                field.related_objects = self.get_objects(field_name, field)
+
+    def get_objects(self, field_name, field):
+        """
+        Return a dictionary mapping each value of the named field to the matching objects from the field's queryset,
+        or None if the field's objects cannot be resolved in bulk.
+        """
+        # Querysets filtered identically (e.g. by the same parent object) share their results
+        try:
+            key = (field_name, field.to_field_name, field.queryset.model, field.queryset.query.where)
+            if key not in self._objects:
+                self._objects[key] = self._get_objects(field_name, field)
+        except TypeError:
+            # The queryset's filters are not hashable
+            return None
+        return self._objects[key]
+
+    def _get_objects(self, field_name, field):
+        model = field.queryset.model
+        accessor = field.to_field_name or 'pk'
+        try:
+            model_field = model._meta.pk if accessor == 'pk' else model._meta.get_field(accessor)
+        except FieldDoesNotExist:
+            return None
+
+        # Collect the valid values of the field from all records
+        values = set()
+        for record in self.records:
+            value = record.get(field_name)
+            if isinstance(value, (str, int)) and value not in field.empty_values:
+                try:
+                    model_field.to_python(value)
+                except (TypeError, ValueError, ValidationError):
+                    continue
+                values.add(value)
+        if not values:
+            return {}
+
+        objects = defaultdict(list)
+        for obj in field.queryset.filter(**{f'{accessor}__in': values}):
+            objects[str(getattr(obj, model_field.attname))].append(obj)
+        return dict(objects)
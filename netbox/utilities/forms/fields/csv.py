@@ -51,13 +51,24 @@ class CSVTypedChoiceField(forms.TypedChoiceField):
 class CSVModelChoiceField(forms.ModelChoiceField):
     """
     Extends Django's `ModelChoiceField` to provide additional validation for CSV values.
+
+    When importing objects in bulk, `related_objects` may be set to a dictionary mapping values to the objects
+    resolved for them in advance (see RelatedObjectResolver). Values absent from the dictionary are looked up
+    individually.
     """
     default_error_messages = {
         'invalid_choice': 'Object not found: %(value)s',
     }
+    related_objects = None
 
     def to_python(self, value):
         try:
+            if self.related_objects is not None and value not in self.empty_values:
+                objects = self.related_objects.get(str(value), [])
+                if len(objects) > 1:
+                    raise MultipleObjectsReturned
+                if objects:
+                    return objects[0]
             return super().to_python(value)
         except MultipleObjectsReturned:
             raise forms.ValidationError(
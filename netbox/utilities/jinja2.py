@@ -1,11 +1,41 @@
+import json
+import threading
+from collections import OrderedDict
+
 from django.apps import apps
 from jinja2 import BaseLoader, TemplateNotFound
 from jinja2.meta import find_referenced_templates
+from jinja2.sandbox import SandboxedEnvironment
+from prometheus_client import Counter
+
+from netbox.config import get_config
 
 __all__ = (
     'ConfigTemplateLoader',
+    'get_environment',
+    'get_template',
+    'get_template_cache_key',
 )
 
+# The maximum number of compiled templates retained by each process
+TEMPLATE_CACHE_SIZE = 1000
+
+template_cache_hits = Counter(
+    'netbox_jinja2_template_cache_hits_total',
+    'Jinja2 templates retrieved from the compiled template cache'
+)
+template_cache_misses = Counter(
+    'netbox_jinja2_template_cache_misses_total',
+    'Jinja2 templates compiled due to a miss on the compiled template cache'
+)
+
+# Sandboxed environments, keyed by JINJA2_FILTERS and environment parameters
+_environments = {}
+
+# Compiled templates, ordered from least to most recently used
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
 
 class ConfigTemplateLoader(BaseLoader):
     """
@@ -35,3 +65,63 @@ class ConfigTemplateLoader(BaseLoader):
 
     def cache_templates(self, templates):
         self._template_cache.update(templates)
+
+
+def get_environment(**params):
+    """
+    Return the shared sandboxed Jinja2 environment for the configured JINJA2_FILTERS and the given environment
+    parameters (if any).
+    """
+    filters = get_config().JINJA2_FILTERS
+    key = (
+        tuple(sorted(filters.items(), key=lambda f: f[0])),
+        json.dumps(params, sort_keys=True),
+    )
+    if key not in _environments:
+        environment = SandboxedEnvironment(**params)
+        environment.filters.update(filters)
+        _environments[key] = environment
+    return _environments[key]
+
+
+def get_template_cache_key(instance, field_name):
+    """
+    Return a key identifying the revision of a template stored in the given field of a model instance, for use with
+    get_template(). Returns None for unsaved instances.
+    """
+    if instance.pk is None:
+        return None
+    return instance._meta.label_lower, instance.pk, field_name, getattr(instance, 'last_updated', None)
+
+
+def get_template(template_code, cache_key=None, environment=None):
+    """
+    Return the compiled Template for the given source code, retrieving it from a process-wide LRU cache if possible.
+
+    :param template_code: The template source code
+    :param cache_key: A key identifying the template, e.g. as returned by get_template_cache_key(). Keying templates
+        by their origin (rather than their source) ensures that superseded revisions are replaced in the cache. If
+        None, the source code is used.
+    :param environment: The Jinja2 environment (defaults to the shared environment returned by get_environment())
+    """
+    environment = environment or get_environment()
+    key = (id(environment), cache_key if cache_key is not None else template_code)
+
+    with _templates_lock:
+        cached = _templates.get(key)
+        # Verify that the cached template was compiled from the same source code
+        if cached is not None and cached[0] == template_code:
+            _templates.move_to_end(key)
+            template_cache_hits.inc()
+            return cached[1]
+
+    template_cache_misses.inc()
+    template = environment.from_string(template_code)
+
+    with _templates_lock:
+        _templates[key] = (template_code, template)
+        _templates.move_to_end(key)
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+
+    return template
@@ -1,10 +1,14 @@
+from contextlib import ExitStack, contextmanager
+
+from django.db.models import Manager
 from mptt.managers import TreeManager as TreeManager_
+from mptt.models import MPTTModel
 from mptt.querysets import TreeQuerySet as TreeQuerySet_
 
-from django.db.models import Manager
 from .querysets import RestrictedQuerySet
 
 __all__ = (
+    'delay_tree_updates',
     'TreeManager',
     'TreeQuerySet',
 )
@@ -22,3 +26,36 @@ class TreeManager(Manager.from_queryset(TreeQuerySet), TreeManager_):
     Extend django-mptt's TreeManager to incorporate RestrictedQuerySet().
     """
     pass
+
+
+def is_tree_model(model):
+    """
+    Return True if the given model maintains its own MPTT tree.
+    """
+    return issubclass(model, MPTTModel) and not model._meta.proxy and model._tree_manager.tree_model is model
+
+
+@contextmanager
+def delay_tree_updates(*models):
+    """
+    Suspend the maintenance of MPTT tree fields (lft, rght, etc.) upon each insertion, move, or deletion of an instance
+    of any of the given models. Instead, each tree modified within the context is rebuilt once (using partial_rebuild())
+    upon exit. Models which do not form MPTT trees are ignored, as are nested invocations. This should be called within
+    a transaction; if an exception is raised, no trees are rebuilt.
+
+    Tree fields are not updated until the context exits, so tree traversal methods (e.g. get_descendants()) may return
+    incorrect results for objects modified within the context. Rebuilding a tree takes a query per node, so this is
+    suited to bulk operations rather than to the modification of a few objects within a large tree.
+
+    This must be used only to create and delete objects. django-mptt does not correctly rebuild trees in which an
+    existing node has been moved (e.g. to the root, or to a different tree) while updates were delayed.
+
+        with transaction.atomic(), delay_tree_updates(Location):
+            for data in locations:
+                Location.objects.create(**data)
+    """
+    with ExitStack() as stack:
+        for model in models:
+            if is_tree_model(model):
+                stack.enter_context(model._tree_manager.delay_mptt_updates())
+        yield
@@ -1,8 +1,13 @@
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
+from prometheus_client import Counter
+
+from users.constants import CONSTRAINT_TOKEN_USER
 
 __all__ = (
+    'compile_constraints',
+    'get_constraints_filter',
     'get_permission_for_model',
     'permission_is_exempt',
     'qs_filter_from_constraints',
@@ -10,6 +15,11 @@ __all__ = (
     'resolve_permission_ct',
 )
 
+constraint_compilations = Counter(
+    'netbox_permission_constraint_compilations_total',
+    'ObjectPermission constraints compiled into queryset filters'
+)
+
 
 def get_permission_for_model(model, action):
     """
@@ -104,3 +114,27 @@ def qs_filter_from_constraints(constraints, tokens=None):
             return Q()
 
     return params
+
+
+def compile_constraints(constraints, user):
+    """
+    Compile the constraints of a permission assigned to the given user into a Q filter, replacing any tokens.
+    """
+    constraint_compilations.inc()
+    tokens = {
+        CONSTRAINT_TOKEN_USER: user,
+    }
+    return qs_filter_from_constraints(constraints, tokens)
+
+
+def get_constraints_filter(user, permission):
+    """
+    Return the compiled Q filter for the constraints of the named permission as granted to the user. Filters are
+    typically compiled when the user's object permissions are loaded (see ObjectPermissionMixin); any which are not
+    are compiled now and retained on the user instance.
+    """
+    if not hasattr(user, '_object_perm_filters'):
+        user._object_perm_filters = {}
+    if permission not in user._object_perm_filters:
+        user._object_perm_filters[permission] = compile_constraints(user._object_perm_cache[permission], user)
+    return user._object_perm_filters[permission]
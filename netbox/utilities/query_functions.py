@@ -1,9 +1,11 @@
 from django.contrib.postgres.aggregates import JSONBAgg
-from django.db.models import Func
+from django.db.models import Count, Func, Sum
 
 __all__ = (
     'CollateAsChar',
+    'EmptyGroupByCount',
     'EmptyGroupByJSONBAgg',
+    'EmptyGroupBySum',
 )
 
 
@@ -22,3 +24,19 @@ class EmptyGroupByJSONBAgg(JSONBAgg):
     incorrect. This subclass overrides the Django ORM aggregation control to remove the GROUP BY.
     """
     contains_aggregate = False
+
+
+class EmptyGroupByCount(Count):
+    """
+    A Count aggregation which does not introduce a GROUP BY clause. Used to count all the rows of a correlated
+    subquery (see EmptyGroupByJSONBAgg).
+    """
+    contains_aggregate = False
+
+
+class EmptyGroupBySum(Sum):
+    """
+    A Sum aggregation which does not introduce a GROUP BY clause. Used to sum all the rows of a correlated subquery
+    (see EmptyGroupByJSONBAgg).
+    """
+    contains_aggregate = False
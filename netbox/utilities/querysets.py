@@ -1,11 +1,11 @@
 from django.db.models import Prefetch, QuerySet
 
-from users.constants import CONSTRAINT_TOKEN_USER
-from utilities.permissions import permission_is_exempt, qs_filter_from_constraints
+from utilities.permissions import get_constraints_filter, permission_is_exempt
 
 __all__ = (
     'RestrictedPrefetch',
     'RestrictedQuerySet',
+    'StreamingQuerySet',
 )
 
 
@@ -60,13 +60,40 @@ class RestrictedQuerySet(QuerySet):
 
         # Filter the queryset to include only objects with allowed attributes
         else:
-            tokens = {
-                CONSTRAINT_TOKEN_USER: user,
-            }
-            attrs = qs_filter_from_constraints(user._object_perm_cache[permission_required], tokens)
+            attrs = get_constraints_filter(user, permission_required)
             # #8715: Avoid duplicates when JOIN on many-to-many fields without using DISTINCT.
             # DISTINCT acts globally on the entire request, which may not be desirable.
             allowed_objects = self.model.objects.filter(attrs)
             qs = self.filter(pk__in=allowed_objects)
 
         return qs
+
+
+class StreamingQuerySet:
+    """
+    Wrap a QuerySet such that iterating over it retrieves objects from the database in chunks (using `iterator()`)
+    rather than populating its result cache. This allows a large QuerySet to be processed, e.g. by a template, without
+    holding all of its objects in memory. Each iteration executes a new query. All other attributes are those of the
+    wrapped QuerySet.
+
+    :param queryset: The QuerySet to wrap
+    :param chunk_size: The number of objects to retrieve from the database at a time
+    """
+    def __init__(self, queryset, chunk_size):
+        self.queryset = queryset
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self.queryset.iterator(chunk_size=self.chunk_size)
+
+    def __len__(self):
+        return self.queryset.count()
+
+    def __bool__(self):
+        return self.queryset.exists()
+
+    def __getitem__(self, k):
+        return self.queryset[k]
+
+    def __getattr__(self, name):
+        return getattr(self.queryset, name)
@@ -1,15 +1,50 @@
+from django.db import connections
 from django_rq.queues import get_connection
-from rq import Worker
+from rq import SimpleWorker, Worker
+from rq.worker import WorkerStatus
 
 from netbox.config import get_config
 from netbox.constants import RQ_QUEUE_DEFAULT
 
 __all__ = (
+    'NetBoxWorker',
     'get_queue_for_model',
     'get_workers_for_queue',
 )
 
 
+class NetBoxWorker(Worker):
+    """
+    An RQ worker which executes webhook jobs within the worker process itself, as a SimpleWorker does, rather than
+    forking a work horse for each. This allows the HTTP sessions and compiled templates cached by the webhooks worker
+    to be reused across jobs. All other jobs are executed in a work horse.
+    """
+    in_process_functions = (
+        'extras.webhooks_worker.process_webhook',
+        'extras.webhooks_worker.process_webhook_batch',
+    )
+
+    def is_in_process(self, job):
+        return job.func_name in self.in_process_functions
+
+    def execute_job(self, job, queue):
+        if not self.is_in_process(job):
+            return super().execute_job(job, queue)
+
+        self.set_state(WorkerStatus.BUSY)
+        try:
+            self.perform_job(job, queue)
+        finally:
+            # Avoid sharing database connections with forked work horses
+            connections.close_all()
+        self.set_state(WorkerStatus.IDLE)
+
+    def get_heartbeat_ttl(self, job):
+        if self.is_in_process(job):
+            return SimpleWorker.get_heartbeat_ttl(self, job)
+        return super().get_heartbeat_ttl(job)
+
+
 def get_queue_for_model(model):
     """
     Return the configured queue name for jobs associated with the given model.
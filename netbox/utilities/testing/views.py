@@ -1,4 +1,5 @@
 import csv
+import io
 
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
@@ -450,19 +451,42 @@ class ViewTestCases:
             self.assertIn(instance1.get_absolute_url(), content)
             self.assertNotIn(instance2.get_absolute_url(), content)
 
+        def _get_csv_export(self, response):
+            """
+            Return the rows of a streamed CSV export, including the header row.
+            """
+            self.assertTrue(response.streaming)
+            content = b''.join(response.streaming_content).decode('utf-8')
+            return list(csv.reader(io.StringIO(content)))
+
         @override_settings(EXEMPT_VIEW_PERMISSIONS=['*'])
         def test_export_objects(self):
             url = self._get_url('list')
+            object_count = self._get_queryset().count()
 
             # Test default CSV export
             response = self.client.get(f'{url}?export')
             self.assertHttpStatus(response, 200)
             self.assertEqual(response.get('Content-Type'), 'text/csv; charset=utf-8')
+            header, *rows = self._get_csv_export(response)
+            self.assertIn('ID', header)
+            self.assertEqual(len(rows), object_count)
+            for row in rows:
+                self.assertEqual(len(row), len(header))
+            self.assertEqual(
+                sorted(int(row[header.index('ID')]) for row in rows),
+                sorted(self._get_queryset().values_list('pk', flat=True))
+            )
 
             # Test table-based export
             response = self.client.get(f'{url}?export=table')
             self.assertHttpStatus(response, 200)
             self.assertEqual(response.get('Content-Type'), 'text/csv; charset=utf-8')
+            header, *rows = self._get_csv_export(response)
+            self.assertTrue(header)
+            self.assertEqual(len(rows), object_count)
+            for row in rows:
+                self.assertEqual(len(row), len(header))
 
     class CreateMultipleObjectsViewTestCase(ModelViewTestCase):
         """
@@ -1,8 +1,10 @@
 from django import forms
 from django.test import TestCase
 
+from dcim.models import Region
 from utilities.choices import ImportFormatChoices
-from utilities.forms.bulk_import import BulkImportForm
+from utilities.forms.bulk_import import BulkImportForm, RelatedObjectResolver
+from utilities.forms.fields import CSVModelChoiceField
 from utilities.forms.utils import expand_alphanumeric_pattern, expand_ipaddress_pattern
 
 
@@ -330,3 +332,62 @@ class ImportFormTest(TestCase):
             form._detect_format('')
         with self.assertRaises(forms.ValidationError):
             form._detect_format('?')
+
+
+class RelatedObjectResolverTest(TestCase):
+
+    class RegionForm(forms.Form):
+        region = CSVModelChoiceField(
+            queryset=Region.objects.all(),
+            required=False,
+            to_field_name='name'
+        )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.regions = (
+            Region.objects.create(name='Region 1', slug='region-1'),
+            Region.objects.create(name='Region 2', slug='region-2'),
+        )
+        # Create two regions with the same name
+        Region.objects.create(name='Region 3', slug='region-3a', parent=cls.regions[0])
+        Region.objects.create(name='Region 3', slug='region-3b', parent=cls.regions[1])
+
+    def test_resolve_related_objects(self):
+        records = [
+            {'region': 'Region 1'},
+            {'region': 'Region 2'},
+            {'region': 'Region 1'},
+            {'region': ''},
+        ]
+        resolver = RelatedObjectResolver(records)
+        model_forms = [self.RegionForm(data=record) for record in records]
+
+        # Objects for all records should be resolved using a single query
+        with self.assertNumQueries(1):
+            for form in model_forms:
+                resolver.bind(form)
+                self.assertTrue(form.is_valid())
+
+        self.assertEqual(model_forms[0].cleaned_data['region'], self.regions[0])
+        self.assertEqual(model_forms[1].cleaned_data['region'], self.regions[1])
+        self.assertEqual(model_forms[2].cleaned_data['region'], self.regions[0])
+        self.assertIsNone(model_forms[3].cleaned_data['region'])
+
+    def test_invalid_values(self):
+        records = [
+            {'region': 'Region 3'},
+            {'region': 'Region 4'},
+        ]
+        resolver = RelatedObjectResolver(records)
+        model_forms = [self.RegionForm(data=record) for record in records]
+        for form in model_forms:
+            resolver.bind(form)
+
+        # Non-unique value
+        self.assertFalse(model_forms[0].is_valid())
+        self.assertIn('not a unique value', model_forms[0].errors['region'][0])
+
+        # Nonexistent value
+        self.assertFalse(model_forms[1].is_valid())
+        self.assertIn('Object not found', model_forms[1].errors['region'][0])
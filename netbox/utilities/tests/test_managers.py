@@ -1,6 +1,7 @@
 from django.test import TestCase
 
-from dcim.models import Site
+from dcim.models import Region, Site
+from utilities.mptt import delay_tree_updates
 
 
 class NaturalOrderByManagerTest(TestCase):
@@ -188,3 +189,26 @@ class NaturalOrderByManagerTest(TestCase):
             '999Charlie100',
             '999Charlie999',
         ])
+
+
+class TreeManagerTest(TestCase):
+
+    def test_delay_tree_updates(self):
+        parent = Region.objects.create(name='Region 1', slug='region-1')
+
+        with delay_tree_updates(Region):
+            # Create the child regions in reverse order to verify ordering by name
+            for i in reversed(range(1, 6)):
+                child = Region.objects.create(name=f'Region 1-{i}', slug=f'region-1-{i}', parent=parent)
+                Region.objects.create(name=f'Region 1-{i}-1', slug=f'region-1-{i}-1', parent=child)
+
+        # Tree fields are consistent once the affected tree has been rebuilt
+        parent.refresh_from_db()
+        self.assertEqual(parent.get_descendant_count(), 10)
+        self.assertEqual(
+            [region.name for region in parent.get_children()],
+            [f'Region 1-{i}' for i in range(1, 6)]
+        )
+        for region in parent.get_children():
+            self.assertEqual(region.level, 1)
+            self.assertEqual([child.level for child in region.get_children()], [2])
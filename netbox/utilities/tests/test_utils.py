@@ -1,7 +1,8 @@
 from django.http import QueryDict
 from django.test import TestCase
 
-from utilities.utils import deepmerge, dict_to_filter_params, normalize_querydict
+from utilities.jinja2 import get_template
+from utilities.utils import deepmerge, dict_to_filter_params, normalize_querydict, render_jinja2
 
 
 class DictToFilterParamsTest(TestCase):
@@ -128,3 +129,22 @@ class DeepMergeTest(TestCase):
             deepmerge(dict1, dict2),
             merged
         )
+
+
+class RenderJinja2Test(TestCase):
+    """
+    Validate the caching of compiled templates by render_jinja2().
+    """
+    def test_render_jinja2(self):
+        self.assertEqual(render_jinja2('Hello {{ name }}', {'name': 'World'}), 'Hello World')
+
+        # Templates with the same source are compiled once
+        self.assertIs(get_template('{{ foo }}'), get_template('{{ foo }}'))
+
+    def test_render_jinja2_cache_key(self):
+        cache_key = ('extras.customlink', 1, 'link_text', None)
+        self.assertEqual(render_jinja2('{{ foo }}', {'foo': 'bar'}, cache_key), 'bar')
+
+        # A change to the source code of a template invalidates the cached template
+        self.assertEqual(render_jinja2('{{ foo }}!', {'foo': 'bar'}, cache_key), 'bar!')
+        self.assertIs(get_template('{{ foo }}!', cache_key), get_template('{{ foo }}!', cache_key))
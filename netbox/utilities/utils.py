@@ -1,5 +1,7 @@
+import csv
 import datetime
 import decimal
+import io
 import json
 import re
 from decimal import Decimal
@@ -14,15 +16,14 @@ from django.http import QueryDict
 from django.utils.html import escape
 from django.utils import timezone
 from django.utils.timezone import localtime
-from jinja2.sandbox import SandboxedEnvironment
 from mptt.models import MPTTModel
 
 from dcim.choices import CableLengthUnitChoices, WeightUnitChoices
 from extras.plugins import PluginConfig
 from extras.utils import is_taggable
-from netbox.config import get_config
 from urllib.parse import urlencode
 from utilities.constants import HTTP_REQUEST_META_SAFE_COPY
+from utilities.jinja2 import get_template
 
 
 def title(value):
@@ -99,6 +100,19 @@ def csv_format(data):
     return ','.join(csv)
 
 
+def iter_csv(rows):
+    """
+    Yield each of the given rows (iterables of values) as a line of CSV-formatted text.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
 def foreground_color(bg_color, dark='000000', light='ffffff'):
     """
     Return the ideal foreground color (dark or light) for a given background color in hexadecimal RGB format.
@@ -331,13 +345,16 @@ def to_grams(weight, unit):
     raise ValueError(f"Unknown unit {unit}. Must be 'kg', 'g', 'lb', 'oz'.")
 
 
-def render_jinja2(template_code, context):
+def render_jinja2(template_code, context, cache_key=None):
     """
-    Render a Jinja2 template with the provided context. Return the rendered content.
+    Render a Jinja2 template with the provided context. Return the rendered content. The compiled template is cached
+    (see utilities.jinja2.get_template()).
+
+    :param template_code: The template source code
+    :param context: The context passed to the template
+    :param cache_key: A key identifying the template within the cache (optional)
     """
-    environment = SandboxedEnvironment()
-    environment.filters.update(get_config().JINJA2_FILTERS)
-    return environment.from_string(source=template_code).render(**context)
+    return get_template(template_code, cache_key=cache_key).render(**context)
 
 
 def prepare_cloned_fields(instance):